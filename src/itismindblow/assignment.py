@@ -14,18 +14,45 @@
 - Сохранить результаты в dbpedia_results.json
 """
 
+import argparse
+import hashlib
 import json
-from typing import Dict, List, Any
+import os
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 
-import pandas as pd
-from datasets import load_dataset
+import pyarrow as pa
 
+from dbpedia_cache import TokenizedCorpus, load_or_build_token_cache
+from dbpedia_charts import DEFAULT_CHARTS, ChartRenderer, parse_chart
+from dbpedia_dedup import (
+    DEFAULT_THRESHOLD,
+    duplicate_mask,
+    duplicate_report,
+    find_near_duplicates,
+)
+from dbpedia_engine import (
+    DBpediaAnalyzer,
+    build_analyzer,
+    merge_partials,
+    split_into_shards,
+    stream_analyzer,
+)
+from dbpedia_ngrams import DEFAULT_MEMORY_MB, ngram_name
 from dbpedia_modules import (
-    analyze_text_statistics,
-    create_visualization,
-    extract_top_words_by_category,
+    count_labels,
     get_category_name,
+    get_column,
 )
+from dbpedia_profile import StageProfiler
+from dbpedia_results import (
+    RESULTS_JSON_PATH,
+    RESULTS_NPZ_PATH,
+    write_results,
+    write_results_json,
+)
+from dbpedia_snapshot import SNAPSHOT_PATH, load_snapshot, stratified_sample
+from dbpedia_stats import QUANTILE_MODES
+from dbpedia_tokenizers import DEFAULT_TOKENIZER, TOKENIZER_NAMES
 
 
 def load_dbpedia_dataset() -> List[Dict[str, Any]]:
@@ -35,6 +62,10 @@ def load_dbpedia_dataset() -> List[Dict[str, Any]]:
     Returns:
         List[Dict]: Список примеров с полями 'title', 'content', 'label'.
     """
+    # datasets и pandas загружаются только при загрузке датасета
+    import pandas as pd
+    from datasets import load_dataset
+
     dataset = load_dataset("dbpedia_14", split="train")
     # Используем pandas для эффективной конвертации
     df = pd.DataFrame(dataset)
@@ -43,62 +74,701 @@ def load_dbpedia_dataset() -> List[Dict[str, Any]]:
     return samples
 
 
-def analyze_category_distribution(dataset: List[Dict[str, Any]]):
+def load_dbpedia_table() -> pa.Table:
+    """
+    Загружает датасет DBpedia как Arrow-таблицу без копирования.
+
+    Таблица ссылается на memory-mapped кэш datasets, поэтому ни pandas,
+    ни построчные словари не создаются.
+
+    Returns:
+        pa.Table: Таблица с колонками 'title', 'content', 'label'.
+    """
+    from datasets import load_dataset
+
+    dataset = load_dataset("dbpedia_14", split="train")
+    return dataset.data.table.select(["title", "content", "label"])
+
+
+def load_tokenized_corpus(
+    cache_dir: str = ".dbpedia_cache",
+    workers: int = 1,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    dataset: Any = None,
+) -> TokenizedCorpus:
+    """
+    Загружает токены датасета DBpedia из дискового кэша.
+
+    Кэш привязан к отпечатку датасета datasets и конфигурации токенизатора;
+    если подходящего кэша нет, он строится и сохраняется.
+
+    Args:
+        cache_dir: Каталог кэша.
+        workers: Количество процессов для токенизации при построении кэша.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+        dataset: Уже загруженный datasets.Dataset (None — загрузить).
+
+    Returns:
+        TokenizedCorpus: Токенизированный корпус с memory-mapped массивами.
+    """
+    if dataset is None:
+        from datasets import load_dataset
+
+        dataset = load_dataset("dbpedia_14", split="train")
+    table = dataset.data.table.select(["title", "content", "label"])
+    return load_or_build_token_cache(
+        table,
+        cache_dir,
+        fingerprint=dataset._fingerprint,
+        workers=workers,
+        tokenizer=tokenizer,
+    )
+
+
+def iter_dbpedia_batches(batch_size: int = 10_000) -> Iterator[Dict[str, List[Any]]]:
+    """
+    Читает датасет DBpedia пакетами фиксированного размера.
+
+    Датасет остается в memory-mapped Arrow-кэше datasets, в памяти
+    одновременно находится только один пакет.
+
+    Args:
+        batch_size: Количество записей в пакете.
+
+    Yields:
+        Dict: Пакет {'title': [...], 'content': [...], 'label': [...]}.
+    """
+    from datasets import load_dataset
+
+    dataset = load_dataset("dbpedia_14", split="train")
+    dataset = dataset.select_columns(["title", "content", "label"])
+    yield from dataset.iter(batch_size=batch_size)
+
+
+def load_table(args: argparse.Namespace) -> pa.Table:
+    """
+    Загружает таблицу датасета из источника, выбранного аргументами.
+
+    С --snapshot таблица читается из локального Feather-снимка (он создается
+    при первом запуске), иначе — из кэша datasets. С --sample берется
+    стратифицированная по категориям выборка.
+
+    Args:
+        args: Параметры запуска (см. parse_args).
+
+    Returns:
+        pa.Table: Таблица с колонками 'title', 'content', 'label'.
+    """
+    if args.snapshot:
+        return load_snapshot(
+            args.snapshot, ["title", "content", "label"], args.sample
+        )
+    table = load_dbpedia_table()
+    if args.sample is not None:
+        table = stratified_sample(table, args.sample)
+    return table
+
+
+def analyze_category_distribution(dataset: Any) -> Dict[str, int]:
     """
     Анализирует распределение по 14 категориям.
 
     Args:
-        dataset: Список примеров с полем 'label'.
+        dataset: Примеры с полем 'label' (список словарей, DataFrame
+            или Arrow-таблица).
 
     Returns:
         Dict: Распределение по категориям {category_name: count}.
     """
-    distribution = {}
+    # Подсчитываем все категории за один проход через bincount
+    label_counts = count_labels(get_column(dataset, "label"))
+
+    return {
+        get_category_name(label): int(label_counts[label])
+        for label in range(14)  # DBpedia имеет 14 категорий
+    }
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Разбирает номер шарда вида 'INDEX/COUNT' (нумерация с нуля).
 
-    # Подсчитываем количество для каждой категории
-    for label in range(14):  # DBpedia имеет 14 категорий
-        category_name = get_category_name(label)
-        count = sum(1 for item in dataset if item["label"] == label)
-        distribution[category_name] = count
+    Args:
+        value: Строка, например '2/8'.
 
-    return distribution
+    Returns:
+        Tuple: (index, count).
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается INDEX/COUNT, получено {value!r}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"номер шарда вне диапазона: {value!r}")
+    return index, count
 
 
-def main() -> None:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """
-    Основная функция анализа DBpedia.
+    Разбирает аргументы командной строки.
+
+    Args:
+        argv: Аргументы (по умолчанию sys.argv).
+
+    Returns:
+        argparse.Namespace: Параметры запуска.
+    """
+    parser = argparse.ArgumentParser(description="Анализ датасета DBpedia")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="количество процессов для токенизации и подсчета (по умолчанию 1)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="потоковый режим: чтение пакетами, память не зависит от размера корпуса",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10_000,
+        help="размер пакета в потоковом режиме (по умолчанию 10000)",
+    )
+    parser.add_argument(
+        "--quantiles",
+        choices=QUANTILE_MODES,
+        default="exact",
+        help="квантили в потоковом режиме: точная гистограмма или t-digest",
+    )
+    parser.add_argument(
+        "--approx-top-k",
+        type=int,
+        default=None,
+        metavar="CAPACITY",
+        help="приближенный топ слов: не более CAPACITY счетчиков на категорию",
+    )
+    parser.add_argument(
+        "--ngrams",
+        nargs="+",
+        type=int,
+        default=[],
+        metavar="N",
+        help="также найти топ n-грамм размера N по категориям (например 2 3)",
+    )
+    parser.add_argument(
+        "--ngram-memory-mb",
+        type=float,
+        default=DEFAULT_MEMORY_MB,
+        help="примерный лимит памяти счетчиков n-грамм, МБ "
+        f"(по умолчанию {DEFAULT_MEMORY_MB})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=".dbpedia_cache",
+        help="каталог дискового кэша токенов (по умолчанию .dbpedia_cache)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="сохранять токены в дисковый кэш (--cache-dir) и читать их из него",
+    )
+    parser.add_argument(
+        "--snapshot",
+        nargs="?",
+        const=SNAPSHOT_PATH,
+        default=None,
+        metavar="PATH",
+        help=f"читать датасет из локального снимка (по умолчанию {SNAPSHOT_PATH}), "
+        "создав его при первом запуске",
+    )
+    parser.add_argument(
+        "--sample",
+        type=float,
+        default=None,
+        metavar="FRACTION",
+        help="стратифицированная выборка: доля строк каждой категории (например 0.01)",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        choices=TOKENIZER_NAMES,
+        default=DEFAULT_TOKENIZER,
+        help="токенизатор: ascii — только латиница (по умолчанию), "
+        "unicode-<язык> — буквы любых алфавитов и стоп-слова языка",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="INDEX/COUNT",
+        help="обработать только шард INDEX из COUNT непрерывных частей датасета",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        default=None,
+        metavar="PARTIAL",
+        help="объединить файлы частичных результатов (в порядке шардов)",
+    )
+    parser.add_argument(
+        "--partial-output",
+        default=None,
+        metavar="PATH",
+        help="сохранить частичный результат в PATH вместо итогового JSON",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="обработать только строки, добавленные после предыдущего запуска",
+    )
+    parser.add_argument(
+        "--state",
+        default="dbpedia_state.npz",
+        help="файл состояния для --incremental (по умолчанию dbpedia_state.npz)",
+    )
+    parser.add_argument(
+        "--dedup",
+        nargs="?",
+        type=float,
+        const=DEFAULT_THRESHOLD,
+        default=None,
+        metavar="THRESHOLD",
+        help="найти почти дубликаты контента (MinHash LSH) со сходством не ниже "
+        f"THRESHOLD (по умолчанию {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--exclude-duplicates",
+        action="store_true",
+        help="исключить найденные дубликаты (кроме первого) из остальной статистики",
+    )
+    parser.add_argument(
+        "--chart",
+        action="append",
+        type=parse_chart,
+        default=None,
+        metavar="PATH[:WxH][@DPI]",
+        help="построить график распределения (формат по расширению: png, svg, ...; "
+        "можно повторять, по умолчанию visualization.png 14x10 дюймов, 300 dpi)",
+    )
+    parser.add_argument(
+        "--results-format",
+        choices=("json", "npz"),
+        default="json",
+        help=f"формат результатов: {RESULTS_JSON_PATH} или компактный "
+        f"{RESULTS_NPZ_PATH} (JSON из него строит dbpedia_results.py)",
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="PATH",
+        help="сохранить этапы в формате Chrome trace (chrome://tracing, Perfetto)",
+    )
+    parser.add_argument(
+        "--term-counts",
+        default=None,
+        metavar="PATH",
+        help="сохранить матрицу частот слов по категориям (.npz)",
+    )
+    args = parser.parse_args(argv)
+    if args.chart is None:
+        args.chart = list(DEFAULT_CHARTS)
+    if args.dedup is not None and not 0 < args.dedup <= 1:
+        parser.error("порог --dedup должен быть в (0, 1]")
+    if args.exclude_duplicates and args.dedup is None:
+        parser.error("--exclude-duplicates требует --dedup")
+    if any(n < 2 for n in args.ngrams):
+        parser.error("размер n-граммы в --ngrams должен быть не меньше 2")
+    args.ngrams = sorted(set(args.ngrams))
+    if args.dedup is not None and (args.merge or args.incremental):
+        parser.error("--dedup несовместим с --merge и --incremental")
+    return args
+
+
+def analyze_table(table: pa.Table, args: argparse.Namespace) -> DBpediaAnalyzer:
+    """
+    Анализирует Arrow-таблицу в режиме, выбранном аргументами.
+
+    Args:
+        table: Таблица с колонками 'title', 'content', 'label'.
+        args: Параметры запуска (см. parse_args).
+
+    Returns:
+        DBpediaAnalyzer: Заполненный накопитель.
+    """
+    if args.streaming:
+        return stream_analyzer(
+            table.to_batches(max_chunksize=args.batch_size),
+            workers=args.workers,
+            top_k_capacity=args.approx_top_k,
+            quantiles=args.quantiles,
+            ngram_sizes=args.ngrams,
+            ngram_memory_mb=args.ngram_memory_mb,
+            tokenizer=args.tokenizer,
+        )
+    return build_analyzer(
+        table,
+        workers=args.workers,
+        top_k_capacity=args.approx_top_k,
+        ngram_sizes=args.ngrams,
+        ngram_memory_mb=args.ngram_memory_mb,
+        tokenizer=args.tokenizer,
+    )
+
+
+def row_digest(table: pa.Table, row: int) -> str:
+    """
+    Вычисляет отпечаток одной строки таблицы.
+
+    Args:
+        table: Таблица с колонками 'title', 'content', 'label'.
+        row: Номер строки.
+
+    Returns:
+        str: Хэш значений строки.
+    """
+    record = table.slice(row, 1).to_pylist()[0]
+    text = "\0".join(str(record[field]) for field in ("title", "content", "label"))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def update_incrementally(table: pa.Table, args: argparse.Namespace) -> DBpediaAnalyzer:
+    """
+    Дополняет сохраненное состояние анализа строками, добавленными в конец.
+
+    Состояние (см. DBpediaAnalyzer.save) хранится в args.state, а рядом,
+    в .json-файле, — отпечаток последней обработанной строки. Если таблица
+    стала короче, последняя обработанная строка изменилась или режим
+    анализа другой, состояние пересчитывается с нуля.
+
+    Args:
+        table: Таблица с колонками 'title', 'content', 'label'.
+        args: Параметры запуска (см. parse_args).
+
+    Returns:
+        DBpediaAnalyzer: Накопитель по всей таблице.
+    """
+    meta_path = os.path.splitext(args.state)[0] + ".json"
+    analyzer = None
+    if os.path.exists(args.state) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        analyzer = DBpediaAnalyzer.load(args.state)
+        rows = analyzer.total_samples
+        same_mode = (
+            analyzer.streaming,
+            analyzer.top_k_capacity,
+            analyzer.ngram_sizes,
+            analyzer.tokenizer,
+        ) == (
+            args.streaming,
+            args.approx_top_k,
+            tuple(args.ngrams),
+            args.tokenizer,
+        ) and (
+            not args.streaming or analyzer.quantiles == args.quantiles
+        )
+        if (
+            not same_mode
+            or rows > table.num_rows
+            or (rows and row_digest(table, rows - 1) != meta.get("last_row_digest"))
+        ):
+            print("Сохраненное состояние не соответствует датасету, полный пересчет...")
+            analyzer = None
+
+    start = analyzer.total_samples if analyzer is not None else 0
+    print(f"Анализ новых строк: {table.num_rows - start}...")
+    delta = analyze_table(table.slice(start), args)
+    analyzer = delta if analyzer is None else analyzer.merge(delta)
+
+    # Состояние пишется до отпечатка: после прерванной записи отпечаток
+    # не совпадет с состоянием, и следующий запуск пересчитает все заново
+    analyzer.save(args.state + ".tmp")
+    os.replace(args.state + ".tmp", args.state)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "rows": analyzer.total_samples,
+                "last_row_digest": row_digest(table, analyzer.total_samples - 1)
+                if analyzer.total_samples
+                else None,
+            },
+            f,
+            indent=2,
+        )
+    return analyzer
+
+
+def deduplicate_table(
+    table: pa.Table, args: argparse.Namespace, profiler: StageProfiler
+) -> Tuple[pa.Table, Dict[str, Any]]:
+    """
+    Находит почти дубликаты контента и при необходимости исключает их.
+
+    Args:
+        table: Таблица с колонками 'title', 'content', 'label'.
+        args: Параметры запуска (см. parse_args).
+        profiler: Профилировщик этапа deduplication.
+
+    Returns:
+        Tuple: Таблица (без дубликатов с --exclude-duplicates) и раздел
+        near_duplicates результатов.
+    """
+    print(f"Поиск почти дубликатов (порог сходства {args.dedup})...")
+    with profiler.stage("deduplication", table.num_rows):
+        clusters = find_near_duplicates(
+            table,
+            args.dedup,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            tokenizer=args.tokenizer,
+        )
+        report = duplicate_report(clusters, table.column("label"), args.dedup)
+        if args.exclude_duplicates:
+            table = table.filter(pa.array(duplicate_mask(clusters, table.num_rows)))
+    report["excluded"] = args.exclude_duplicates
+    print(f"Найдено дубликатов: {report['duplicate_documents']}")
+    return table, report
+
+
+def run_analysis(
+    args: argparse.Namespace, profiler: StageProfiler
+) -> Tuple[DBpediaAnalyzer, Dict[str, Any]]:
+    """
+    Заполняет накопитель в режиме, выбранном аргументами командной строки.
 
-    Загружает данные, выполняет анализ и сохраняет результаты.
+    С --dedup датасет (или шард) загружается таблицей, в нем ищутся почти
+    дубликаты, и анализ выполняется по таблице без токенного кэша.
+
+    Args:
+        args: Параметры запуска (см. parse_args).
+        profiler: Профилировщик этапов load, deduplication и analysis.
+
+    Returns:
+        Tuple: Заполненный накопитель и дополнительные разделы результатов.
     """
+    if args.merge:
+        print(f"Объединение частичных результатов ({len(args.merge)})...")
+        with profiler.stage("load") as record:
+            analyzer = merge_partials(args.merge)
+            record["rows"] = analyzer.total_samples
+        return analyzer, {}
+
+    if args.shard is not None or args.dedup is not None:
+        with profiler.stage("load") as record:
+            table = load_table(args)
+            if args.shard is not None:
+                index, count = args.shard
+                print(f"Анализ шарда {index} из {count} датасета DBpedia...")
+                table = split_into_shards(table, count)[index]
+            record["rows"] = table.num_rows
+        sections = {}
+        if args.dedup is not None:
+            table, sections["near_duplicates"] = deduplicate_table(
+                table, args, profiler
+            )
+        with profiler.stage("analysis", table.num_rows):
+            return analyze_table(table, args), sections
+
+    if args.incremental:
+        print("Инкрементальный анализ датасета DBpedia...")
+        with profiler.stage("load") as record:
+            table = load_table(args)
+            record["rows"] = table.num_rows
+        with profiler.stage("analysis", table.num_rows):
+            return update_incrementally(table, args), {}
+
+    if args.streaming:
+        # Чтение и анализ пакетов чередуются, поэтому этап один
+        print("Потоковый анализ датасета DBpedia...")
+        if args.snapshot or args.sample is not None:
+            batches = load_table(args).to_batches(max_chunksize=args.batch_size)
+        else:
+            batches = iter_dbpedia_batches(args.batch_size)
+        with profiler.stage("analysis") as record:
+            analyzer = stream_analyzer(
+                batches,
+                workers=args.workers,
+                top_k_capacity=args.approx_top_k,
+                quantiles=args.quantiles,
+                ngram_sizes=args.ngrams,
+                ngram_memory_mb=args.ngram_memory_mb,
+                tokenizer=args.tokenizer,
+            )
+            record["rows"] = analyzer.total_samples
+        return analyzer, {}
+
+    if args.cache:
+        print("Загрузка токенов DBpedia из кэша...")
+        with profiler.stage("load") as record:
+            if args.snapshot or args.sample is not None:
+                # Отпечаток снимка или выборки вычисляется по буферам таблицы
+                corpus = load_or_build_token_cache(
+                    load_table(args),
+                    args.cache_dir,
+                    workers=args.workers,
+                    tokenizer=args.tokenizer,
+                )
+            else:
+                corpus = load_tokenized_corpus(
+                    args.cache_dir, workers=args.workers, tokenizer=args.tokenizer
+                )
+            record["rows"] = len(corpus)
+
+        print("Анализ распределения, статистики текстов и топ слов...")
+        with profiler.stage("analysis", len(corpus)):
+            analyzer = DBpediaAnalyzer(
+                top_k_capacity=args.approx_top_k,
+                ngram_sizes=args.ngrams,
+                ngram_memory_mb=args.ngram_memory_mb,
+                tokenizer=args.tokenizer,
+            )
+            return analyzer.update_tokenized(corpus), {}
+
     print("Загрузка датасета DBpedia...")
-    dataset = load_dbpedia_dataset()
+    with profiler.stage("load") as record:
+        dataset = load_table(args)
+        record["rows"] = dataset.num_rows
+
+    # Распределение, статистика текстов и топ слов считаются за один проход
+    print("Анализ распределения, статистики текстов и топ слов...")
+    with profiler.stage("analysis", dataset.num_rows):
+        return analyze_table(dataset, args), {}
 
-    print("Анализ распределения по категориям...")
-    category_distribution = analyze_category_distribution(dataset)
 
-    print("Анализ статистики текстов...")
-    text_stats = analyze_text_statistics(dataset)
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Основная функция анализа DBpedia.
+
+    Загружает данные, выполняет анализ и сохраняет результаты. С --shard
+    и --partial-output анализирует часть датасета и сохраняет частичный
+    результат; с --merge объединяет частичные результаты (итог снова можно
+    сохранить как частичный для иерархического объединения). С --incremental
+    обрабатываются только строки, добавленные после предыдущего запуска.
+    С --dedup в результаты добавляется раздел near_duplicates, а с
+    --exclude-duplicates дубликаты не учитываются в остальной статистике.
+
+    Графики строятся в фоновых процессах (см. ChartRenderer): процессы
+    запускаются до загрузки данных, графики начинают рисоваться сразу
+    после подсчета распределения, пока считаются остальные разделы.
+    С --results-format npz вместо JSON пишется компактный архив
+    dbpedia_results.npz (см. dbpedia_results.py).
+
+    Время, процессорное время, пиковый RSS и скорость каждого этапа
+    записываются в раздел profile результатов и, с --trace, в Chrome trace
+    (этап записи самих результатов есть только в trace).
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv).
+    """
+    args = parse_args(argv)
+    profiler = StageProfiler()
+    if args.partial_output:
+        analyzer, _ = run_analysis(args, profiler)
+        rows = analyzer.total_samples
+        with profiler.stage("partial_write", rows):
+            analyzer.save(args.partial_output)
+        if args.trace:
+            profiler.write_chrome_trace(args.trace)
+        print(f"Частичный результат сохранен в {args.partial_output}")
+        print(f"Обработано примеров: {rows}")
+        return
 
-    print("Извлечение топ слов по категориям...")
-    top_words = extract_top_words_by_category(dataset, top_n=25)
+    with ChartRenderer(args.chart) as renderer:
+        analyzer, sections = run_analysis(args, profiler)
+        write_report(args, profiler, analyzer, sections, renderer)
 
-    print("Создание визуализации...")
-    create_visualization(category_distribution)
+
+def write_report(
+    args: argparse.Namespace,
+    profiler: StageProfiler,
+    analyzer: DBpediaAnalyzer,
+    sections: Dict[str, Any],
+    renderer: ChartRenderer,
+) -> None:
+    """
+    Собирает разделы результатов, дожидается графиков и сохраняет результаты.
+
+    Args:
+        args: Параметры запуска.
+        profiler: Профилировщик этапов.
+        analyzer: Заполненный накопитель.
+        sections: Дополнительные разделы результатов (например, near_duplicates).
+        renderer: Запущенный пул построения графиков.
+    """
+    rows = analyzer.total_samples
+    # Разделы результатов собираются так же, как в DBpediaAnalyzer.results,
+    # но каждый под своим этапом профилировщика
+    with profiler.stage("distribution", rows):
+        category_distribution = analyzer.category_distribution()
+    print("Создание визуализации в фоне...")
+    renderer.start(category_distribution)
+    with profiler.stage("text_statistics", rows):
+        text_statistics = analyzer.text_statistics()
+    with profiler.stage("per_category_statistics", rows):
+        per_category_statistics = analyzer.per_category_statistics()
+    with profiler.stage("top_words", rows):
+        top_words = analyzer.top_words(top_n=25)
+        top_word_errors = (
+            analyzer.top_word_errors(top_n=25)
+            if analyzer.heavy_hitters is not None
+            else None
+        )
+    distinctive_words = None
+    if analyzer.terms is not None:
+        with profiler.stage("distinctive_words", rows):
+            distinctive_words = analyzer.distinctive_words(top_n=25)
+    top_ngrams = {}
+    if analyzer.ngram_sizes:
+        with profiler.stage("ngrams", rows):
+            for n in analyzer.ngram_sizes:
+                top_ngrams[f"top_{ngram_name(n)}_by_category"] = analyzer.top_ngrams(
+                    n, top_n=25
+                )
+            top_ngrams["ngram_error_bounds"] = analyzer.ngram_error_bounds()
 
     # Сохранение результатов с общим количеством образцов
     results = {
         "dataset": "dbpedia_14",
-        "total_samples": len(dataset),
+        "total_samples": rows,
         "category_distribution": category_distribution,
-        "text_statistics": text_stats,
+        "text_statistics": text_statistics,
+        "per_category_statistics": per_category_statistics,
         "top_words_by_category": top_words,
     }
+    if top_word_errors is not None:
+        results["top_words_errors_by_category"] = top_word_errors
+    if distinctive_words is not None:
+        results["distinctive_words_by_category"] = distinctive_words
+    results.update(top_ngrams)
+    results.update(sections)
+
+    # Матрица частот переиспользуется для запросов без повторной токенизации
+    if args.term_counts and analyzer.terms is not None:
+        with profiler.stage("term_counts_write"):
+            analyzer.terms.save(args.term_counts)
+
+    print("Ожидание графиков...")
+    with profiler.stage("visualization"):
+        charts = renderer.wait()
 
-    with open("dbpedia_results.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    # Раздел profile снимается перед записью, поэтому этап записи
+    # результатов есть только в Chrome trace
+    results["profile"] = profiler.to_dict()
+    if args.results_format == "npz":
+        results_path = RESULTS_NPZ_PATH
+        with profiler.stage("npz_write"):
+            write_results(results, results_path)
+    else:
+        results_path = RESULTS_JSON_PATH
+        with profiler.stage("json_write"):
+            write_results_json(results, results_path)
+    if args.trace:
+        profiler.write_chrome_trace(args.trace)
 
-    print("Анализ завершен! Результаты сохранены в dbpedia_results.json")
-    print(f"Всего обработано примеров: {len(dataset)}")
+    print(f"Графики сохранены: {', '.join(charts)}")
+    print(f"Анализ завершен! Результаты сохранены в {results_path}")
+    print(f"Всего обработано примеров: {rows}")
     print(f"Количество категорий: {len(category_distribution)}")
 
 
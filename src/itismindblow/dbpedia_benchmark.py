@@ -0,0 +1,449 @@
+"""
+Бенчмарки функций dbpedia_modules на синтетическом корпусе.
+
+Корпус генерируется детерминированно (по seed) и приблизительно повторяет
+распределения dbpedia_14: 14 сбалансированных категорий, заголовки
+из 1-5 слов без стоп-слов, контент в среднем из ~50 слов с длинным
+хвостом, частоты слов по закону Ципфа и около трети стоп-слов в контенте.
+Для каждой функции измеряются скорость (строк в секунду, лучший из
+нескольких запусков) и пиковый объем выделенной памяти (tracemalloc).
+Результаты сравниваются с базовым JSON (по умолчанию сохраненный рядом
+dbpedia_benchmark_baseline.json): падение скорости или рост памяти больше
+порога считается регрессией. Отдельно в чистом интерпретаторе измеряется
+время импорта модулей проекта: оно не должно превышать бюджет, а тяжелые
+зависимости (matplotlib, pandas, datasets) не должны загружаться при импорте.
+
+Запуск:
+    python dbpedia_benchmark.py --sizes 10000 100000
+    python dbpedia_benchmark.py --sizes 10000 100000 --output bench.json
+    python dbpedia_benchmark.py --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+
+from dbpedia_modules import (
+    CATEGORY_NAMES,
+    analyze_text_statistics,
+    count_labels,
+    create_visualization,
+    extract_top_words_by_category,
+    get_category_name,
+    preprocess_text,
+)
+from dbpedia_tokenizers import STOP_WORDS
+
+# Размеры корпуса по умолчанию (560000 — размер train-части dbpedia_14)
+DEFAULT_SIZES = (10_000, 100_000, 560_000)
+# Допустимое относительное ухудшение по сравнению с базовым результатом
+DEFAULT_THRESHOLD = 0.2
+# Размер синтетического словаря
+VOCABULARY_SIZE = 50_000
+# Доля стоп-слов среди слов контента
+STOP_WORD_SHARE = 0.35
+# Модули, время импорта которых измеряется
+IMPORTED_MODULES = ("dbpedia_modules", "assignment")
+# Бюджет времени импорта одного модуля в секундах
+IMPORT_TIME_BUDGET_S = 1.0
+# Зависимости, которые должны загружаться только при использовании
+HEAVY_MODULES = ("matplotlib", "pandas", "datasets")
+# Базовый результат, с которым сравнивается запуск по умолчанию
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "dbpedia_benchmark_baseline.json"
+)
+
+
+def generate_corpus(
+    num_rows: int, seed: int = 0, chunk_size: int = 50_000
+) -> pa.Table:
+    """
+    Генерирует синтетический корпус в формате dbpedia_14.
+
+    Args:
+        num_rows: Количество строк.
+        seed: Seed генератора; одинаковый seed дает одинаковый корпус.
+        chunk_size: Количество строк, генерируемых за раз.
+
+    Returns:
+        pa.Table: Таблица с колонками 'title', 'content', 'label'.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    word_lengths = rng.integers(3, 12, VOCABULARY_SIZE)
+    words = np.array(
+        ["".join(rng.choice(letters, length)) for length in word_lengths]
+        + sorted(STOP_WORDS),
+        dtype=object,
+    )
+    num_labels = len(CATEGORY_NAMES)
+
+    # Категории сбалансированы, как в dbpedia_14
+    labels = rng.permutation(np.arange(num_rows) % num_labels)
+
+    def sample_words(
+        row_labels: np.ndarray, counts: np.ndarray, stop_share: float
+    ) -> np.ndarray:
+        token_labels = np.repeat(row_labels, counts)
+        ranks = np.minimum(rng.zipf(1.3, token_labels.size), VOCABULARY_SIZE) - 1
+        # Сдвиг рангов по категории дает каждой категории свои частые слова
+        ids = (ranks + token_labels * 997) % VOCABULARY_SIZE
+        is_stop = rng.random(ids.size) < stop_share
+        ids[is_stop] = VOCABULARY_SIZE + rng.integers(
+            0, len(STOP_WORDS), int(is_stop.sum())
+        )
+        return words[ids]
+
+    def join_rows(tokens: np.ndarray, counts: np.ndarray) -> List[str]:
+        return [
+            " ".join(row) for row in np.split(tokens, np.cumsum(counts)[:-1])
+        ]
+
+    titles: List[str] = []
+    contents: List[str] = []
+    for start in range(0, num_rows, chunk_size):
+        chunk_labels = labels[start : start + chunk_size]
+        title_counts = np.minimum(1 + rng.poisson(1.2, chunk_labels.size), 5)
+        content_counts = 3 + rng.gamma(4.0, 12.0, chunk_labels.size).astype(np.int64)
+
+        titles.extend(
+            title.title()
+            for title in join_rows(
+                sample_words(chunk_labels, title_counts, 0.0), title_counts
+            )
+        )
+        contents.extend(
+            f"{content.capitalize()}."
+            for content in join_rows(
+                sample_words(chunk_labels, content_counts, STOP_WORD_SHARE),
+                content_counts,
+            )
+        )
+
+    return pa.table(
+        {
+            "title": pa.array(titles, pa.string()),
+            "content": pa.array(contents, pa.string()),
+            "label": pa.array(labels, pa.int64()),
+        }
+    )
+
+
+def _preprocess_each(table: pa.Table) -> None:
+    """Предобрабатывает каждый текст контента по отдельности."""
+    for text in table.column("content").to_pylist():
+        preprocess_text(text)
+
+
+def _create_visualization(table: pa.Table) -> None:
+    """Строит график распределения во временном каталоге."""
+    label_counts = count_labels(table.column("label"))
+    distribution = {
+        get_category_name(label): int(count) for label, count in enumerate(label_counts)
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        create_visualization(distribution, os.path.join(tmp, "visualization.png"))
+
+
+# Измеряемые функции: имя -> функция от таблицы
+BENCHMARKS: Dict[str, Callable[[pa.Table], Any]] = {
+    "preprocess_text": _preprocess_each,
+    "analyze_text_statistics": analyze_text_statistics,
+    "extract_top_words_by_category": extract_top_words_by_category,
+    "create_visualization": _create_visualization,
+}
+
+
+def measure(
+    function: Callable[[pa.Table], Any],
+    table: pa.Table,
+    repeat: int = 3,
+    memory: bool = True,
+) -> Dict[str, Optional[float]]:
+    """
+    Измеряет скорость и пиковую память функции.
+
+    Время — лучший из repeat запусков; память измеряется отдельным
+    запуском под tracemalloc (учитываются выделения Python и numpy,
+    но не внутренние буферы Arrow).
+
+    Args:
+        function: Функция от таблицы.
+        table: Корпус.
+        repeat: Количество запусков для замера времени.
+        memory: Измерять ли память.
+
+    Returns:
+        Dict: seconds, rows_per_s и peak_mb.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(table)
+        best = min(best, time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function(table)
+            peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "seconds": round(best, 6),
+        "rows_per_s": round(table.num_rows / best, 1),
+        "peak_mb": peak_mb,
+    }
+
+
+def measure_import_time(module: str) -> Dict[str, Any]:
+    """
+    Измеряет время импорта модуля в отдельном чистом интерпретаторе.
+
+    Args:
+        module: Имя модуля из каталога проекта.
+
+    Returns:
+        Dict: seconds и heavy_modules — тяжелые зависимости, загруженные
+        при импорте.
+    """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(json.dumps({'seconds': round(seconds, 6), 'heavy_modules': heavy}))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def check_imports(
+    budget: float = IMPORT_TIME_BUDGET_S,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Измеряет время импорта модулей проекта и проверяет бюджет.
+
+    Args:
+        budget: Бюджет времени импорта одного модуля в секундах.
+
+    Returns:
+        Tuple: Замеры {module: ...} и описания нарушений.
+    """
+    imports = {module: measure_import_time(module) for module in IMPORTED_MODULES}
+    violations = []
+    for module, metrics in imports.items():
+        if metrics["seconds"] > budget:
+            violations.append(
+                f"import {module}: {metrics['seconds']:.3f} с (бюджет {budget} с)"
+            )
+        if metrics["heavy_modules"]:
+            heavy = ", ".join(metrics["heavy_modules"])
+            violations.append(f"import {module} загружает {heavy}")
+    return imports, violations
+
+
+def run_suite(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    repeat: int = 3,
+    memory: bool = True,
+    seed: int = 0,
+    benchmarks: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Запускает бенчмарки на корпусах заданных размеров.
+
+    Args:
+        sizes: Размеры корпусов.
+        repeat: Количество запусков для замера времени.
+        memory: Измерять ли память.
+        seed: Seed генератора корпуса.
+        benchmarks: Имена функций из BENCHMARKS (по умолчанию все).
+
+    Returns:
+        Dict: {'seed': ..., 'results': {size: {function: метрики}}}.
+    """
+    names = list(benchmarks) if benchmarks else list(BENCHMARKS)
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        table = generate_corpus(size, seed)
+        results[str(size)] = {
+            name: measure(BENCHMARKS[name], table, repeat, memory) for name in names
+        }
+    return {"seed": seed, "results": results}
+
+
+def compare_with_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """
+    Находит регрессии по сравнению с базовым результатом.
+
+    Сравниваются только размеры и функции, которые есть в обоих результатах.
+
+    Args:
+        current: Результат run_suite.
+        baseline: Базовый результат run_suite.
+        threshold: Допустимое относительное ухудшение (0.2 — 20%).
+
+    Returns:
+        List[str]: Описания регрессий (пустой список, если их нет).
+    """
+    regressions = []
+    for size, functions in current["results"].items():
+        for name, metrics in functions.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            if metrics["rows_per_s"] < base["rows_per_s"] * (1 - threshold):
+                regressions.append(
+                    f"{name} @ {size}: {metrics['rows_per_s']:.0f} строк/с "
+                    f"(было {base['rows_per_s']:.0f})"
+                )
+            if (
+                metrics.get("peak_mb") is not None
+                and base.get("peak_mb") is not None
+                and metrics["peak_mb"] > base["peak_mb"] * (1 + threshold)
+            ):
+                regressions.append(
+                    f"{name} @ {size}: {metrics['peak_mb']:.1f} МБ "
+                    f"(было {base['peak_mb']:.1f})"
+                )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки.
+
+    Args:
+        argv: Аргументы (по умолчанию sys.argv).
+
+    Returns:
+        argparse.Namespace: Параметры запуска.
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарки анализа DBpedia")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="размеры синтетических корпусов (по умолчанию 10000 100000 560000)",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        default=None,
+        help="измеряемые функции (по умолчанию все)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="количество запусков (по умолчанию 3)"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="не измерять пиковую память"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed корпуса")
+    parser.add_argument(
+        "--output", default=None, help="сохранить результаты в JSON (новый baseline)"
+    )
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE_PATH,
+        help="базовый JSON для поиска регрессий "
+        "(по умолчанию dbpedia_benchmark_baseline.json)",
+    )
+    parser.add_argument(
+        "--no-baseline", action="store_true", help="не сравнивать с базовым JSON"
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=IMPORT_TIME_BUDGET_S,
+        help=f"бюджет времени импорта модуля в секундах (по умолчанию "
+        f"{IMPORT_TIME_BUDGET_S})",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="допустимое относительное ухудшение (по умолчанию 0.2)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Запускает бенчмарки и сравнивает их с базовым результатом.
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv).
+
+    Returns:
+        int: Код возврата (1, если найдены регрессии).
+    """
+    args = parse_args(argv)
+    imports, problems = check_imports(args.import_budget)
+    for module, metrics in imports.items():
+        print(f"import {module}: {metrics['seconds']:.3f} с")
+
+    report = run_suite(
+        args.sizes,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        seed=args.seed,
+        benchmarks=args.benchmarks,
+    )
+    report["imports"] = imports
+
+    for size, functions in report["results"].items():
+        print(f"Корпус {size} строк:")
+        for name, metrics in functions.items():
+            memory = ""
+            if metrics["peak_mb"] is not None:
+                memory = f", {metrics['peak_mb']:.1f} МБ"
+            print(
+                f"  {name}: {metrics['seconds']:.3f} с, "
+                f"{metrics['rows_per_s']:.0f} строк/с{memory}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if not args.no_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems.extend(compare_with_baseline(report, baseline, args.threshold))
+
+    if problems:
+        print("Регрессии:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+Дисковый кэш токенизированного корпуса DBpedia.
+
+Токены заголовков и контента хранятся как массивы id (memory-mapped .npy)
+со смещениями начала каждой строки. Каталог кэша определяется отпечатком
+датасета и конфигурацией токенизатора, поэтому при изменении любого из них
+кэш автоматически строится заново, а повторные запуски открывают его
+почти мгновенно.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from dbpedia_engine import split_into_shards
+from dbpedia_modules import column_values, get_column, text_lengths, tokenize_texts
+from dbpedia_tokenizers import DEFAULT_TOKENIZER, get_tokenizer
+from dbpedia_vocab import Vocabulary
+
+# Поля, токены которых хранятся в кэше
+TOKENIZED_FIELDS = ("title", "content")
+# Версия формата кэша; при изменении формата старые каталоги не читаются
+CACHE_FORMAT_VERSION = 1
+
+
+def tokenizer_fingerprint(tokenizer: str = DEFAULT_TOKENIZER) -> str:
+    """
+    Возвращает отпечаток конфигурации токенизатора.
+
+    Args:
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        str: Хэш шаблона удаляемых символов, минимальной длины токена
+        и списка стоп-слов.
+    """
+    config = json.dumps(get_tokenizer(tokenizer).config())
+    return hashlib.sha256(config.encode()).hexdigest()
+
+
+def dataset_fingerprint(dataset: Any) -> str:
+    """
+    Возвращает отпечаток датасета.
+
+    Для datasets.Dataset используется его собственный отпечаток, для
+    Arrow-таблицы — хэш буферов колонок, для остальных форматов — хэш
+    значений колонок.
+
+    Args:
+        dataset: Датасет (datasets.Dataset, Arrow-таблица, DataFrame,
+            словарь колонок или список примеров).
+
+    Returns:
+        str: Отпечаток датасета.
+    """
+    if hasattr(dataset, "_fingerprint"):
+        return dataset._fingerprint
+
+    digest = hashlib.blake2b(digest_size=16)
+    for field in ("title", "content", "label"):
+        column = get_column(dataset, field)
+        if hasattr(column, "chunks"):
+            for chunk in column.chunks:
+                digest.update(f"{chunk.offset}:{len(chunk)}".encode())
+                for buffer in chunk.buffers():
+                    if buffer is not None:
+                        digest.update(memoryview(buffer))
+        else:
+            for value in column_values(column):
+                digest.update(f"{value}\0".encode())
+    return digest.hexdigest()
+
+
+class TokenizedCorpus:
+    """Токенизированный корпус: id токенов, смещения строк, длины и labels."""
+
+    def __init__(
+        self,
+        vocabulary: Vocabulary,
+        labels: np.ndarray,
+        ids: Dict[str, np.ndarray],
+        offsets: Dict[str, np.ndarray],
+        lengths: Dict[str, np.ndarray],
+    ) -> None:
+        self.vocabulary = vocabulary
+        self.labels = labels
+        self.ids = ids
+        self.offsets = offsets
+        self.lengths = lengths
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def word_counts(self, field: str) -> np.ndarray:
+        """Количество токенов в каждой строке поля."""
+        return np.diff(self.offsets[field])
+
+    def tokens(self, field: str, row: int) -> List[str]:
+        """
+        Восстанавливает токены одной строки.
+
+        Args:
+            field: 'title' или 'content'.
+            row: Номер строки.
+
+        Returns:
+            List[str]: Токены (как вернул бы preprocess_text).
+        """
+        vocabulary = self.vocabulary.tokens
+        start, stop = self.offsets[field][row], self.offsets[field][row + 1]
+        return [vocabulary[token_id] for token_id in self.ids[field][start:stop]]
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет корпус в каталог.
+
+        Args:
+            path: Каталог (создается при необходимости).
+        """
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "vocabulary.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.vocabulary.tokens))
+        np.save(os.path.join(path, "labels.npy"), self.labels)
+        for field in TOKENIZED_FIELDS:
+            np.save(os.path.join(path, f"{field}_ids.npy"), self.ids[field])
+            np.save(os.path.join(path, f"{field}_offsets.npy"), self.offsets[field])
+            np.save(os.path.join(path, f"{field}_lengths.npy"), self.lengths[field])
+
+    @classmethod
+    def open(cls, path: str) -> "TokenizedCorpus":
+        """
+        Открывает сохраненный корпус; массивы отображаются в память.
+
+        Args:
+            path: Каталог, записанный методом save.
+
+        Returns:
+            TokenizedCorpus: Корпус.
+        """
+        with open(os.path.join(path, "vocabulary.txt"), encoding="utf-8") as f:
+            text = f.read()
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        return cls(
+            Vocabulary(text.split("\n") if text else ()),
+            load("labels"),
+            {field: load(f"{field}_ids") for field in TOKENIZED_FIELDS},
+            {field: load(f"{field}_offsets") for field in TOKENIZED_FIELDS},
+            {field: load(f"{field}_lengths") for field in TOKENIZED_FIELDS},
+        )
+
+
+def tokenize_corpus(
+    dataset: Any, batch_size: int = 10_000, tokenizer: str = DEFAULT_TOKENIZER
+) -> TokenizedCorpus:
+    """
+    Токенизирует датасет в памяти.
+
+    Args:
+        dataset: Примеры с полями 'title', 'content', 'label' (список словарей,
+            DataFrame или Arrow-таблица).
+        batch_size: Количество строк, обрабатываемых за раз.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        TokenizedCorpus: Токенизированный корпус.
+    """
+    vocabulary = Vocabulary()
+    labels: List[np.ndarray] = []
+    ids = {field: [] for field in TOKENIZED_FIELDS}
+    word_counts = {field: [] for field in TOKENIZED_FIELDS}
+    lengths = {field: [] for field in TOKENIZED_FIELDS}
+
+    for start in range(0, len(dataset), batch_size):
+        batch = dataset[start : start + batch_size]
+        labels.append(
+            np.asarray(column_values(get_column(batch, "label")), dtype=np.int64)
+        )
+        for field in TOKENIZED_FIELDS:
+            column = get_column(batch, field)
+            lengths[field].append(text_lengths(column))
+            tokens, offsets = tokenize_texts(column_values(column), tokenizer)
+            ids[field].append(vocabulary.encode_array(tokens).astype(np.int32))
+            word_counts[field].append(np.diff(offsets))
+
+    def concatenate(chunks: List[np.ndarray], dtype: type) -> np.ndarray:
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+
+    return TokenizedCorpus(
+        vocabulary,
+        concatenate(labels, np.int64),
+        {field: concatenate(ids[field], np.int32) for field in TOKENIZED_FIELDS},
+        {
+            field: np.concatenate(
+                [[0], np.cumsum(concatenate(word_counts[field], np.int64))]
+            ).astype(np.int64)
+            for field in TOKENIZED_FIELDS
+        },
+        {field: concatenate(lengths[field], np.int64) for field in TOKENIZED_FIELDS},
+    )
+
+
+def concatenate_corpora(corpora: List[TokenizedCorpus]) -> TokenizedCorpus:
+    """
+    Склеивает корпуса (с разными словарями) в один по порядку.
+
+    Args:
+        corpora: Корпуса соседних частей датасета.
+
+    Returns:
+        TokenizedCorpus: Объединенный корпус с общим словарем.
+    """
+    vocabulary = Vocabulary()
+    ids = {field: [] for field in TOKENIZED_FIELDS}
+    offsets = {field: [np.zeros(1, np.int64)] for field in TOKENIZED_FIELDS}
+
+    for corpus in corpora:
+        remap = np.array(vocabulary.encode(corpus.vocabulary.tokens), dtype=np.int32)
+        for field in TOKENIZED_FIELDS:
+            ids[field].append(remap[corpus.ids[field]])
+            offsets[field].append(corpus.offsets[field][1:] + offsets[field][-1][-1])
+
+    return TokenizedCorpus(
+        vocabulary,
+        np.concatenate([corpus.labels for corpus in corpora]),
+        {field: np.concatenate(ids[field]) for field in TOKENIZED_FIELDS},
+        {field: np.concatenate(offsets[field]) for field in TOKENIZED_FIELDS},
+        {
+            field: np.concatenate([corpus.lengths[field] for corpus in corpora])
+            for field in TOKENIZED_FIELDS
+        },
+    )
+
+
+def cache_key(fingerprint: str, tokenizer: str = DEFAULT_TOKENIZER) -> str:
+    """
+    Вычисляет ключ кэша по отпечаткам датасета и токенизатора.
+
+    Args:
+        fingerprint: Отпечаток датасета.
+        tokenizer: Имя токенизатора.
+
+    Returns:
+        str: Имя каталога кэша.
+    """
+    key = f"{CACHE_FORMAT_VERSION}:{fingerprint}:{tokenizer_fingerprint(tokenizer)}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def load_or_build_token_cache(
+    dataset: Any,
+    cache_dir: str = ".dbpedia_cache",
+    fingerprint: Optional[str] = None,
+    workers: int = 1,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> TokenizedCorpus:
+    """
+    Открывает кэш токенов датасета или строит его при отсутствии.
+
+    Args:
+        dataset: Примеры с полями 'title', 'content', 'label'.
+        cache_dir: Корневой каталог кэша.
+        fingerprint: Отпечаток датасета (например, Dataset._fingerprint);
+            если не задан, вычисляется по данным.
+        workers: Количество процессов для токенизации при построении.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers); кэши разных
+            токенизаторов хранятся в разных каталогах.
+
+    Returns:
+        TokenizedCorpus: Корпус с memory-mapped массивами.
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(dataset)
+    path = os.path.join(cache_dir, cache_key(fingerprint, tokenizer))
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return TokenizedCorpus.open(path)
+
+    if workers <= 1:
+        corpus = tokenize_corpus(dataset, tokenizer=tokenizer)
+    else:
+        tokenize = partial(tokenize_corpus, tokenizer=tokenizer)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            corpus = concatenate_corpora(
+                list(executor.map(tokenize, split_into_shards(dataset, workers)))
+            )
+
+    # Кэш пишется во временный каталог и переименовывается целиком,
+    # чтобы прерванный запуск не оставил недописанный кэш
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        corpus.save(tmp_path)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "format_version": CACHE_FORMAT_VERSION,
+                    "dataset_fingerprint": fingerprint,
+                    "tokenizer": tokenizer,
+                    "tokenizer_fingerprint": tokenizer_fingerprint(tokenizer),
+                    "num_rows": len(corpus),
+                },
+                f,
+                indent=2,
+            )
+        # Недописанный каталог без meta.json остается от прерванного запуска
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            raise
+
+    return TokenizedCorpus.open(path)
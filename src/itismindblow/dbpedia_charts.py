@@ -0,0 +1,140 @@
+"""
+Фоновое построение графиков распределения DBpedia.
+
+Графики строятся в отдельных процессах (backend Agg), поэтому запуск
+matplotlib и растеризация не задерживают основной процесс: результаты
+можно сохранить, пока графики еще рисуются. Несколько форматов и
+размеров строятся параллельно.
+"""
+
+import argparse
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from dbpedia_modules import create_visualization
+
+
+# Размер графика в дюймах и разрешение по умолчанию
+DEFAULT_FIGSIZE = (14, 10)
+DEFAULT_DPI = 300
+
+
+class ChartSpec(NamedTuple):
+    """Параметры одного графика: путь (формат по расширению), размер и dpi."""
+
+    path: str
+    figsize: Tuple[float, float] = DEFAULT_FIGSIZE
+    dpi: int = DEFAULT_DPI
+
+
+# График по умолчанию (как раньше строил create_visualization)
+DEFAULT_CHARTS = (ChartSpec("visualization.png"),)
+
+
+def parse_chart(value: str) -> ChartSpec:
+    """
+    Разбирает описание графика вида PATH[:WIDTHxHEIGHT][@DPI].
+
+    Например: 'visualization.svg', 'small.png:7x5@100'.
+
+    Args:
+        value: Описание графика.
+
+    Returns:
+        ChartSpec: Параметры графика.
+    """
+    path, figsize, dpi = value, DEFAULT_FIGSIZE, DEFAULT_DPI
+    try:
+        if "@" in path:
+            path, dpi_text = path.rsplit("@", 1)
+            dpi = int(dpi_text)
+        if ":" in path:
+            path, size_text = path.rsplit(":", 1)
+            width, height = size_text.lower().split("x")
+            figsize = (float(width), float(height))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"ожидается PATH[:WIDTHxHEIGHT][@DPI], получено {value!r}"
+        )
+    if not path or dpi <= 0 or min(figsize) <= 0:
+        raise argparse.ArgumentTypeError(f"некорректное описание графика: {value!r}")
+    return ChartSpec(path, figsize, dpi)
+
+
+def _import_matplotlib() -> None:
+    """Загружает matplotlib в рабочем процессе заранее."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+
+def _render(category_distribution: Dict[str, int], chart: ChartSpec) -> str:
+    """Строит один график в рабочем процессе."""
+    create_visualization(category_distribution, chart.path, chart.figsize, chart.dpi)
+    return chart.path
+
+
+class ChartRenderer:
+    """
+    Пул процессов, строящих графики в фоне.
+
+    Пул лучше создавать в начале работы: процессы запускаются сразу и
+    загружают matplotlib, пока основной процесс занят анализом, а копия
+    памяти основного процесса при их запуске еще мала. Пул используется
+    как контекстный менеджер, чтобы процессы останавливались и при ошибке.
+    """
+
+    def __init__(
+        self,
+        charts: Sequence[ChartSpec] = DEFAULT_CHARTS,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.charts = list(charts)
+        if workers is None:
+            workers = min(len(self.charts), os.cpu_count() or 1)
+        self._executor = ProcessPoolExecutor(max_workers=max(workers, 1))
+        self._futures: List[Future] = []
+        for _ in range(max(workers, 1)):
+            self._executor.submit(_import_matplotlib)
+
+    def start(self, category_distribution: Dict[str, int]) -> "ChartRenderer":
+        """
+        Запускает построение всех графиков и сразу возвращает управление.
+
+        Args:
+            category_distribution: Распределение по категориям.
+
+        Returns:
+            ChartRenderer: Этот же пул.
+        """
+        self._futures = [
+            self._executor.submit(_render, category_distribution, chart)
+            for chart in self.charts
+        ]
+        return self
+
+    def wait(self) -> List[str]:
+        """
+        Дожидается построения графиков и останавливает пул.
+
+        Ошибка построения любого графика пробрасывается.
+
+        Returns:
+            List[str]: Пути построенных графиков.
+        """
+        try:
+            return [future.result() for future in self._futures]
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Останавливает пул, отменяя еще не начатые графики."""
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ChartRenderer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,387 @@
+"""
+Потоковый классификатор категорий DBpedia.
+
+Тексты (заголовок и контент) токенизируются как в preprocess_text,
+токены хэшируются в признаки фиксированной размерности (hashing trick),
+а мультиномиальный наивный Байес обучается по мини-пакетам: модель — это
+только счетчики признаков по категориям, поэтому матрица признаков
+целиком никогда не строится, а счетчики пакетов, посчитанные в разных
+процессах, просто складываются.
+
+Запуск:
+    python dbpedia_classifier.py --workers 4
+"""
+
+import argparse
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from dbpedia_modules import (
+    CATEGORY_NAMES,
+    column_values,
+    get_column,
+    hash_tokens,
+    tokenize_texts,
+)
+
+# Размерность хэшированных признаков по умолчанию (2 ** 18)
+DEFAULT_FEATURES = 1 << 18
+# Сколько токенов оценивается за раз при предсказании
+PREDICT_CHUNK_TOKENS = 1 << 18
+
+
+def hash_features(
+    titles: Iterable[str], contents: Iterable[str], n_features: int = DEFAULT_FEATURES
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Переводит документы в хэшированные признаки.
+
+    Каждый токен (см. tokenize_texts) отображается в признак
+    crc32(token) % n_features; хэш не зависит от процесса и запуска.
+
+    Args:
+        titles: Заголовки документов.
+        contents: Тексты документов.
+        n_features: Размерность признаков.
+
+    Returns:
+        Tuple: Плоский массив признаков всех документов и смещения
+        документов в нем (np.ndarray длины n + 1).
+    """
+    texts = [f"{title} {content}" for title, content in zip(titles, contents)]
+    tokens, offsets = tokenize_texts(texts)
+    return hash_tokens(tokens) % n_features, offsets
+
+
+class NaiveBayesClassifier:
+    """Мультиномиальный наивный Байес над хэшированными признаками."""
+
+    def __init__(
+        self,
+        num_labels: int = len(CATEGORY_NAMES),
+        n_features: int = DEFAULT_FEATURES,
+        alpha: float = 1.0,
+    ) -> None:
+        self.n_features = n_features
+        self.alpha = alpha
+        self.class_counts = np.zeros(num_labels, dtype=np.int64)
+        self.feature_counts = np.zeros((num_labels, n_features), dtype=np.int64)
+        self._log_probs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def num_labels(self) -> int:
+        """Количество категорий."""
+        return self.class_counts.size
+
+    def add_counts(
+        self, keys: np.ndarray, counts: np.ndarray, class_counts: np.ndarray
+    ) -> "NaiveBayesClassifier":
+        """
+        Добавляет счетчики пакета (см. count_batch).
+
+        Args:
+            keys: Уникальные ключи label * n_features + feature.
+            counts: Количество вхождений каждого ключа.
+            class_counts: Количество документов каждой категории.
+
+        Returns:
+            NaiveBayesClassifier: Этот же классификатор.
+        """
+        self.feature_counts.reshape(-1)[keys] += counts
+        self.class_counts[: class_counts.size] += class_counts
+        self._log_probs = None
+        return self
+
+    def partial_fit(
+        self, features: np.ndarray, offsets: np.ndarray, labels: Iterable[int]
+    ) -> "NaiveBayesClassifier":
+        """
+        Дообучает модель на пакете документов.
+
+        Args:
+            features: Плоский массив признаков (см. hash_features).
+            offsets: Смещения документов.
+            labels: Категории документов.
+
+        Returns:
+            NaiveBayesClassifier: Этот же классификатор.
+        """
+        return self.add_counts(
+            *_count_features(features, offsets, labels, self.n_features)
+        )
+
+    def merge(self, other: "NaiveBayesClassifier") -> "NaiveBayesClassifier":
+        """Добавляет счетчики другого классификатора той же размерности."""
+        if other.n_features != self.n_features:
+            raise ValueError("Нельзя объединить модели с разной размерностью")
+        self.feature_counts += other.feature_counts
+        self.class_counts += other.class_counts
+        self._log_probs = None
+        return self
+
+    def _log_parameters(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Логарифмы априорных вероятностей и сглаженных вероятностей признаков.
+
+        Вероятности признаков хранятся транспонированными (признак × категория),
+        чтобы выборка по признакам документа читала память подряд.
+        """
+        if self._log_probs is None:
+            smoothed = self.feature_counts + self.alpha
+            log_features = np.log(smoothed) - np.log(
+                smoothed.sum(axis=1, keepdims=True)
+            )
+            log_prior = np.log(self.class_counts + 1) - np.log(
+                self.class_counts.sum() + self.num_labels
+            )
+            self._log_probs = (log_prior, np.ascontiguousarray(log_features.T))
+        return self._log_probs
+
+    def predict(self, features: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """
+        Предсказывает категории документов.
+
+        Args:
+            features: Плоский массив признаков (см. hash_features).
+            offsets: Смещения документов.
+
+        Returns:
+            np.ndarray: Предсказанные категории.
+        """
+        log_prior, log_features = self._log_parameters()
+        num_documents = offsets.size - 1
+        predictions = np.empty(num_documents, dtype=np.int64)
+        start = 0
+        while start < num_documents:
+            # Документы берутся кусками не более чем по PREDICT_CHUNK_TOKENS токенов
+            limit = offsets[start] + PREDICT_CHUNK_TOKENS
+            stop = max(np.searchsorted(offsets, limit, side="right") - 1, start + 1)
+            stop = min(stop, num_documents)
+            chunk = offsets[start : stop + 1] - offsets[start]
+            chunk_features = features[offsets[start] : offsets[stop]]
+
+            # Сумма логарифмов по документу — разность префиксных сумм
+            cumulative = np.zeros((chunk_features.size + 1, self.num_labels))
+            np.cumsum(log_features[chunk_features], axis=0, out=cumulative[1:])
+            scores = cumulative[chunk[1:]] - cumulative[chunk[:-1]]
+            predictions[start:stop] = np.argmax(scores + log_prior, axis=1)
+            start = stop
+        return predictions
+
+
+def _count_features(
+    features: np.ndarray, offsets: np.ndarray, labels: Iterable[int], n_features: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Считает уникальные пары (категория, признак) и документы по категориям."""
+    labels = np.asarray(labels, dtype=np.int64)
+    keys = np.repeat(labels, np.diff(offsets)) * n_features + features
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    return unique_keys, counts, np.bincount(labels, minlength=len(CATEGORY_NAMES))
+
+
+def count_batch(
+    batch: Any, n_features: int = DEFAULT_FEATURES
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Считает счетчики обучения по пакету записей (в рабочем процессе).
+
+    Возвращаются только ненулевые ячейки, поэтому между процессами
+    передается объем, пропорциональный пакету, а не размеру модели.
+
+    Args:
+        batch: Пакет с колонками 'title', 'content', 'label' (см. get_column).
+        n_features: Размерность признаков.
+
+    Returns:
+        Tuple: Ключи, их счетчики и количество документов по категориям
+        (см. NaiveBayesClassifier.add_counts).
+    """
+    features, offsets = hash_features(
+        column_values(get_column(batch, "title")),
+        column_values(get_column(batch, "content")),
+        n_features,
+    )
+    labels = column_values(get_column(batch, "label"))
+    return _count_features(features, offsets, labels, n_features)
+
+
+def train_classifier(
+    batches: Iterable[Any],
+    workers: int = 1,
+    n_features: int = DEFAULT_FEATURES,
+    alpha: float = 1.0,
+) -> NaiveBayesClassifier:
+    """
+    Обучает классификатор по пакетам записей.
+
+    Пакеты читаются лениво; при workers > 1 одновременно обрабатывается
+    не более 2 * workers пакетов.
+
+    Args:
+        batches: Пакеты в колоночном виде (Arrow RecordBatch, DataFrame
+            или словарь колонок).
+        workers: Количество рабочих процессов.
+        n_features: Размерность признаков.
+        alpha: Сглаживание Лапласа.
+
+    Returns:
+        NaiveBayesClassifier: Обученный классификатор.
+    """
+    model = NaiveBayesClassifier(n_features=n_features, alpha=alpha)
+    if workers <= 1:
+        for batch in batches:
+            model.add_counts(*count_batch(batch, n_features))
+        return model
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        count = partial(count_batch, n_features=n_features)
+        for batch in batches:
+            pending.append(executor.submit(count, batch))
+            if len(pending) >= 2 * workers:
+                model.add_counts(*pending.popleft().result())
+        while pending:
+            model.add_counts(*pending.popleft().result())
+    return model
+
+
+def evaluate_classifier(
+    model: NaiveBayesClassifier, batches: Iterable[Any]
+) -> Dict[str, float]:
+    """
+    Вычисляет точность классификатора.
+
+    Args:
+        model: Обученный классификатор.
+        batches: Пакеты тестовых записей.
+
+    Returns:
+        Dict: accuracy, количество документов и скорость предсказания.
+    """
+    correct = total = 0
+    start = time.perf_counter()
+    for batch in batches:
+        features, offsets = hash_features(
+            column_values(get_column(batch, "title")),
+            column_values(get_column(batch, "content")),
+            model.n_features,
+        )
+        labels = np.asarray(column_values(get_column(batch, "label")))
+        correct += int((model.predict(features, offsets) == labels).sum())
+        total += labels.size
+    seconds = time.perf_counter() - start
+    return {
+        "accuracy": correct / total if total else 0.0,
+        "documents": total,
+        "docs_per_s": round(total / seconds, 1) if seconds else 0.0,
+    }
+
+
+def load_split(split: str) -> Any:
+    """
+    Загружает часть датасета DBpedia как Arrow-таблицу.
+
+    Args:
+        split: 'train' или 'test'.
+
+    Returns:
+        pa.Table: Таблица с колонками 'title', 'content', 'label'.
+    """
+    from datasets import load_dataset
+
+    dataset = load_dataset("dbpedia_14", split=split)
+    return dataset.data.table.select(["title", "content", "label"])
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки.
+
+    Args:
+        argv: Аргументы (по умолчанию sys.argv).
+
+    Returns:
+        argparse.Namespace: Параметры запуска.
+    """
+    parser = argparse.ArgumentParser(description="Классификатор категорий DBpedia")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="количество процессов обучения"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=20_000,
+        help="размер мини-пакета (по умолчанию 20000)",
+    )
+    parser.add_argument(
+        "--features",
+        type=int,
+        default=DEFAULT_FEATURES,
+        help=f"размерность хэшированных признаков (по умолчанию {DEFAULT_FEATURES})",
+    )
+    parser.add_argument(
+        "--alpha", type=float, default=1.0, help="сглаживание Лапласа"
+    )
+    parser.add_argument(
+        "--output",
+        default="dbpedia_classifier.json",
+        help="куда сохранить отчет (по умолчанию dbpedia_classifier.json)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Обучает классификатор на train-части и оценивает его на test-части.
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv).
+    """
+    args = parse_args(argv)
+
+    print("Загрузка датасета DBpedia...")
+    train, test = load_split("train"), load_split("test")
+
+    print("Обучение классификатора...")
+    start = time.perf_counter()
+    model = train_classifier(
+        train.to_batches(max_chunksize=args.batch_size),
+        workers=args.workers,
+        n_features=args.features,
+        alpha=args.alpha,
+    )
+    train_seconds = time.perf_counter() - start
+
+    print("Оценка на test-части...")
+    evaluation = evaluate_classifier(
+        model, test.to_batches(max_chunksize=args.batch_size)
+    )
+
+    report = {
+        "model": "multinomial_naive_bayes",
+        "n_features": args.features,
+        "alpha": args.alpha,
+        "workers": args.workers,
+        "train_documents": train.num_rows,
+        "train_seconds": round(train_seconds, 3),
+        "train_docs_per_s": round(train.num_rows / train_seconds, 1),
+        "test_accuracy": evaluation["accuracy"],
+        "test_documents": evaluation["documents"],
+        "predict_docs_per_s": evaluation["docs_per_s"],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"Точность на test-части: {evaluation['accuracy']:.4f}")
+    print(f"Скорость обучения: {report['train_docs_per_s']:.0f} документов/с")
+    print(f"Отчет сохранен в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Поиск почти дубликатов текстов DBpedia (MinHash + LSH).
+
+Текст токенизируется как в preprocess_text, из соседних токенов
+составляются шинглы, и по ним вычисляется MinHash-сигнатура: доля
+совпадающих позиций двух сигнатур оценивает коэффициент Жаккара
+множеств шинглов. Сигнатуры делятся на полосы (LSH banding): документы
+с одинаковой полосой попадают в одну корзину, и сравниваются только
+документы внутри корзин, поэтому время растет почти линейно с размером
+корпуса, а не квадратично.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from dbpedia_modules import (
+    column_values,
+    count_labels,
+    get_category_name,
+    get_column,
+    hash_tokens,
+    tokenize_texts,
+)
+from dbpedia_tokenizers import DEFAULT_TOKENIZER
+
+# Количество хэш-функций MinHash по умолчанию
+DEFAULT_NUM_PERM = 128
+# Количество токенов в шингле по умолчанию
+DEFAULT_SHINGLE_SIZE = 3
+# Порог сходства (оценка Жаккара), начиная с которого тексты — дубликаты
+DEFAULT_THRESHOLD = 0.8
+# Сколько хэш-функций вычисляется за раз (ограничивает временную память)
+_PERM_BLOCK = 16
+# Множитель для комбинирования хэшей токенов шингла
+_SHINGLE_MULTIPLIER = np.uint64(1_000_003)
+# Значение сигнатуры пустого документа (больше любого хэша)
+_EMPTY = np.uint32(0xFFFFFFFF)
+
+
+def shingle_hashes(
+    texts: Iterable[str],
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Хэширует шинглы из shingle_size подряд идущих токенов каждого текста.
+
+    Текст короче shingle_size токенов представляется отдельными токенами.
+
+    Args:
+        texts: Тексты.
+        shingle_size: Количество токенов в шингле.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        Tuple: Плоский массив 32-битных хэшей шинглов (uint64) и смещения
+        текстов в нем (np.ndarray длины n + 1).
+    """
+    tokens, offsets = tokenize_texts(texts, tokenizer)
+    token_hashes = hash_tokens(tokens).astype(np.uint64)
+    counts = np.diff(offsets)
+    document = np.repeat(np.arange(counts.size), counts)
+    # Шингл начинается с позиции, если все его токены в том же тексте;
+    # короткие тексты дают шинглы из одного токена
+    window = np.where(counts < shingle_size, 1, shingle_size)[document]
+    starts = np.arange(token_hashes.size)
+    valid = starts + window <= offsets[document + 1]
+
+    combined = token_hashes.copy()
+    last = max(token_hashes.size - 1, 0)
+    for shift in range(1, shingle_size):
+        following = token_hashes[np.minimum(starts + shift, last)]
+        # У шинглов из одного токена следующие токены не учитываются
+        following = np.where(window > shift, following, np.uint64(0))
+        combined = combined * _SHINGLE_MULTIPLIER + following
+    combined = (combined ^ (combined >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+
+    shingle_counts = np.bincount(document[valid], minlength=counts.size)
+    shingle_offsets = np.concatenate([[0], np.cumsum(shingle_counts)])
+    return combined[valid], shingle_offsets.astype(np.int64)
+
+
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Параметры хэш-функций вида (a * x + b) >> 32 по модулю 2 ** 64."""
+    rng = np.random.default_rng(seed)
+    # Множители нечетные
+    a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2)
+    a += np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signatures(
+    texts: Iterable[str],
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    seed: int = 1,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> np.ndarray:
+    """
+    Вычисляет MinHash-сигнатуры текстов.
+
+    Вместо случайных перестановок используется универсальное хэширование
+    multiply-shift, которое не требует деления по модулю.
+
+    Args:
+        texts: Тексты.
+        num_perm: Количество хэш-функций (длина сигнатуры).
+        shingle_size: Количество токенов в шингле.
+        seed: Seed хэш-функций (сигнатуры сравнимы только при одном seed).
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        np.ndarray: Сигнатуры (n × num_perm, uint32); у текстов без токенов
+        все значения равны 0xFFFFFFFF.
+    """
+    hashes, offsets = shingle_hashes(texts, shingle_size, tokenizer)
+    a, b = _permutations(num_perm, seed)
+    num_documents = offsets.size - 1
+    signatures = np.full((num_documents, num_perm), _EMPTY, dtype=np.uint32)
+    non_empty = np.flatnonzero(np.diff(offsets) > 0)
+    if non_empty.size == 0:
+        return signatures
+
+    with np.errstate(over="ignore"):
+        for start in range(0, num_perm, _PERM_BLOCK):
+            stop = min(start + _PERM_BLOCK, num_perm)
+            values = a[start:stop, None] * hashes + b[start:stop, None]
+            values >>= np.uint64(32)
+            minima = np.minimum.reduceat(values, offsets[non_empty], axis=1)
+            signatures[non_empty, start:stop] = minima.T
+    return signatures
+
+
+def lsh_parameters(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Подбирает количество полос и строк в полосе для порога сходства.
+
+    Документы со сходством s становятся кандидатами с вероятностью
+    1 - (1 - s ** rows) ** bands; выбирается разбиение с наименьшей
+    суммарной площадью ложноположительных и ложноотрицательных срабатываний.
+
+    Args:
+        threshold: Порог сходства (0-1).
+        num_perm: Длина сигнатуры.
+
+    Returns:
+        Tuple: (bands, rows), bands * rows <= num_perm.
+    """
+    similarity = np.linspace(0, 1, 201)
+    step = similarity[1]
+    best, best_error = (1, num_perm), np.inf
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        probability = 1 - (1 - similarity**rows) ** bands
+        error = (
+            probability[similarity < threshold].sum()
+            + (1 - probability[similarity >= threshold]).sum()
+        ) * step
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def _find_root(parent: np.ndarray, node: int) -> int:
+    """Корень множества в системе непересекающихся множеств."""
+    root = node
+    while parent[root] != root:
+        root = parent[root]
+    # Сжатие путей
+    while parent[node] != root:
+        parent[node], node = root, parent[node]
+    return root
+
+
+def find_duplicate_clusters(
+    signatures: np.ndarray,
+    threshold: float = DEFAULT_THRESHOLD,
+    bands: Optional[int] = None,
+    rows: Optional[int] = None,
+) -> List[np.ndarray]:
+    """
+    Группирует документы с близкими сигнатурами в кластеры.
+
+    В каждой корзине полосы документы сравниваются только с первым
+    документом корзины, и пара объединяется, если доля совпадающих
+    позиций сигнатур не меньше порога.
+
+    Args:
+        signatures: Сигнатуры (см. minhash_signatures).
+        threshold: Порог сходства.
+        bands: Количество полос (по умолчанию см. lsh_parameters).
+        rows: Количество строк в полосе.
+
+    Returns:
+        List[np.ndarray]: Кластеры из двух и более документов — отсортированные
+        номера строк; кластеры упорядочены по первому документу.
+    """
+    num_documents, num_perm = signatures.shape
+    if bands is None or rows is None:
+        bands, rows = lsh_parameters(threshold, num_perm)
+    candidates = np.flatnonzero(signatures[:, 0] != _EMPTY)
+
+    pairs = []
+    for band in range(bands):
+        keys = np.ascontiguousarray(
+            signatures[candidates, band * rows : (band + 1) * rows]
+        ).view(np.dtype((np.void, rows * signatures.itemsize)))[:, 0]
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = counts[inverse] > 1
+        if not shared.any():
+            continue
+        members = candidates[shared]
+        groups = inverse[shared]
+        # Первый (с наименьшим номером) документ каждой корзины — представитель
+        order = np.argsort(groups, kind="stable")
+        members, groups = members[order], groups[order]
+        first = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        representatives = np.repeat(members[first], np.diff(np.r_[first, groups.size]))
+        others = members != representatives
+        members, representatives = members[others], representatives[others]
+        similarity = (signatures[members] == signatures[representatives]).mean(axis=1)
+        close = similarity >= threshold
+        pairs.append(np.stack([representatives[close], members[close]], axis=1))
+
+    if not pairs:
+        return []
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+    parent = np.arange(num_documents)
+    for left, right in pairs.tolist():
+        left_root, right_root = _find_root(parent, left), _find_root(parent, right)
+        if left_root != right_root:
+            parent[max(left_root, right_root)] = min(left_root, right_root)
+
+    # Корень (наименьший номер) ищется только для документов из пар
+    nodes = np.unique(pairs)
+    roots = np.array([_find_root(parent, node) for node in nodes.tolist()])
+    order = np.argsort(roots, kind="stable")
+    boundaries = np.flatnonzero(np.diff(roots[order])) + 1
+    clusters = np.split(nodes[order], boundaries)
+    return sorted(clusters, key=lambda cluster: cluster[0])
+
+
+def _batch_signatures(
+    batch: Any, num_perm: int, shingle_size: int, seed: int, tokenizer: str
+) -> np.ndarray:
+    """Вычисляет сигнатуры контента пакета (в рабочем процессе)."""
+    return minhash_signatures(
+        column_values(get_column(batch, "content")),
+        num_perm,
+        shingle_size,
+        seed,
+        tokenizer,
+    )
+
+
+def compute_signatures(
+    batches: Iterable[Any],
+    workers: int = 1,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    seed: int = 1,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> np.ndarray:
+    """
+    Вычисляет сигнатуры контента по пакетам записей.
+
+    При workers > 1 пакеты обрабатываются в ProcessPoolExecutor, одновременно
+    не более 2 * workers пакетов; порядок строк сохраняется.
+
+    Args:
+        batches: Пакеты с колонкой 'content' (см. get_column).
+        workers: Количество рабочих процессов.
+        num_perm: Длина сигнатуры.
+        shingle_size: Количество токенов в шингле.
+        seed: Seed хэш-функций.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        np.ndarray: Сигнатуры всех строк (n × num_perm).
+    """
+    signature = partial(
+        _batch_signatures,
+        num_perm=num_perm,
+        shingle_size=shingle_size,
+        seed=seed,
+        tokenizer=tokenizer,
+    )
+    if workers <= 1:
+        parts = [signature(batch) for batch in batches]
+    else:
+        parts, pending = [], deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in batches:
+                pending.append(executor.submit(signature, batch))
+                if len(pending) >= 2 * workers:
+                    parts.append(pending.popleft().result())
+            while pending:
+                parts.append(pending.popleft().result())
+    if not parts:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    return np.concatenate(parts)
+
+
+def find_near_duplicates(
+    table: Any,
+    threshold: float = DEFAULT_THRESHOLD,
+    workers: int = 1,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    batch_size: int = 10_000,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> List[np.ndarray]:
+    """
+    Находит кластеры почти дубликатов контента в Arrow-таблице.
+
+    Args:
+        table: Таблица с колонкой 'content'.
+        threshold: Порог сходства (оценка Жаккара шинглов).
+        workers: Количество процессов для вычисления сигнатур.
+        num_perm: Длина сигнатуры.
+        shingle_size: Количество токенов в шингле.
+        batch_size: Размер пакета.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        List[np.ndarray]: Кластеры (см. find_duplicate_clusters).
+    """
+    signatures = compute_signatures(
+        table.to_batches(max_chunksize=batch_size),
+        workers,
+        num_perm,
+        shingle_size,
+        tokenizer=tokenizer,
+    )
+    return find_duplicate_clusters(signatures, threshold)
+
+
+def duplicate_mask(clusters: List[np.ndarray], num_rows: int) -> np.ndarray:
+    """
+    Отмечает строки, которые остаются после удаления дубликатов.
+
+    Из каждого кластера остается первый документ.
+
+    Args:
+        clusters: Кластеры (см. find_duplicate_clusters).
+        num_rows: Количество строк.
+
+    Returns:
+        np.ndarray: Булева маска оставляемых строк.
+    """
+    keep = np.ones(num_rows, dtype=bool)
+    for cluster in clusters:
+        keep[cluster[1:]] = False
+    return keep
+
+
+def duplicate_report(
+    clusters: List[np.ndarray],
+    labels: Any,
+    threshold: float = DEFAULT_THRESHOLD,
+    max_clusters: int = 20,
+) -> Dict[str, Any]:
+    """
+    Формирует раздел near_duplicates для результатов.
+
+    Дубликатами категории считаются документы кластеров, кроме первого,
+    принадлежащие этой категории.
+
+    Args:
+        clusters: Кластеры (см. find_duplicate_clusters).
+        labels: Категории строк.
+        threshold: Порог сходства, с которым найдены кластеры.
+        max_clusters: Сколько крупнейших кластеров перечислить.
+
+    Returns:
+        Dict: Сводка, дубликаты по категориям и крупнейшие кластеры.
+    """
+    labels = np.asarray(column_values(labels), dtype=np.int64)
+    if clusters:
+        members = np.concatenate(clusters)
+        duplicates = np.concatenate([cluster[1:] for cluster in clusters])
+        cluster_ids = np.repeat(np.arange(len(clusters)), [c.size for c in clusters])
+        # Кластер учитывается в каждой категории, к которой относится его документ
+        cluster_labels = np.unique(
+            np.stack([labels[members], cluster_ids], axis=1), axis=0
+        )[:, 0]
+    else:
+        duplicates = cluster_labels = np.empty(0, dtype=np.int64)
+    clusters_per_label = count_labels(cluster_labels)
+    duplicates_per_label = count_labels(labels[duplicates])
+
+    largest = sorted(clusters, key=lambda cluster: (-cluster.size, cluster[0]))
+    return {
+        "threshold": threshold,
+        "clusters": len(clusters),
+        "duplicate_documents": int(duplicates.size),
+        "by_category": {
+            get_category_name(label): {
+                "clusters": int(clusters_per_label[label]),
+                "duplicates": int(duplicates_per_label[label]),
+            }
+            for label in range(14)
+        },
+        "largest_clusters": [
+            {
+                "size": int(cluster.size),
+                "rows": cluster[:10].tolist(),
+                "categories": sorted(
+                    {get_category_name(int(label)) for label in labels[cluster]}
+                ),
+            }
+            for cluster in largest[:max_clusters]
+        ],
+    }
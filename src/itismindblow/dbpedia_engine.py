@@ -0,0 +1,843 @@
+"""
+Однопроходный движок анализа DBpedia.
+
+Считает распределение по категориям, статистику длин и количества слов,
+а также частоты слов (и, по запросу, n-грамм) по категориям за один
+проход по датасету с одной токенизацией каждой строки.
+"""
+
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dbpedia_modules import (
+    CATEGORY_NAMES,
+    calculate_stats,
+    column_values,
+    count_labels,
+    get_category_name,
+    get_column,
+    hash_tokens_64,
+    text_lengths,
+    tokenize_texts,
+)
+from dbpedia_ngrams import (
+    DEFAULT_MEMORY_MB,
+    NGramCounter,
+    ngram_capacity,
+    ngram_name,
+)
+from dbpedia_stats import (
+    GroupedHistogram,
+    SpaceSaving,
+    calculate_streaming_stats,
+    load_statistics,
+    make_statistics,
+)
+from dbpedia_tokenizers import DEFAULT_TOKENIZER
+from dbpedia_vocab import CategoryTermCounts
+
+
+# Поля, по которым считаются длины и количество слов
+TEXT_FIELDS = ("title", "content")
+# Колонки, которые нужны анализу
+COLUMNS = ("title", "content", "label")
+# Версия формата файлов частичных результатов
+PARTIAL_FORMAT_VERSION = 2
+# Количество интервалов гистограмм длин в статистике по категориям
+CATEGORY_HISTOGRAM_BINS = 20
+
+
+class DBpediaAnalyzer:
+    """
+    Накопитель статистики DBpedia, заполняемый за один проход.
+
+    В обычном режиме длины и количество слов хранятся массивами и статистика
+    считается через calculate_stats. В потоковом режиме (streaming=True)
+    вместо массивов используются потоковые накопители (см.
+    dbpedia_stats.make_statistics): точные гистограммы IntHistogram
+    (quantiles='exact') или t-digest (quantiles='tdigest'), поэтому память
+    не зависит от количества строк; растут только счетчики слов
+    (пропорционально словарю).
+
+    Если задан top_k_capacity, частоты слов считаются приближенно: вместо
+    матрицы CategoryTermCounts для каждой категории ведется сводка
+    SpaceSaving не более чем из top_k_capacity слов, и память под частоты
+    слов не зависит от размера словаря. Вместе с топом слов тогда
+    возвращается верхняя граница ошибки каждого счетчика.
+
+    Длины и количество слов дополнительно копятся в гистограммах,
+    индексированных категорией (GroupedHistogram), — из них за тот же
+    проход получается статистика по каждой категории.
+
+    Для каждого размера из ngram_sizes по контенту считаются n-граммы
+    (см. dbpedia_ngrams.NGramCounter); их таблицы вместе занимают
+    примерно не больше ngram_memory_mb мегабайт.
+
+    Тексты токенизируются токенизатором с именем tokenizer (см.
+    dbpedia_tokenizers); объединять можно только накопители с одним
+    токенизатором.
+    """
+
+    def __init__(
+        self,
+        streaming: bool = False,
+        top_k_capacity: Optional[int] = None,
+        quantiles: str = "exact",
+        ngram_sizes: Sequence[int] = (),
+        ngram_memory_mb: float = DEFAULT_MEMORY_MB,
+        tokenizer: str = DEFAULT_TOKENIZER,
+    ) -> None:
+        self.streaming = streaming
+        self.top_k_capacity = top_k_capacity
+        self.quantiles = quantiles
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.ngram_memory_mb = ngram_memory_mb
+        self.tokenizer = tokenizer
+        self.total_samples = 0
+        self.label_counts = np.zeros(len(CATEGORY_NAMES), dtype=np.int64)
+        if streaming:
+            self.lengths = {field: make_statistics(quantiles) for field in TEXT_FIELDS}
+            self.word_counts = {
+                field: make_statistics(quantiles) for field in TEXT_FIELDS
+            }
+        else:
+            self.lengths = {field: [] for field in TEXT_FIELDS}
+            self.word_counts = {field: [] for field in TEXT_FIELDS}
+        self.category_lengths = {
+            field: GroupedHistogram(len(CATEGORY_NAMES)) for field in TEXT_FIELDS
+        }
+        self.category_word_counts = {
+            field: GroupedHistogram(len(CATEGORY_NAMES)) for field in TEXT_FIELDS
+        }
+        if top_k_capacity is None:
+            self.terms = CategoryTermCounts(len(CATEGORY_NAMES))
+            self.heavy_hitters = None
+        else:
+            self.terms = None
+            self.heavy_hitters = [
+                SpaceSaving(top_k_capacity) for _ in CATEGORY_NAMES
+            ]
+        capacity = ngram_capacity(ngram_memory_mb, len(self.ngram_sizes))
+        self.ngrams = {n: NGramCounter(n, capacity) for n in self.ngram_sizes}
+
+    def update(self, records: Iterable[Dict[str, Any]]) -> "DBpediaAnalyzer":
+        """
+        Добавляет примеры-словари в накопитель.
+
+        Args:
+            records: Примеры с полями 'title', 'content', 'label'.
+
+        Returns:
+            DBpediaAnalyzer: Этот же накопитель.
+        """
+        records = list(records)
+        return self.update_batch(
+            {field: [item[field] for item in records] for field in COLUMNS}
+        )
+
+    def update_batch(self, batch: Any) -> "DBpediaAnalyzer":
+        """
+        Добавляет пакет записей в колоночном виде.
+
+        Пакетом может быть Arrow-таблица или RecordBatch, DataFrame
+        или словарь колонок {'title': [...], 'content': [...], 'label': [...]}
+        (формат Dataset.iter из datasets). Длины и распределение по категориям
+        считаются векторизованно, в Python-строки превращаются только тексты
+        для токенизации.
+
+        Args:
+            batch: Пакет записей.
+
+        Returns:
+            DBpediaAnalyzer: Этот же накопитель.
+        """
+        columns = {field: get_column(batch, field) for field in COLUMNS}
+        labels = columns["label"]
+        labels = np.asarray(
+            labels.to_numpy() if hasattr(labels, "to_numpy") else labels,
+            dtype=np.int64,
+        )
+        label_counts = count_labels(labels)
+        self.label_counts += label_counts
+        self.total_samples += int(label_counts.sum())
+
+        # Каждая строка токенизируется ровно один раз, колонка целиком
+        _, title_offsets = tokenize_texts(
+            column_values(columns["title"]), self.tokenizer
+        )
+        content_tokens, content_offsets = tokenize_texts(
+            column_values(columns["content"]), self.tokenizer
+        )
+        word_counts = {
+            "title": np.diff(title_offsets),
+            "content": np.diff(content_offsets),
+        }
+        self._count_words(content_tokens, content_offsets, labels)
+
+        for field in TEXT_FIELDS:
+            lengths = text_lengths(columns[field])
+            self.category_lengths[field].add(labels, lengths)
+            self.category_word_counts[field].add(labels, word_counts[field])
+            if self.streaming:
+                self.lengths[field].add(lengths)
+                self.word_counts[field].add(word_counts[field])
+            else:
+                self.lengths[field].append(lengths)
+                self.word_counts[field].append(word_counts[field])
+
+        return self
+
+    def update_tokenized(
+        self, corpus: Any, batch_size: int = 50_000
+    ) -> "DBpediaAnalyzer":
+        """
+        Добавляет корпус из кэша токенов без повторной токенизации.
+
+        Корпус должен быть построен токенизатором этого накопителя.
+
+        Args:
+            corpus: TokenizedCorpus (см. dbpedia_cache).
+            batch_size: Количество строк, частоты слов которых добавляются
+                за раз.
+
+        Returns:
+            DBpediaAnalyzer: Этот же накопитель.
+        """
+        labels = np.asarray(corpus.labels, dtype=np.int64)
+        label_counts = count_labels(labels)
+        self.label_counts += label_counts
+        self.total_samples += len(corpus)
+
+        for field in TEXT_FIELDS:
+            lengths = np.asarray(corpus.lengths[field], dtype=np.int64)
+            word_counts = corpus.word_counts(field)
+            self.category_lengths[field].add(labels, lengths)
+            self.category_word_counts[field].add(labels, word_counts)
+            if self.streaming:
+                self.lengths[field].add(lengths)
+                self.word_counts[field].add(word_counts)
+            else:
+                self.lengths[field].append(lengths)
+                self.word_counts[field].append(word_counts)
+
+        offsets = corpus.offsets["content"]
+        word_counts = corpus.word_counts("content")
+        if self.terms is not None:
+            # Id кэша переводятся в id словаря накопителя одной таблицей; в словарь
+            # добавляются только токены, встречающиеся в контенте
+            used = np.flatnonzero(
+                np.bincount(corpus.ids["content"], minlength=len(corpus.vocabulary))
+            )
+            cached_tokens = corpus.vocabulary.tokens
+            remap = np.zeros(len(corpus.vocabulary), dtype=np.int64)
+            remap[used] = self.terms.vocabulary.encode(
+                [cached_tokens[token_id] for token_id in used.tolist()]
+            )
+        if self.terms is None or self.ngrams:
+            import pyarrow as pa
+
+            vocabulary = pa.array(corpus.vocabulary.tokens, type=pa.string())
+        if self.ngrams:
+            # Хэши n-грамм по словарю кэша: каждый токен хэшируется один раз
+            vocabulary_hashes = hash_tokens_64(vocabulary)
+
+        for start in range(0, len(corpus), batch_size):
+            stop = min(start + batch_size, len(corpus))
+            ids = corpus.ids["content"][offsets[start] : offsets[stop]]
+            token_labels = np.repeat(labels[start:stop], word_counts[start:stop])
+            if self.terms is not None:
+                self.terms.add(remap[ids], token_labels)
+            else:
+                self._update_heavy_hitters(vocabulary.take(ids), token_labels)
+            if self.ngrams:
+                tokens = vocabulary.take(np.asarray(ids))
+                hashes = vocabulary_hashes[ids]
+                batch_offsets = offsets[start : stop + 1] - offsets[start]
+                for counter in self.ngrams.values():
+                    counter.add_tokenized(
+                        tokens, batch_offsets, labels[start:stop], hashes
+                    )
+
+        return self
+
+    def _count_words(self, tokens: Any, offsets: np.ndarray, labels: Any) -> None:
+        """Добавляет токены контента (см. tokenize_texts) в частоты слов."""
+        if self.terms is not None:
+            self.terms.add_tokenized(tokens, offsets, labels)
+        else:
+            self._update_heavy_hitters(
+                tokens, np.repeat(np.asarray(labels, dtype=np.int64), np.diff(offsets))
+            )
+        if self.ngrams:
+            hashes = hash_tokens_64(tokens)
+            for counter in self.ngrams.values():
+                counter.add_tokenized(tokens, offsets, labels, hashes)
+
+    def _update_heavy_hitters(self, tokens: Any, token_labels: np.ndarray) -> None:
+        """Добавляет точные частоты пакета в сводки SpaceSaving категорий."""
+        import pyarrow as pa
+
+        grouped = (
+            pa.table({"label": token_labels, "token": tokens})
+            .group_by(["label", "token"])
+            .aggregate([("token", "count")])
+        )
+        batch_counts = [{} for _ in self.heavy_hitters]
+        for label, token, count in zip(
+            grouped["label"].to_pylist(),
+            grouped["token"].to_pylist(),
+            grouped["token_count"].to_pylist(),
+        ):
+            batch_counts[label][token] = count
+        for sketch, counts in zip(self.heavy_hitters, batch_counts):
+            if counts:
+                sketch.update(counts)
+
+    def merge(self, other: "DBpediaAnalyzer") -> "DBpediaAnalyzer":
+        """
+        Объединяет частичный результат другого накопителя с этим.
+
+        Шарды нужно объединять в порядке следования строк: тогда порядок
+        длин и порядок первых вхождений слов (а значит, и порядок слов
+        с одинаковой частотой в топе) совпадают с однопоточным проходом.
+
+        Args:
+            other: Накопитель со следующего шарда датасета.
+
+        Returns:
+            DBpediaAnalyzer: Этот же накопитель.
+        """
+        if other.streaming != self.streaming:
+            raise ValueError("Нельзя объединить потоковый и обычный накопители")
+        if other.top_k_capacity != self.top_k_capacity:
+            raise ValueError("Нельзя объединить накопители с разным top_k_capacity")
+        if self.streaming and other.quantiles != self.quantiles:
+            raise ValueError("Нельзя объединить накопители с разным режимом квантилей")
+        if other.ngram_sizes != self.ngram_sizes:
+            raise ValueError("Нельзя объединить накопители с разными n-граммами")
+        if other.tokenizer != self.tokenizer:
+            raise ValueError("Нельзя объединить накопители с разными токенизаторами")
+
+        self.total_samples += other.total_samples
+        self.label_counts += other.label_counts
+        for field in TEXT_FIELDS:
+            self.category_lengths[field].merge(other.category_lengths[field])
+            self.category_word_counts[field].merge(other.category_word_counts[field])
+            if self.streaming:
+                self.lengths[field].merge(other.lengths[field])
+                self.word_counts[field].merge(other.word_counts[field])
+            else:
+                self.lengths[field].extend(other.lengths[field])
+                self.word_counts[field].extend(other.word_counts[field])
+        if self.terms is not None:
+            self.terms.merge(other.terms)
+        else:
+            for sketch, other_sketch in zip(self.heavy_hitters, other.heavy_hitters):
+                sketch.merge(other_sketch)
+        for n, counter in self.ngrams.items():
+            counter.merge(other.ngrams[n])
+
+        return self
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет состояние накопителя в файл частичного результата (.npz).
+
+        Файл содержит распределение по категориям, накопители длин
+        и количества слов и частоты слов; загруженные через load
+        накопители объединяются методом merge в любом порядке группировки.
+
+        Args:
+            path: Путь к файлу.
+        """
+        meta = {
+            "format_version": PARTIAL_FORMAT_VERSION,
+            "streaming": self.streaming,
+            "top_k_capacity": self.top_k_capacity,
+            "quantiles": self.quantiles,
+            "ngram_sizes": list(self.ngram_sizes),
+            "ngram_memory_mb": self.ngram_memory_mb,
+            "tokenizer": self.tokenizer,
+            "total_samples": self.total_samples,
+        }
+        arrays = {
+            "meta": np.frombuffer(json.dumps(meta).encode(), np.uint8),
+            "label_counts": self.label_counts,
+        }
+        for field in TEXT_FIELDS:
+            for name, values in (
+                ("lengths", self.lengths[field]),
+                ("word_counts", self.word_counts[field]),
+            ):
+                if self.streaming:
+                    state = values.to_arrays()
+                elif values:
+                    state = {"values": np.concatenate(values)}
+                else:
+                    state = {"values": np.zeros(0, dtype=np.int64)}
+                for key, array in state.items():
+                    arrays[f"{field}.{name}.{key}"] = array
+            for name, histogram in (
+                ("category_lengths", self.category_lengths[field]),
+                ("category_word_counts", self.category_word_counts[field]),
+            ):
+                for key, array in histogram.to_arrays().items():
+                    arrays[f"{field}.{name}.{key}"] = array
+        if self.terms is not None:
+            for key, array in self.terms.to_arrays().items():
+                arrays[f"terms.{key}"] = array
+        else:
+            for label, sketch in enumerate(self.heavy_hitters):
+                for key, array in sketch.to_arrays().items():
+                    arrays[f"heavy_hitters.{label}.{key}"] = array
+        for n, counter in self.ngrams.items():
+            for key, array in counter.to_arrays().items():
+                arrays[f"ngrams.{n}.{key}"] = array
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "DBpediaAnalyzer":
+        """
+        Загружает накопитель, сохраненный методом save.
+
+        Args:
+            path: Путь к файлу.
+
+        Returns:
+            DBpediaAnalyzer: Накопитель.
+        """
+        with np.load(path) as data:
+            arrays = dict(data)
+        meta = json.loads(arrays["meta"].tobytes().decode())
+        if meta["format_version"] != PARTIAL_FORMAT_VERSION:
+            version = meta["format_version"]
+            raise ValueError(f"Неизвестная версия частичного результата: {version}")
+
+        def group(prefix: str) -> Dict[str, np.ndarray]:
+            return {
+                key[len(prefix) :]: array
+                for key, array in arrays.items()
+                if key.startswith(prefix)
+            }
+
+        analyzer = cls(
+            meta["streaming"],
+            meta["top_k_capacity"],
+            meta["quantiles"],
+            meta.get("ngram_sizes", ()),
+            meta.get("ngram_memory_mb", DEFAULT_MEMORY_MB),
+            meta.get("tokenizer", DEFAULT_TOKENIZER),
+        )
+        analyzer.total_samples = meta["total_samples"]
+        analyzer.label_counts = arrays["label_counts"]
+        for field in TEXT_FIELDS:
+            for name, values in (
+                ("lengths", analyzer.lengths),
+                ("word_counts", analyzer.word_counts),
+            ):
+                state = group(f"{field}.{name}.")
+                if analyzer.streaming:
+                    values[field] = load_statistics(analyzer.quantiles, state)
+                else:
+                    values[field] = [state["values"]]
+            for name, histograms in (
+                ("category_lengths", analyzer.category_lengths),
+                ("category_word_counts", analyzer.category_word_counts),
+            ):
+                histograms[field] = GroupedHistogram.from_arrays(
+                    group(f"{field}.{name}.")
+                )
+        if analyzer.terms is not None:
+            analyzer.terms = CategoryTermCounts.from_arrays(group("terms."))
+        else:
+            analyzer.heavy_hitters = [
+                SpaceSaving.from_arrays(group(f"heavy_hitters.{label}."))
+                for label in range(len(analyzer.heavy_hitters))
+            ]
+        analyzer.ngrams = {
+            n: NGramCounter.from_arrays(group(f"ngrams.{n}."))
+            for n in analyzer.ngram_sizes
+        }
+        return analyzer
+
+    def category_distribution(self) -> Dict[str, int]:
+        """Возвращает распределение {category_name: count}."""
+        return {
+            get_category_name(label): int(count)
+            for label, count in enumerate(self.label_counts)
+        }
+
+    def text_statistics(self) -> Dict[str, Dict[str, float]]:
+        """Возвращает статистику для title и content."""
+        if self.streaming:
+            return {
+                field: calculate_streaming_stats(
+                    self.lengths[field], self.word_counts[field]
+                )
+                for field in TEXT_FIELDS
+            }
+        return {
+            field: calculate_stats(
+                np.concatenate(self.lengths[field]),
+                np.concatenate(self.word_counts[field]),
+            )
+            for field in TEXT_FIELDS
+        }
+
+    def per_category_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Возвращает статистику текстов отдельно для каждой категории.
+
+        Для title и content — та же статистика, что в text_statistics
+        (точная, по гистограммам), и гистограмма длин с общими для всех
+        категорий интервалами; при точном подсчете частот — также размер
+        словаря контента и доля слов-гапаксов (встретившихся один раз).
+
+        Returns:
+            Dict: {category: {'documents', 'title', 'content',
+            'vocabulary_size', 'hapax_ratio'}}; категории без документов
+            пропускаются.
+        """
+        binned = {
+            field: self.category_lengths[field].binned(CATEGORY_HISTOGRAM_BINS)
+            for field in TEXT_FIELDS
+        }
+        if self.terms is not None:
+            vocabulary_sizes, hapax_counts = self.terms.vocabulary_profile()
+
+        statistics = {}
+        for label, count in enumerate(self.label_counts):
+            if not count:
+                continue
+            category = {"documents": int(count)}
+            for field in TEXT_FIELDS:
+                edges, counts = binned[field]
+                category[field] = calculate_streaming_stats(
+                    self.category_lengths[field].group(label),
+                    self.category_word_counts[field].group(label),
+                )
+                category[field]["length_histogram"] = {
+                    "bin_edges": edges.tolist(),
+                    "counts": counts[label].tolist(),
+                }
+            if self.terms is not None:
+                size = int(vocabulary_sizes[label])
+                category["vocabulary_size"] = size
+                category["hapax_ratio"] = (
+                    float(hapax_counts[label] / size) if size else 0.0
+                )
+            statistics[get_category_name(label)] = category
+        return statistics
+
+    def top_words(self, top_n: int = 25) -> Dict[str, List[Tuple[str, int]]]:
+        """Возвращает топ-N слов для каждой категории."""
+        if self.terms is None:
+            return {
+                get_category_name(label): [
+                    (word, count) for word, count, _ in sketch.top(top_n)
+                ]
+                for label, sketch in enumerate(self.heavy_hitters)
+            }
+        return {
+            get_category_name(label): self.terms.top_words(label, top_n)
+            for label in range(self.terms.num_labels)
+        }
+
+    def distinctive_words(
+        self, top_n: int = 25, method: str = "log_odds"
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Возвращает самые характерные слова каждой категории.
+
+        Доступно только при точном подсчете частот (top_k_capacity=None).
+
+        Args:
+            top_n: Количество слов для каждой категории.
+            method: 'log_odds' или 'tfidf' (см. CategoryTermCounts).
+
+        Returns:
+            Dict: {category: [(word, score), ...]}.
+        """
+        return {
+            get_category_name(label): words
+            for label, words in enumerate(self.terms.distinctive_words(top_n, method))
+        }
+
+    def top_word_errors(self, top_n: int = 25) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Возвращает верхние границы ошибок для приближенного топа слов.
+
+        Истинная частота слова лежит в [count - error, count].
+
+        Args:
+            top_n: Количество топовых слов для каждой категории.
+
+        Returns:
+            Dict: {category: [(word, error), ...]} в порядке top_words.
+        """
+        return {
+            get_category_name(label): [
+                (word, error) for word, _, error in sketch.top(top_n)
+            ]
+            for label, sketch in enumerate(self.heavy_hitters)
+        }
+
+    def top_ngrams(self, n: int, top_n: int = 25) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Возвращает топ-N n-грамм размера n для каждой категории.
+
+        Args:
+            n: Размер n-граммы (один из ngram_sizes).
+            top_n: Количество n-грамм для каждой категории.
+
+        Returns:
+            Dict: {category: [(ngram, frequency), ...]}.
+        """
+        return {
+            get_category_name(label): self.ngrams[n].top_ngrams(label, top_n)
+            for label in range(len(CATEGORY_NAMES))
+        }
+
+    def ngram_error_bounds(self) -> Dict[str, int]:
+        """
+        Возвращает границы недосчета n-грамм из-за очисток таблиц.
+
+        Истинная частота n-граммы лежит в [count, count + bound]; 0 означает
+        точный подсчет.
+
+        Returns:
+            Dict: {'bigrams': bound, ...}.
+        """
+        return {ngram_name(n): counter.max_error for n, counter in self.ngrams.items()}
+
+    def results(self, top_n: int = 25) -> Dict[str, Any]:
+        """
+        Собирает все результаты анализа.
+
+        Args:
+            top_n: Количество топовых слов для каждой категории.
+
+        Returns:
+            Dict: Разделы category_distribution, text_statistics,
+            per_category_statistics, top_words_by_category и
+            distinctive_words_by_category
+            (в приближенном режиме вместо последнего —
+            top_words_errors_by_category), а при заданных ngram_sizes —
+            top_bigrams_by_category и т. д. и ngram_error_bounds.
+        """
+        results = {
+            "category_distribution": self.category_distribution(),
+            "text_statistics": self.text_statistics(),
+            "per_category_statistics": self.per_category_statistics(),
+            "top_words_by_category": self.top_words(top_n),
+        }
+        if self.heavy_hitters is not None:
+            results["top_words_errors_by_category"] = self.top_word_errors(top_n)
+        else:
+            results["distinctive_words_by_category"] = self.distinctive_words(top_n)
+        for n in self.ngram_sizes:
+            results[f"top_{ngram_name(n)}_by_category"] = self.top_ngrams(n, top_n)
+        if self.ngram_sizes:
+            results["ngram_error_bounds"] = self.ngram_error_bounds()
+        return results
+
+
+def _analyze_shard(
+    shard: Any,
+    top_k_capacity: Optional[int] = None,
+    ngram_sizes: Sequence[int] = (),
+    ngram_memory_mb: float = DEFAULT_MEMORY_MB,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    batch_size: int = 10_000,
+) -> DBpediaAnalyzer:
+    """Обрабатывает один шард в рабочем процессе."""
+    analyzer = DBpediaAnalyzer(
+        top_k_capacity=top_k_capacity,
+        ngram_sizes=ngram_sizes,
+        ngram_memory_mb=ngram_memory_mb,
+        tokenizer=tokenizer,
+    )
+    for start in range(0, len(shard), batch_size):
+        analyzer.update_batch(shard[start : start + batch_size])
+    return analyzer
+
+
+def _analyze_batch(
+    batch: Any,
+    top_k_capacity: Optional[int] = None,
+    quantiles: str = "exact",
+    ngram_sizes: Sequence[int] = (),
+    ngram_memory_mb: float = DEFAULT_MEMORY_MB,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> DBpediaAnalyzer:
+    """Обрабатывает один пакет потокового режима в рабочем процессе."""
+    return DBpediaAnalyzer(
+        True, top_k_capacity, quantiles, ngram_sizes, ngram_memory_mb, tokenizer
+    ).update_batch(batch)
+
+
+def split_into_shards(dataset: Any, num_shards: int) -> List[Any]:
+    """
+    Делит датасет на непрерывные шарды примерно равного размера.
+
+    Для Arrow-таблицы шарды — срезы без копирования данных.
+
+    Args:
+        dataset: Список примеров, DataFrame или Arrow-таблица.
+        num_shards: Количество шардов.
+
+    Returns:
+        List: Шарды в исходном порядке строк.
+    """
+    shard_size = -(-len(dataset) // num_shards) or 1
+    return [
+        dataset[start : start + shard_size]
+        for start in range(0, len(dataset), shard_size)
+    ]
+
+
+def build_analyzer(
+    dataset: Any,
+    workers: int = 1,
+    top_k_capacity: Optional[int] = None,
+    ngram_sizes: Sequence[int] = (),
+    ngram_memory_mb: float = DEFAULT_MEMORY_MB,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> DBpediaAnalyzer:
+    """
+    Заполняет накопитель по датасету, находящемуся в памяти.
+
+    При workers > 1 датасет делится на шарды, которые обрабатываются
+    в ProcessPoolExecutor; частичные результаты объединяются по порядку,
+    поэтому результат не зависит от количества процессов.
+
+    Args:
+        dataset: Примеры с полями 'title', 'content', 'label' (список словарей,
+            DataFrame или Arrow-таблица).
+        workers: Количество рабочих процессов.
+        top_k_capacity: Емкость сводки приближенного топа слов
+            (None — точный подсчет).
+        ngram_sizes: Размеры считаемых n-грамм.
+        ngram_memory_mb: Примерный лимит памяти таблиц n-грамм, МБ.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        DBpediaAnalyzer: Заполненный накопитель.
+    """
+    analyze = partial(
+        _analyze_shard,
+        top_k_capacity=top_k_capacity,
+        ngram_sizes=ngram_sizes,
+        ngram_memory_mb=ngram_memory_mb,
+        tokenizer=tokenizer,
+    )
+    if workers <= 1:
+        return analyze(dataset)
+
+    analyzer = DBpediaAnalyzer(
+        top_k_capacity=top_k_capacity,
+        ngram_sizes=ngram_sizes,
+        ngram_memory_mb=ngram_memory_mb,
+        tokenizer=tokenizer,
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard_analyzer in executor.map(
+            analyze, split_into_shards(dataset, workers)
+        ):
+            analyzer.merge(shard_analyzer)
+
+    return analyzer
+
+
+def stream_analyzer(
+    batches: Iterable[Any],
+    workers: int = 1,
+    top_k_capacity: Optional[int] = None,
+    quantiles: str = "exact",
+    ngram_sizes: Sequence[int] = (),
+    ngram_memory_mb: float = DEFAULT_MEMORY_MB,
+    tokenizer: str = DEFAULT_TOKENIZER,
+) -> DBpediaAnalyzer:
+    """
+    Заполняет потоковый накопитель по пакетам записей.
+
+    Пакеты читаются лениво; при workers > 1 одновременно обрабатывается
+    не более 2 * workers пакетов, так что память ограничена размером пакета.
+
+    Args:
+        batches: Пакеты в колоночном виде (см. DBpediaAnalyzer.update_batch).
+        workers: Количество рабочих процессов.
+        top_k_capacity: Емкость сводки приближенного топа слов
+            (None — точный подсчет).
+        quantiles: 'exact' (точные гистограммы) или 'tdigest'.
+        ngram_sizes: Размеры считаемых n-грамм.
+        ngram_memory_mb: Примерный лимит памяти таблиц n-грамм, МБ.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        DBpediaAnalyzer: Заполненный потоковый накопитель.
+    """
+    options = (top_k_capacity, quantiles, ngram_sizes, ngram_memory_mb, tokenizer)
+    analyzer = DBpediaAnalyzer(True, *options)
+    if workers <= 1:
+        for batch in batches:
+            analyzer.update_batch(batch)
+        return analyzer
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in batches:
+            pending.append(
+                executor.submit(_analyze_batch, batch, *options)
+            )
+            if len(pending) >= 2 * workers:
+                analyzer.merge(pending.popleft().result())
+        while pending:
+            analyzer.merge(pending.popleft().result())
+
+    return analyzer
+
+
+def merge_partials(paths: Iterable[str]) -> DBpediaAnalyzer:
+    """
+    Объединяет файлы частичных результатов (см. DBpediaAnalyzer.save).
+
+    Объединение ассоциативно: частичные результаты можно сливать
+    иерархически, сохраняя промежуточные итоги. Файлы шардов нужно
+    передавать в порядке следования строк (см. DBpediaAnalyzer.merge).
+
+    Args:
+        paths: Пути к файлам частичных результатов.
+
+    Returns:
+        DBpediaAnalyzer: Объединенный накопитель.
+    """
+    paths = list(paths)
+    if not paths:
+        raise ValueError("Не передано ни одного частичного результата")
+    analyzer = DBpediaAnalyzer.load(paths[0])
+    for path in paths[1:]:
+        analyzer.merge(DBpediaAnalyzer.load(path))
+    return analyzer
+
+
+def analyze_dataset(dataset: Any, top_n: int = 25, workers: int = 1) -> Dict[str, Any]:
+    """
+    Выполняет полный анализ датасета за один проход (см. build_analyzer).
+
+    Args:
+        dataset: Примеры с полями 'title', 'content', 'label' (список словарей,
+            DataFrame или Arrow-таблица).
+        top_n: Количество топовых слов для каждой категории.
+        workers: Количество рабочих процессов.
+
+    Returns:
+        Dict: Результаты анализа (см. DBpediaAnalyzer.results).
+    """
+    return build_analyzer(dataset, workers).results(top_n)
@@ -0,0 +1,458 @@
+"""
+Инвертированный индекс текстов DBpedia.
+
+Для каждого токена (как в preprocess_text) хранится отсортированный
+список строк, в которых он встречается. Списки сжаты: номера строк
+заменены разностями соседних номеров, а разности записаны в формате
+varint (7 бит на байт, старший бит — признак продолжения). Индекс
+сохраняется в каталог .npy-файлов и открывается через memory map,
+поэтому запрос читает с диска только списки своих токенов. Как и кэш
+токенов, индекс привязан к отпечаткам датасета и токенизатора и
+перестраивается, если они изменились.
+
+Запуск:
+    python dbpedia_index.py "soundtrack AND oscar" --label Film
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Iterable, List, Optional, Union
+
+import numpy as np
+
+from dbpedia_cache import TokenizedCorpus, tokenizer_fingerprint
+from dbpedia_modules import CATEGORY_NAMES, get_category_name, preprocess_text
+from dbpedia_vocab import Vocabulary
+
+# Версия формата индекса; при изменении формата старые каталоги не читаются
+INDEX_FORMAT_VERSION = 1
+# Каталог индекса по умолчанию
+INDEX_DIR = ".dbpedia_index"
+
+
+def _varint_sizes(values: np.ndarray) -> np.ndarray:
+    """Количество байтов varint каждого числа."""
+    sizes = np.ones(values.size, dtype=np.int64)
+    for bits in (7, 14, 21, 28):
+        sizes += values >= (1 << bits)
+    return sizes
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """
+    Кодирует неотрицательные числа в формате varint.
+
+    Args:
+        values: Числа (меньше 2 ** 35).
+
+    Returns:
+        np.ndarray: Байты (uint8), младшие 7 бит идут первыми.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = _varint_sizes(values)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    encoded = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for byte in range(5):
+        present = sizes > byte
+        if not present.any():
+            break
+        chunk = (values[present] >> np.uint64(7 * byte)) & np.uint64(0x7F)
+        # У всех байтов числа, кроме последнего, выставлен бит продолжения
+        more = (sizes[present] > byte + 1).astype(np.uint64) << np.uint64(7)
+        encoded[starts[present] + byte] = chunk | more
+    return encoded
+
+
+def decode_varints(encoded: np.ndarray) -> np.ndarray:
+    """
+    Декодирует последовательность varint.
+
+    Args:
+        encoded: Байты (см. encode_varints).
+
+    Returns:
+        np.ndarray: Числа (int64).
+    """
+    encoded = np.asarray(encoded, dtype=np.uint8)
+    if encoded.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(encoded < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    # Номер байта внутри своего числа
+    position = np.arange(encoded.size) - np.repeat(starts, ends - starts + 1)
+    parts = (encoded & 0x7F).astype(np.int64) << (7 * position)
+    return np.add.reduceat(parts, starts)
+
+
+class InvertedIndex:
+    """Инвертированный индекс: сжатые списки строк по токенам и labels строк."""
+
+    def __init__(
+        self,
+        vocabulary: Vocabulary,
+        postings: np.ndarray,
+        term_offsets: np.ndarray,
+        doc_freq: np.ndarray,
+        labels: np.ndarray,
+    ) -> None:
+        self.vocabulary = vocabulary
+        self.postings = postings
+        self.term_offsets = term_offsets
+        self.doc_freq = doc_freq
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def build(cls, corpus: TokenizedCorpus, field: str = "content") -> "InvertedIndex":
+        """
+        Строит индекс по токенизированному корпусу.
+
+        Args:
+            corpus: Корпус (см. load_or_build_token_cache).
+            field: Индексируемое поле ('title' или 'content').
+
+        Returns:
+            InvertedIndex: Индекс в памяти.
+        """
+        num_rows = len(corpus)
+        num_terms = len(corpus.vocabulary)
+        rows = np.repeat(np.arange(num_rows, dtype=np.int64), corpus.word_counts(field))
+        # Уникальные пары (токен, строка), упорядоченные по токену и строке
+        ids = np.asarray(corpus.ids[field], dtype=np.int64)
+        keys = np.unique(ids * num_rows + rows)
+        terms, rows = np.divmod(keys, max(num_rows, 1))
+
+        doc_freq = np.bincount(terms, minlength=num_terms)
+        first = np.concatenate([[0], np.cumsum(doc_freq)[:-1]])
+        deltas = np.diff(rows, prepend=0)
+        # Первая строка каждого списка хранится без разности
+        deltas[first[doc_freq > 0]] = rows[first[doc_freq > 0]]
+        term_bytes = np.bincount(terms, _varint_sizes(deltas), minlength=num_terms)
+        term_offsets = np.concatenate([[0], np.cumsum(term_bytes)]).astype(np.int64)
+        return cls(
+            corpus.vocabulary,
+            encode_varints(deltas),
+            term_offsets,
+            doc_freq.astype(np.int64),
+            np.asarray(corpus.labels, dtype=np.int64),
+        )
+
+    def save(self, path: str, fingerprint: Optional[str] = None) -> None:
+        """
+        Сохраняет индекс в каталог.
+
+        Каталог пишется во временный и переименовывается целиком, чтобы
+        прерванный запуск не оставил недописанный индекс.
+
+        Args:
+            path: Каталог индекса.
+            fingerprint: Отпечаток проиндексированного датасета
+                (см. dbpedia_cache.dataset_fingerprint).
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent)
+        try:
+            with open(
+                os.path.join(tmp_path, "vocabulary.txt"), "w", encoding="utf-8"
+            ) as f:
+                f.write("\n".join(self.vocabulary.tokens))
+            for name in ("postings", "term_offsets", "doc_freq", "labels"):
+                np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+            with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "format_version": INDEX_FORMAT_VERSION,
+                        "dataset_fingerprint": fingerprint,
+                        "tokenizer_fingerprint": tokenizer_fingerprint(),
+                        "num_rows": len(self),
+                        "num_terms": len(self.vocabulary),
+                        "postings_bytes": int(self.postings.size),
+                    },
+                    f,
+                    indent=2,
+                )
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    @classmethod
+    def open(cls, path: str) -> "InvertedIndex":
+        """
+        Открывает сохраненный индекс; массивы отображаются в память.
+
+        Args:
+            path: Каталог, записанный методом save.
+
+        Returns:
+            InvertedIndex: Индекс.
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата индекса: {path}")
+        with open(os.path.join(path, "vocabulary.txt"), encoding="utf-8") as f:
+            text = f.read()
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        return cls(
+            Vocabulary(text.split("\n") if text else ()),
+            load("postings"),
+            load("term_offsets"),
+            load("doc_freq"),
+            load("labels"),
+        )
+
+    def _term_id(self, term: str) -> Optional[int]:
+        """
+        Id слова запроса после той же нормализации, что и у текстов.
+
+        Стоп-слова и слова короче MIN_TOKEN_LENGTH не индексируются,
+        поэтому для них выбрасывается ValueError; слово, которого нет
+        в корпусе, дает None.
+        """
+        tokens = preprocess_text(term)
+        if len(tokens) != 1:
+            raise ValueError(f"Слово запроса не индексируется: {term!r}")
+        return self.vocabulary.get(tokens[0])
+
+    def postings_for(self, term: str) -> np.ndarray:
+        """
+        Возвращает отсортированные номера строк, содержащих слово.
+
+        Args:
+            term: Слово (нормализуется как в preprocess_text).
+
+        Returns:
+            np.ndarray: Номера строк.
+        """
+        term_id = self._term_id(term)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64)
+        start, stop = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        return np.cumsum(decode_varints(self.postings[start:stop]))
+
+    def query(
+        self,
+        all_of: Iterable[str] = (),
+        any_of: Iterable[str] = (),
+        labels: Optional[Iterable[Union[int, str]]] = None,
+    ) -> np.ndarray:
+        """
+        Находит строки, содержащие все слова all_of и хотя бы одно из any_of.
+
+        Списки пересекаются начиная с самого короткого.
+
+        Args:
+            all_of: Слова, которые должны встретиться все (AND).
+            any_of: Слова, из которых должно встретиться хотя бы одно (OR).
+            labels: Допустимые категории (номера или названия; None — все).
+
+        Returns:
+            np.ndarray: Отсортированные номера строк.
+        """
+        all_of, any_of = list(all_of), list(any_of)
+        if not all_of and not any_of:
+            raise ValueError("Пустой запрос")
+        required = sorted(
+            (self.postings_for(term) for term in all_of), key=lambda rows: rows.size
+        )
+        if any_of:
+            required.append(
+                np.unique(np.concatenate([self.postings_for(term) for term in any_of]))
+            )
+        rows = required[0]
+        for other in required[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        if labels is not None:
+            rows = rows[np.isin(self.labels[rows], label_ids(labels))]
+        return rows
+
+    def search(
+        self, expression: str, labels: Optional[Iterable[Union[int, str]]] = None
+    ) -> np.ndarray:
+        """
+        Выполняет булев запрос из слов, AND и OR (без фраз и скобок).
+
+        AND связывает сильнее OR, соседние слова без оператора соединяются
+        через AND: 'soundtrack oscar OR grammy' — это
+        (soundtrack AND oscar) OR grammy.
+
+        Args:
+            expression: Запрос.
+            labels: Допустимые категории (номера или названия; None — все).
+
+        Returns:
+            np.ndarray: Отсортированные номера строк.
+        """
+        clauses = [[]]
+        for word in expression.split():
+            if word == "OR":
+                clauses.append([])
+            elif word != "AND":
+                clauses[-1].append(word)
+        if not all(clauses):
+            raise ValueError(f"Некорректный запрос: {expression!r}")
+        parts = [self.query(all_of=clause, labels=labels) for clause in clauses]
+        return np.unique(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+
+
+def label_ids(labels: Iterable[Union[int, str]]) -> np.ndarray:
+    """
+    Переводит категории (номера или названия) в номера.
+
+    Args:
+        labels: Категории.
+
+    Returns:
+        np.ndarray: Номера категорий.
+    """
+    name_to_id = {name: label for label, name in CATEGORY_NAMES.items()}
+    ids = []
+    for label in labels:
+        if isinstance(label, str) and not label.isdigit():
+            if label not in name_to_id:
+                raise ValueError(f"Неизвестная категория: {label!r}")
+            ids.append(name_to_id[label])
+        else:
+            ids.append(int(label))
+    return np.array(ids, dtype=np.int64)
+
+
+def index_is_current(path: str, fingerprint: str) -> bool:
+    """
+    Проверяет, что индекс в каталоге построен по этим данным.
+
+    Args:
+        path: Каталог индекса.
+        fingerprint: Отпечаток датасета.
+
+    Returns:
+        bool: True, если индекс есть и совпадают версия формата, отпечаток
+        датасета и отпечаток токенизатора.
+    """
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (
+        meta.get("format_version") == INDEX_FORMAT_VERSION
+        and meta.get("dataset_fingerprint") == fingerprint
+        and meta.get("tokenizer_fingerprint") == tokenizer_fingerprint()
+    )
+
+
+def load_or_build_index(
+    corpus_loader: Callable[[], TokenizedCorpus],
+    fingerprint: str,
+    path: str = INDEX_DIR,
+    rebuild: bool = False,
+) -> InvertedIndex:
+    """
+    Открывает индекс или строит его по корпусу, если индекса нет или он устарел.
+
+    Args:
+        corpus_loader: Функция без аргументов, возвращающая TokenizedCorpus
+            (вызывается только при построении).
+        fingerprint: Отпечаток датасета, по которому строится корпус
+            (например, Dataset._fingerprint).
+        path: Каталог индекса.
+        rebuild: Построить индекс заново, даже если он есть.
+
+    Returns:
+        InvertedIndex: Индекс с memory-mapped массивами.
+    """
+    if rebuild or not index_is_current(path, fingerprint):
+        InvertedIndex.build(corpus_loader()).save(path, fingerprint)
+    return InvertedIndex.open(path)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки.
+
+    Args:
+        argv: Аргументы (по умолчанию sys.argv).
+
+    Returns:
+        argparse.Namespace: Параметры запуска.
+    """
+    parser = argparse.ArgumentParser(description="Поиск по текстам DBpedia")
+    parser.add_argument(
+        "expression", nargs="?", help="запрос, например 'soundtrack AND oscar'"
+    )
+    parser.add_argument(
+        "--label",
+        action="append",
+        default=None,
+        help="искать только в категории (название или номер; можно повторять)",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=20, help="сколько номеров строк вывести"
+    )
+    parser.add_argument(
+        "--index-dir",
+        default=INDEX_DIR,
+        help=f"каталог индекса (по умолчанию {INDEX_DIR})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=".dbpedia_cache",
+        help="каталог кэша токенов, по которому строится индекс",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="процессы токенизации при построении"
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="построить индекс заново"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Строит (при необходимости) индекс и выполняет запрос.
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv).
+    """
+    from datasets import load_dataset
+
+    from assignment import load_tokenized_corpus
+
+    args = parse_args(argv)
+    start = time.perf_counter()
+    dataset = load_dataset("dbpedia_14", split="train")
+    index = load_or_build_index(
+        lambda: load_tokenized_corpus(
+            args.cache_dir, workers=args.workers, dataset=dataset
+        ),
+        dataset._fingerprint,
+        args.index_dir,
+        args.rebuild,
+    )
+    print(f"Индекс открыт за {time.perf_counter() - start:.2f} с: {len(index)} строк")
+    if not args.expression:
+        return
+
+    start = time.perf_counter()
+    rows = index.search(args.expression, labels=args.label)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Найдено строк: {rows.size} за {elapsed_ms:.1f} мс")
+    for row in rows[: args.limit].tolist():
+        print(f"{row}\t{get_category_name(int(index.labels[row]))}")
+
+
+if __name__ == "__main__":
+    main()
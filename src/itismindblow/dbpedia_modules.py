@@ -2,14 +2,20 @@
 Модуль с вспомогательными функциями для анализа DBpedia.
 """
 
-import re
-from collections import Counter, defaultdict
-from typing import Dict, List, Tuple, Any
+import hashlib
+import sys
+import zlib
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Any
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
+from dbpedia_stats import calculate_streaming_stats, make_statistics
+from dbpedia_tokenizers import DEFAULT_TOKENIZER, get_tokenizer
+from dbpedia_vocab import CategoryTermCounts
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 # Словарь категорий DBpedia
 CATEGORY_NAMES = {
@@ -30,103 +36,106 @@ CATEGORY_NAMES = {
 }
 
 
-def preprocess_text(text: str) -> List[str]:
+def preprocess_text(text: str, tokenizer: str = DEFAULT_TOKENIZER) -> List[str]:
     """
     Предобрабатывает текст: токенизация, приведение к нижнему регистру, удаление стоп-слов.
 
+    Для обработки целых колонок см. tokenize_texts и preprocess_texts.
+
     Args:
         text: Исходный текст.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
 
     Returns:
         List[str]: Список токенов после предобработки.
     """
-    if not text:
-        return []
-
-    # Приведение к нижнему регистру
-    text = text.lower()
-
-    # Удаление специальных символов и цифр, оставляем только буквы
-    text = re.sub(r"[^a-zA-Z\s]", "", text)
-
-    # Токенизация по пробелам
-    tokens = text.split()
-
-    # Базовый список стоп-слов для английского языка
-    stop_words = {
-        "the",
-        "a",
-        "an",
-        "and",
-        "or",
-        "but",
-        "in",
-        "on",
-        "at",
-        "to",
-        "for",
-        "of",
-        "with",
-        "by",
-        "is",
-        "are",
-        "was",
-        "were",
-        "be",
-        "been",
-        "being",
-        "this",
-        "that",
-        "these",
-        "those",
-        "it",
-        "its",
-        "they",
-        "them",
-        "their",
-        "he",
-        "she",
-        "his",
-        "her",
-        "him",
-        "we",
-        "our",
-        "us",
-        "you",
-        "your",
-        "i",
-        "me",
-        "my",
-        "mine",
-        "from",
-        "as",
-        "so",
-        "than",
-        "too",
-        "very",
-        "has",
-        "have",
-        "had",
-        "do",
-        "does",
-        "did",
-        "will",
-        "would",
-        "could",
-        "should",
-        "may",
-        "might",
-        "must",
-        "can",
-        "shall",
-    }
+    return get_tokenizer(tokenizer).preprocess(text)
+
+
+def tokenize_texts(
+    texts: Iterable[str], tokenizer: str = DEFAULT_TOKENIZER
+) -> Tuple["pa.Array", np.ndarray]:
+    """
+    Токенизирует колонку текстов целиком, как preprocess_text.
+
+    Очистка выполняется str.translate по каждой строке, а разбиение
+    на слова и фильтрация стоп-слов и коротких слов — векторно в Arrow.
+
+    Args:
+        texts: Тексты.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
+
+    Returns:
+        Tuple: Плоский Arrow-массив токенов всех текстов и массив смещений
+        (токены i-го текста — tokens[offsets[i]:offsets[i + 1]]).
+    """
+    return get_tokenizer(tokenizer).tokenize_texts(texts)
+
+
+def hash_tokens(tokens: "pa.Array") -> np.ndarray:
+    """
+    Хэширует токены функцией crc32.
+
+    Хэш не зависит от процесса и запуска; вычисляется только для
+    уникальных токенов массива.
+
+    Args:
+        tokens: Arrow-массив токенов (см. tokenize_texts).
+
+    Returns:
+        np.ndarray: Хэши токенов (int64 в диапазоне [0, 2 ** 32)).
+    """
+    import pyarrow.compute as pc
+
+    encoded = pc.dictionary_encode(tokens)
+    hashes = np.array(
+        [zlib.crc32(token.encode()) for token in encoded.dictionary.to_pylist()],
+        dtype=np.int64,
+    )
+    return hashes[encoded.indices.to_numpy(zero_copy_only=False)]
+
+
+def hash_tokens_64(tokens: "pa.Array") -> np.ndarray:
+    """
+    Хэширует токены 64-битным blake2b.
+
+    В отличие от hash_tokens, два разных токена совпадают по хэшу с
+    вероятностью порядка 2 ** -64, поэтому хэши годятся как id составных
+    ключей (n-грамм). Хэш вычисляется только для уникальных токенов массива.
+
+    Args:
+        tokens: Arrow-массив токенов (см. tokenize_texts).
+
+    Returns:
+        np.ndarray: Хэши токенов (uint64).
+    """
+    import pyarrow.compute as pc
+
+    encoded = pc.dictionary_encode(tokens)
+    digests = b"".join(
+        hashlib.blake2b(token.encode(), digest_size=8).digest()
+        for token in encoded.dictionary.to_pylist()
+    )
+    hashes = np.frombuffer(digests, dtype="<u8").astype(np.uint64)
+    return hashes[encoded.indices.to_numpy(zero_copy_only=False)]
+
 
-    # Фильтрация стоп-слов и коротких слов
-    filtered_tokens = [
-        token for token in tokens if token not in stop_words and len(token) > 2
-    ]
+def preprocess_texts(
+    texts: Iterable[str], tokenizer: str = DEFAULT_TOKENIZER
+) -> List[List[str]]:
+    """
+    Пакетная версия preprocess_text.
+
+    Args:
+        texts: Тексты.
+        tokenizer: Имя токенизатора (см. dbpedia_tokenizers).
 
-    return filtered_tokens
+    Returns:
+        List[List[str]]: Токены каждого текста.
+    """
+    tokens, offsets = tokenize_texts(texts, tokenizer)
+    tokens = tokens.to_pylist()
+    return [tokens[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
 
 
 def get_category_name(label: int) -> str:
@@ -142,53 +151,178 @@ def get_category_name(label: int) -> str:
     return CATEGORY_NAMES[label]
 
 
+def calculate_stats(lengths: np.ndarray, word_counts: np.ndarray) -> Dict[str, float]:
+    """
+    Вычисляет расширенную статистику по длинам текстов и количеству слов.
+
+    Args:
+        lengths: Длины текстов в символах.
+        word_counts: Количество слов после preprocess_text.
+
+    Returns:
+        Dict: Статистика длин и количества слов.
+    """
+    # Используем numpy для вычисления статистики
+    percentiles = np.percentile(lengths, [25, 50, 75, 90])
+
+    return {
+        "mean_length": float(np.mean(lengths)),
+        "median_length": float(np.median(lengths)),
+        "min_length": float(np.min(lengths)),
+        "max_length": float(np.max(lengths)),
+        "std_length": float(np.std(lengths)),
+        "q1_length": float(percentiles[0]),
+        "q3_length": float(percentiles[2]),
+        "p90_length": float(percentiles[3]),
+        "mean_word_count": float(np.mean(word_counts)),
+        "median_word_count": float(np.median(word_counts)),
+        "vocabulary_richness": float(np.mean(word_counts) / np.mean(lengths))
+        if np.mean(lengths) > 0
+        else 0.0,
+    }
+
+
+def _is_pandas(value: Any, name: str) -> bool:
+    """
+    Проверяет, что value — объект pandas указанного типа.
+
+    Pandas не импортируется: если он еще не загружен, объектов pandas
+    существовать не может.
+    """
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(value, getattr(pandas, name))
+
+
+def get_column(dataset: Any, name: str) -> Any:
+    """
+    Возвращает колонку датасета без построчной материализации.
+
+    Поддерживаются pyarrow.Table / RecordBatch, pandas.DataFrame,
+    словарь колонок {'title': [...], ...} и список примеров-словарей.
+
+    Args:
+        dataset: Датасет в одном из поддерживаемых форматов.
+        name: Имя колонки ('title', 'content' или 'label').
+
+    Returns:
+        Колонка в исходном формате (Arrow-массив, Series или список).
+    """
+    if hasattr(dataset, "schema") and hasattr(dataset, "column"):
+        return dataset.column(name)
+    if isinstance(dataset, Mapping) or _is_pandas(dataset, "DataFrame"):
+        return dataset[name]
+    return [item[name] for item in dataset]
+
+
+def column_values(column: Any) -> List[Any]:
+    """
+    Преобразует колонку в список Python-значений для токенизации.
+
+    Args:
+        column: Колонка, полученная через get_column.
+
+    Returns:
+        List: Значения колонки.
+    """
+    if hasattr(column, "to_pylist"):
+        return column.to_pylist()
+    if _is_pandas(column, "Series"):
+        return column.tolist()
+    return column
+
+
+def text_lengths(column: Any) -> np.ndarray:
+    """
+    Вычисляет длины строк колонки в символах векторизованно.
+
+    Args:
+        column: Колонка строк, полученная через get_column.
+
+    Returns:
+        np.ndarray: Длины строк (int64).
+    """
+    if hasattr(column, "to_pylist"):
+        import pyarrow.compute as pc
+
+        return pc.utf8_length(column).to_numpy().astype(np.int64)
+    if _is_pandas(column, "Series"):
+        return column.str.len().to_numpy(dtype=np.int64)
+    return np.fromiter(map(len, column), dtype=np.int64, count=len(column))
+
+
+def count_labels(labels: Any) -> np.ndarray:
+    """
+    Подсчитывает количество примеров каждой категории через bincount.
+
+    Args:
+        labels: Колонка label, полученная через get_column.
+
+    Returns:
+        np.ndarray: Количество примеров для labels 0-13 (для label вне
+        диапазона — ValueError).
+    """
+    if hasattr(labels, "to_numpy"):
+        labels = labels.to_numpy()
+    labels = np.asarray(labels, dtype=np.int64)
+    if labels.size and (labels.min() < 0 or labels.max() >= len(CATEGORY_NAMES)):
+        raise ValueError(
+            f"label вне диапазона 0-{len(CATEGORY_NAMES) - 1}: "
+            f"от {labels.min()} до {labels.max()}"
+        )
+    return np.bincount(labels, minlength=len(CATEGORY_NAMES))
+
+
 def analyze_text_statistics(
-    dataset: List[Dict[str, Any]],
+    dataset: Any, quantiles: Optional[str] = None, batch_size: int = 10_000
 ) -> Dict[str, Dict[str, float]]:
     """
     Анализирует статистику заголовков и контента.
 
+    По умолчанию длины всех строк собираются в массивы. Если задан режим
+    quantiles, датасет обрабатывается пакетами по batch_size строк
+    в потоковые накопители (см. dbpedia_stats.make_statistics), и память
+    не зависит от размера датасета: 'exact' дает те же числа, что и режим
+    по умолчанию (std_length считается точно и от np.std может отличаться
+    в последнем знаке), 'tdigest' — приближенные квантили.
+
     Args:
-        dataset: Список примеров с полями 'title' и 'content'.
+        dataset: Примеры с полями 'title' и 'content' (список словарей,
+            DataFrame или Arrow-таблица, см. get_column).
+        quantiles: None, 'exact' или 'tdigest'.
+        batch_size: Размер пакета в потоковом режиме.
 
     Returns:
         Dict: Статистика для title и content.
     """
-    # Используем pandas для эффективного анализа
-    df = pd.DataFrame(dataset)
-
-    # Анализ длины в символах
-    title_lengths = df["title"].str.len().values
-    content_lengths = df["content"].str.len().values
+    if quantiles is not None:
+        lengths = {field: make_statistics(quantiles) for field in ("title", "content")}
+        word_counts = {
+            field: make_statistics(quantiles) for field in ("title", "content")
+        }
+        for field in ("title", "content"):
+            # Колонка режется на пакеты срезами (для Arrow — без копирования),
+            # поэтому поддерживаются все форматы get_column
+            column = get_column(dataset, field)
+            for start in range(0, len(column), batch_size):
+                batch = column[start : start + batch_size]
+                lengths[field].add(text_lengths(batch))
+                _, offsets = tokenize_texts(column_values(batch))
+                word_counts[field].add(np.diff(offsets))
+        return {
+            field: calculate_streaming_stats(lengths[field], word_counts[field])
+            for field in ("title", "content")
+        }
 
-    # Анализ длины в словах с использованием preprocess_text
-    title_word_counts = np.array([len(preprocess_text(title)) for title in df["title"]])
-    content_word_counts = np.array(
-        [len(preprocess_text(content)) for content in df["content"]]
-    )
+    titles = get_column(dataset, "title")
+    contents = get_column(dataset, "content")
 
-    def calculate_stats(
-        lengths: np.ndarray, word_counts: np.ndarray
-    ) -> Dict[str, float]:
-        """Вычисляет расширенную статистику."""
-        # Используем numpy для вычисления статистики
-        percentiles = np.percentile(lengths, [25, 50, 75, 90])
+    # Анализ длины в символах
+    title_lengths = text_lengths(titles)
+    content_lengths = text_lengths(contents)
 
-        return {
-            "mean_length": float(np.mean(lengths)),
-            "median_length": float(np.median(lengths)),
-            "min_length": float(np.min(lengths)),
-            "max_length": float(np.max(lengths)),
-            "std_length": float(np.std(lengths)),
-            "q1_length": float(percentiles[0]),
-            "q3_length": float(percentiles[2]),
-            "p90_length": float(percentiles[3]),
-            "mean_word_count": float(np.mean(word_counts)),
-            "median_word_count": float(np.median(word_counts)),
-            "vocabulary_richness": float(np.mean(word_counts) / np.mean(lengths))
-            if np.mean(lengths) > 0
-            else 0.0,
-        }
+    # Анализ длины в словах: токены колонки целиком, как в preprocess_text
+    title_word_counts = np.diff(tokenize_texts(column_values(titles))[1])
+    content_word_counts = np.diff(tokenize_texts(column_values(contents))[1])
 
     return {
         "title": calculate_stats(title_lengths, title_word_counts),
@@ -196,75 +330,121 @@ def analyze_text_statistics(
     }
 
 
+def build_category_term_counts(
+    dataset: Any, batch_size: int = 10_000
+) -> CategoryTermCounts:
+    """
+    Строит матрицу частот слов «категория × словарь» по полю content.
+
+    Args:
+        dataset: Примеры с полями 'content' и 'label' (список словарей,
+            DataFrame или Arrow-таблица, см. get_column).
+        batch_size: Количество документов, токены которых копятся перед
+            добавлением в матрицу.
+
+    Returns:
+        CategoryTermCounts: Частоты слов по категориям.
+    """
+    terms = CategoryTermCounts(len(CATEGORY_NAMES))
+    contents = column_values(get_column(dataset, "content"))
+    labels = column_values(get_column(dataset, "label"))
+
+    for start in range(0, len(contents), batch_size):
+        tokens, offsets = tokenize_texts(contents[start : start + batch_size])
+        terms.add_tokenized(tokens, offsets, labels[start : start + batch_size])
+
+    return terms
+
+
 def extract_top_words_by_category(
-    dataset: List[Dict[str, Any]], top_n: int = 25
+    dataset: Any, top_n: int = 25
 ) -> Dict[str, List[Tuple[str, int]]]:
     """
     Извлекает топ-N слов для каждой категории.
 
     Args:
-        dataset: Список примеров с полями 'content' и 'label'.
+        dataset: Примеры с полями 'content' и 'label' (список словарей,
+            DataFrame или Arrow-таблица, см. get_column).
         top_n: Количество топовых слов для извлечения.
 
     Returns:
         Dict: Топ слова по категориям {category: [(word, frequency), ...]}.
     """
-    category_words = defaultdict(list)
+    terms = build_category_term_counts(dataset)
 
-    # Используем pandas для группировки по категориям
-    df = pd.DataFrame(dataset)
+    return {
+        get_category_name(label): terms.top_words(label, top_n)
+        for label in range(terms.num_labels)
+    }
 
-    for label in range(14):
-        category_name = get_category_name(label)
-        # Фильтруем данные по категории
-        category_data = df[df["label"] == label]
 
-        # Обрабатываем все тексты категории
-        all_tokens = []
-        for content in category_data["content"]:
-            tokens = preprocess_text(content)
-            all_tokens.extend(tokens)
+def extract_distinctive_words_by_category(
+    dataset: Any, top_n: int = 25, method: str = "log_odds"
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Извлекает самые характерные слова каждой категории.
 
-        category_words[category_name] = all_tokens
+    В отличие от топа по частоте, общие для всех категорий слова
+    не попадают в список (см. CategoryTermCounts.distinctive_scores).
 
-    # Подсчитываем частоты и извлекаем топ-N с использованием Counter
-    top_words_by_category = {}
-    for category, words in category_words.items():
-        word_freq = Counter(words)
-        top_words_by_category[category] = word_freq.most_common(top_n)
+    Args:
+        dataset: Примеры с полями 'content' и 'label' (список словарей,
+            DataFrame или Arrow-таблица, см. get_column).
+        top_n: Количество слов для каждой категории.
+        method: 'log_odds' или 'tfidf'.
 
-    return top_words_by_category
+    Returns:
+        Dict: {category: [(word, score), ...]}.
+    """
+    terms = build_category_term_counts(dataset)
 
+    return {
+        get_category_name(label): words
+        for label, words in enumerate(terms.distinctive_words(top_n, method))
+    }
 
-def create_visualization(category_distribution: Dict[str, int]) -> None:
+
+def create_visualization(
+    category_distribution: Dict[str, int],
+    path: str = "visualization.png",
+    figsize: Tuple[float, float] = (14, 10),
+    dpi: int = 300,
+) -> None:
     """
     Создает horizontal bar chart распределения по категориям.
 
+    Формат файла (PNG, SVG, PDF, ...) определяется расширением пути.
+    Используется неинтерактивный backend Agg, поэтому функцию можно
+    вызывать в фоновом процессе без дисплея.
+
     Args:
         category_distribution: Распределение по категориям.
+        path: Путь к файлу графика.
+        figsize: Размер графика в дюймах.
+        dpi: Разрешение растровых форматов.
     """
-    # Используем pandas и numpy для сортировки данных
-    df = pd.DataFrame(
-        {
-            "categories": list(category_distribution.keys()),
-            "counts": list(category_distribution.values()),
-        }
-    )
+    # Библиотека построения графиков загружается только здесь
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
 
     # Сортируем по количеству
-    df_sorted = df.sort_values("counts")
+    items = sorted(category_distribution.items(), key=lambda item: item[1])
+    categories = [category for category, _ in items]
+    counts = [count for _, count in items]
 
     # Создаем график с улучшенным дизайном
-    plt.figure(figsize=(14, 10))
+    plt.figure(figsize=figsize)
     bars = plt.barh(
-        df_sorted["categories"],
-        df_sorted["counts"],
-        color=plt.cm.viridis(np.linspace(0, 1, len(df_sorted))),
+        categories,
+        counts,
+        color=plt.cm.viridis(np.linspace(0, 1, len(items))),
     )
 
     # Добавляем подписи значений с улучшенным форматированием
-    max_count = df_sorted["counts"].max()
-    for bar, count in zip(bars, df_sorted["counts"]):
+    max_count = max(counts, default=0)
+    for bar, count in zip(bars, counts):
         width = bar.get_width()
         plt.text(
             width + max_count * 0.01,
@@ -284,8 +464,8 @@ def create_visualization(category_distribution: Dict[str, int]) -> None:
 
     # Сохраняем график с высоким качеством
     plt.savefig(
-        "visualization.png",
-        dpi=300,
+        path,
+        dpi=dpi,
         bbox_inches="tight",
         facecolor="white",
         edgecolor="none",
@@ -0,0 +1,345 @@
+"""
+Частые n-граммы (биграммы, триграммы) по категориям DBpedia.
+
+N-грамма из подряд идущих токенов (как в preprocess_text) хэшируется
+в 64-битный id, поэтому счетчики — это массивы чисел, а не кортежи
+строк. Счетчики пакетов копятся в буфере и периодически сводятся в
+таблицу; если таблица превышает заданный лимит, из нее удаляются
+n-граммы с наименьшими счетчиками (периодическая очистка по порогу),
+так что память ограничена независимо от размера корпуса. Удаленная
+n-грамма теряет не больше порога очистки, и сумма порогов — граница
+ошибки любого счетчика.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from dbpedia_modules import (
+    CATEGORY_NAMES,
+    column_values,
+    get_category_name,
+    get_column,
+    hash_tokens_64,
+    tokenize_texts,
+)
+
+# Примерный объем памяти на одну n-грамму таблицы (счетчик, id и текст)
+ENTRY_BYTES = 64
+# Лимит памяти на все n-граммы по умолчанию, МБ
+DEFAULT_MEMORY_MB = 256
+# Названия разделов результатов по размеру n-граммы
+NGRAM_NAMES = {2: "bigrams", 3: "trigrams"}
+
+# Константы хэширования (FNV-1 и финализатор splitmix64)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def ngram_name(n: int) -> str:
+    """Название n-грамм размера n ('bigrams', 'trigrams', '4grams', ...)."""
+    return NGRAM_NAMES.get(n, f"{n}grams")
+
+
+def ngram_ids(
+    hashes: np.ndarray, offsets: np.ndarray, n: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Вычисляет 64-битные id n-грамм, не пересекающих границы текстов.
+
+    Args:
+        hashes: 64-битные хэши плоского массива токенов (см. hash_tokens_64);
+            вычисляются один раз на пакет для всех размеров n-грамм.
+        offsets: Смещения текстов.
+        n: Размер n-граммы.
+
+    Returns:
+        Tuple: Id n-грамм (uint64) и позиции их первых токенов в массиве.
+    """
+    counts = np.diff(offsets)
+    document = np.repeat(np.arange(counts.size), counts)
+    starts = np.flatnonzero(np.arange(hashes.size) + n <= offsets[document + 1])
+
+    ids = np.zeros(starts.size, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for shift in range(n):
+            ids = (ids * _FNV_PRIME) ^ hashes[starts + shift]
+        # Перемешивание, чтобы близкие n-граммы давали далекие id
+        ids ^= ids >> np.uint64(30)
+        ids *= _MIX_1
+        ids ^= ids >> np.uint64(27)
+        ids *= _MIX_2
+        ids ^= ids >> np.uint64(31)
+    return ids, starts
+
+
+class NGramCounter:
+    """Счетчики n-грамм по категориям с ограничением количества n-грамм."""
+
+    def __init__(self, n: int, max_entries: int) -> None:
+        self.n = n
+        self.max_entries = max_entries
+        # Таблица: пары (категория, id), упорядоченные по категории и id
+        self.labels = np.zeros(0, dtype=np.int64)
+        self.ids = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        # Тексты n-грамм таблицы, упорядоченные по id
+        self.text_ids = np.zeros(0, dtype=np.uint64)
+        self.texts = pa.array([], type=pa.large_string())
+        # Сумма порогов очисток — граница недосчета любой n-граммы
+        self.max_error = 0
+        self._pending: List[Tuple[np.ndarray, ...]] = []
+        self._pending_size = 0
+
+    def add_tokenized(
+        self,
+        tokens: pa.Array,
+        offsets: np.ndarray,
+        labels: Iterable[int],
+        hashes: Optional[np.ndarray] = None,
+    ) -> "NGramCounter":
+        """
+        Добавляет n-граммы токенизированного пакета.
+
+        Args:
+            tokens: Плоский Arrow-массив токенов (см. tokenize_texts).
+            offsets: Смещения текстов.
+            labels: Категории текстов.
+            hashes: Хэши токенов (hash_tokens_64); передаются, чтобы счетчики
+                разных размеров не хэшировали один пакет повторно.
+
+        Returns:
+            NGramCounter: Этот же счетчик.
+        """
+        if hashes is None:
+            hashes = hash_tokens_64(tokens)
+        ids, starts = ngram_ids(hashes, offsets, self.n)
+        if ids.size == 0:
+            return self
+        labels = np.asarray(labels, dtype=np.int64)
+        document_labels = np.repeat(labels, np.diff(offsets))[starts]
+        batch_labels, batch_ids, batch_counts = _reduce(
+            document_labels, ids, np.ones(ids.size, dtype=np.int64)
+        )
+
+        # Текст строится векторно по первому вхождению каждой n-граммы пакета
+        text_ids, first = np.unique(ids, return_index=True)
+        positions = starts[first]
+        words = [tokens.take(pa.array(positions + shift)) for shift in range(self.n)]
+        texts = pc.binary_join_element_wise(*words, " ").cast(pa.large_string())
+
+        self._pending.append((batch_labels, batch_ids, batch_counts, text_ids, texts))
+        self._pending_size += batch_ids.size
+        if self.counts.size + self._pending_size > self.max_entries:
+            self._consolidate()
+        return self
+
+    def merge(self, other: "NGramCounter") -> "NGramCounter":
+        """
+        Добавляет счетчики другого счетчика того же размера n-грамм.
+
+        Args:
+            other: Другой счетчик.
+
+        Returns:
+            NGramCounter: Этот же счетчик.
+        """
+        if other.n != self.n:
+            raise ValueError("Нельзя объединить счетчики n-грамм разного размера")
+        other._consolidate()
+        self._pending.append(
+            (other.labels, other.ids, other.counts, other.text_ids, other.texts)
+        )
+        self._pending_size += other.counts.size
+        self.max_error += other.max_error
+        if self.counts.size + self._pending_size > self.max_entries:
+            self._consolidate()
+        return self
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Состояние счетчика в виде массивов (для сохранения в .npz)."""
+        self._consolidate()
+        return {
+            "state": np.array([self.n, self.max_entries, self.max_error], np.int64),
+            "labels": self.labels,
+            "ids": self.ids,
+            "counts": self.counts,
+            "text_ids": self.text_ids,
+            # Токены состоят только из букв, поэтому перевод строки — разделитель
+            "texts": np.frombuffer(
+                "\n".join(self.texts.to_pylist()).encode(), np.uint8
+            ),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "NGramCounter":
+        """Восстанавливает счетчик из результата to_arrays."""
+        n, max_entries, max_error = (int(value) for value in arrays["state"])
+        counter = cls(n, max_entries)
+        counter.max_error = max_error
+        counter.labels = arrays["labels"].astype(np.int64)
+        counter.ids = arrays["ids"].astype(np.uint64)
+        counter.counts = arrays["counts"].astype(np.int64)
+        counter.text_ids = arrays["text_ids"].astype(np.uint64)
+        text = arrays["texts"].tobytes().decode()
+        counter.texts = pa.array(
+            text.split("\n") if text else [], type=pa.large_string()
+        )
+        return counter
+
+    def _consolidate(self) -> None:
+        """Сводит буфер пакетов в таблицу и очищает ее при превышении лимита."""
+        if not self._pending:
+            return
+        parts = [(self.labels, self.ids, self.counts, self.text_ids, self.texts)]
+        parts += self._pending
+        self._pending, self._pending_size = [], 0
+        self.labels, self.ids, self.counts = _reduce(
+            *(np.concatenate([part[i] for part in parts]) for i in range(3))
+        )
+
+        if self.counts.size > self.max_entries:
+            # Порог выбирается так, чтобы осталось не больше половины лимита:
+            # тогда очистки происходят не чаще, чем раз в max_entries / 2 n-грамм
+            rank = self.counts.size - self.max_entries // 2 - 1
+            threshold = int(np.partition(self.counts, rank)[rank])
+            kept = self.counts > threshold
+            self.labels, self.ids, self.counts = (
+                self.labels[kept],
+                self.ids[kept],
+                self.counts[kept],
+            )
+            self.max_error += threshold
+
+        text_ids = np.concatenate([part[3] for part in parts])
+        texts = pa.concat_arrays([part[4] for part in parts])
+        text_ids, first = np.unique(text_ids, return_index=True)
+        # Остаются только тексты n-грамм, оставшихся в таблице
+        used = np.isin(text_ids, self.ids)
+        self.text_ids = text_ids[used]
+        self.texts = texts.take(pa.array(first[used]))
+
+    def top_ngrams(self, label: int, top_n: int = 25) -> List[Tuple[str, int]]:
+        """
+        Возвращает топ-N n-грамм категории.
+
+        Порядок — по убыванию частоты, при равной частоте — по тексту.
+
+        Args:
+            label: Категория.
+            top_n: Количество n-грамм.
+
+        Returns:
+            List: [(ngram, frequency), ...].
+        """
+        self._consolidate()
+        if top_n <= 0:
+            return []
+        rows = np.flatnonzero(self.labels == label)
+        counts = self.counts[rows]
+        if top_n < counts.size:
+            threshold = np.partition(counts, counts.size - top_n)[counts.size - top_n]
+            rows = rows[counts >= threshold]
+        texts = self.texts.take(
+            pa.array(np.searchsorted(self.text_ids, self.ids[rows]))
+        ).to_pylist()
+        ranked = sorted(zip(texts, self.counts[rows].tolist()), key=_rank)
+        return ranked[:top_n]
+
+
+def _rank(item: Tuple[str, int]) -> Tuple[int, str]:
+    """Ключ сортировки: по убыванию частоты, затем по тексту."""
+    return -item[1], item[0]
+
+
+def _reduce(
+    labels: np.ndarray, ids: np.ndarray, counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Суммирует счетчики одинаковых пар (категория, id)."""
+    if ids.size == 0:
+        return labels, ids, counts
+    order = np.lexsort((ids, labels))
+    labels, ids = labels[order], ids[order]
+    starts = np.flatnonzero(
+        np.r_[True, (labels[1:] != labels[:-1]) | (ids[1:] != ids[:-1])]
+    )
+    return labels[starts], ids[starts], np.add.reduceat(counts[order], starts)
+
+
+def ngram_capacity(memory_mb: float, num_sizes: int) -> int:
+    """
+    Переводит лимит памяти в лимит n-грамм таблицы одного размера.
+
+    Args:
+        memory_mb: Примерный лимит памяти всех таблиц, МБ.
+        num_sizes: Количество размеров n-грамм, между которыми делится лимит.
+
+    Returns:
+        int: Наибольшее количество n-грамм в таблице.
+    """
+    return max(int(memory_mb * 2**20 / ENTRY_BYTES / max(num_sizes, 1)), 2)
+
+
+def count_ngrams_by_category(
+    batches: Iterable[Any],
+    sizes: Sequence[int] = (2, 3),
+    memory_mb: float = DEFAULT_MEMORY_MB,
+) -> Dict[int, NGramCounter]:
+    """
+    Считает n-граммы поля content по пакетам записей за один проход.
+
+    Каждый пакет токенизируется и хэшируется один раз для всех размеров
+    n-грамм; лимит памяти делится между размерами поровну.
+
+    Args:
+        batches: Пакеты с колонками 'content' и 'label' (см. get_column).
+        sizes: Размеры n-грамм.
+        memory_mb: Примерный лимит памяти таблиц n-грамм, МБ.
+
+    Returns:
+        Dict: Счетчики {n: NGramCounter}.
+    """
+    max_entries = ngram_capacity(memory_mb, len(sizes))
+    counters = {n: NGramCounter(n, max_entries) for n in sizes}
+    for batch in batches:
+        tokens, offsets = tokenize_texts(column_values(get_column(batch, "content")))
+        labels = column_values(get_column(batch, "label"))
+        hashes = hash_tokens_64(tokens)
+        for counter in counters.values():
+            counter.add_tokenized(tokens, offsets, labels, hashes)
+    return counters
+
+
+def extract_top_ngrams_by_category(
+    dataset: Any,
+    n: int = 2,
+    top_n: int = 25,
+    memory_mb: float = DEFAULT_MEMORY_MB,
+    batch_size: int = 10_000,
+) -> Dict[str, List[Tuple[str, int]]]:
+    """
+    Извлекает топ-N n-грамм для каждой категории.
+
+    Args:
+        dataset: Примеры с полями 'content' и 'label' (список словарей,
+            DataFrame или Arrow-таблица, см. get_column).
+        n: Размер n-граммы.
+        top_n: Количество n-грамм.
+        memory_mb: Примерный лимит памяти таблицы n-грамм, МБ.
+        batch_size: Размер пакета.
+
+    Returns:
+        Dict: Топ n-граммы по категориям {category: [(ngram, frequency), ...]}.
+    """
+    batches = (
+        dataset[start : start + batch_size]
+        for start in range(0, len(dataset), batch_size)
+    )
+    counter = count_ngrams_by_category(batches, (n,), memory_mb)[n]
+    return {
+        get_category_name(label): counter.top_ngrams(label, top_n)
+        for label in range(len(CATEGORY_NAMES))
+    }
@@ -0,0 +1,122 @@
+"""
+Профилирование этапов анализа DBpedia.
+
+Для каждого этапа записываются время по часам, процессорное время,
+пиковый RSS и скорость обработки строк. Итог встраивается в раздел
+profile результатов и может быть сохранен как Chrome trace
+(открывается в chrome://tracing или Perfetto).
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Возвращает пиковый RSS процесса и его завершившихся дочерних процессов.
+
+    Returns:
+        float: Пиковый RSS в мегабайтах (None, если недоступен).
+    """
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # На macOS ru_maxrss в байтах, на Linux — в килобайтах
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / scale, 1)
+
+
+def cpu_seconds() -> float:
+    """Процессорное время процесса и его завершившихся дочерних процессов."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+class StageProfiler:
+    """Профилировщик последовательных этапов."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Измеряет этап.
+
+        Количество строк можно задать заранее или записать в record["rows"]
+        внутри блока, когда оно станет известно.
+
+        Args:
+            name: Название этапа.
+            rows: Количество обработанных строк.
+
+        Yields:
+            Dict: Запись этапа.
+        """
+        record: Dict[str, Any] = {"name": name, "rows": rows}
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start
+            record.update(
+                start_s=round(wall_start - self.started, 6),
+                wall_s=round(wall, 6),
+                cpu_s=round(cpu_seconds() - cpu_start, 6),
+                peak_rss_mb=peak_rss_mb(),
+            )
+            if record["rows"] is not None:
+                record["rows_per_s"] = round(record["rows"] / wall, 1) if wall else None
+            self.stages.append(record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Возвращает раздел profile для результатов.
+
+        Returns:
+            Dict: Этапы и общее время.
+        """
+        return {
+            "stages": self.stages,
+            "total_wall_s": round(time.perf_counter() - self.started, 6),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def write_chrome_trace(self, path: str) -> None:
+        """
+        Сохраняет этапы в формате Chrome trace (Trace Event Format).
+
+        Args:
+            path: Путь к файлу.
+        """
+        events = [
+            {
+                "name": stage["name"],
+                "ph": "X",
+                "ts": round(stage["start_s"] * 1e6),
+                "dur": round(stage["wall_s"] * 1e6),
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {
+                    key: value
+                    for key, value in stage.items()
+                    if key not in ("name", "start_s", "wall_s")
+                },
+            }
+            for stage in self.stages
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,250 @@
+"""
+Компактный двоичный формат результатов анализа DBpedia.
+
+Результаты (словарь, который записывается в dbpedia_results.json)
+сохраняются в .npz-архив. Длинные числовые списки (гистограммы) и
+рейтинги вида [[слово, число], ...] (топ слов, n-грамм) хранятся
+колонками: числа — в общих массивах int64 и float64, строки — в одном
+UTF-8 буфере через разделитель. Остальная структура записывается компактным
+JSON, в котором вынесенные списки заменены ссылками на эти массивы.
+
+read_results возвращает тот же словарь, что json.load для JSON-файла
+(кортежи становятся списками), а JSON строится из архива по требованию.
+
+Запуск:
+    python dbpedia_results.py dbpedia_results.npz --output dbpedia_results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Версия формата архива; при изменении формата старые архивы не читаются
+RESULTS_FORMAT_VERSION = 1
+# Путь к архиву результатов по умолчанию
+RESULTS_NPZ_PATH = "dbpedia_results.npz"
+# Путь к JSON-файлу результатов по умолчанию
+RESULTS_JSON_PATH = "dbpedia_results.json"
+# Ключ ссылки на вынесенный в массивы список
+ARRAY_REF = "__npz__"
+# Более короткие списки остаются в JSON-структуре
+MIN_ARRAY_LENGTH = 8
+# Разделитель строк в общем буфере; строки с ним остаются в JSON-структуре
+STRING_SEPARATOR = "\x00"
+# Типы чисел, которые выносятся в массивы, и их пулы
+_POOL_DTYPES = {int: ("ints", np.int64), float: ("floats", np.float64)}
+
+
+class _Encoder:
+    """Раскладывает результаты на JSON-структуру и колонки."""
+
+    def __init__(self) -> None:
+        self.pools: Dict[str, List[np.ndarray]] = {"ints": [], "floats": []}
+        self.sizes = {"ints": 0, "floats": 0}
+        self.strings: List[str] = []
+
+    def _store(self, numbers: Sequence[Any]) -> Optional[Tuple[str, int]]:
+        """
+        Кладет числа одного типа в пул.
+
+        Returns:
+            Optional[Tuple[str, int]]: Пул и начало чисел в нем или None,
+            если числа разных типов или не помещаются в int64.
+        """
+        types = set(map(type, numbers))
+        if len(types) != 1 or not types <= _POOL_DTYPES.keys():
+            return None
+        kind, dtype = _POOL_DTYPES[types.pop()]
+        try:
+            array = np.array(numbers, dtype=dtype)
+        except OverflowError:
+            return None
+        start = self.sizes[kind]
+        self.pools[kind].append(array)
+        self.sizes[kind] += array.size
+        return kind, start
+
+    def _store_pairs(self, pairs: Sequence[Any]) -> Optional[List[Any]]:
+        """Кладет рейтинг [[строка, число], ...] в колонки или возвращает None."""
+        if not set(map(type, pairs)) <= {list, tuple} or set(map(len, pairs)) != {2}:
+            return None
+        strings, numbers = zip(*pairs)
+        if set(map(type, strings)) != {str}:
+            return None
+        if STRING_SEPARATOR in "".join(strings):
+            return None
+        stored = self._store(numbers)
+        if stored is None:
+            return None
+        text_start = len(self.strings)
+        self.strings.extend(strings)
+        kind, start = stored
+        return ["pairs", kind, text_start, start, len(pairs)]
+
+    def encode(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if ARRAY_REF in value:
+                raise ValueError(f"Ключ {ARRAY_REF!r} зарезервирован форматом")
+            return {key: self.encode(item) for key, item in value.items()}
+        if not isinstance(value, (list, tuple)):
+            return value
+        if len(value) >= MIN_ARRAY_LENGTH:
+            stored = self._store(value)
+            if stored is not None:
+                kind, start = stored
+                return {ARRAY_REF: [kind, start, len(value)]}
+            ref = self._store_pairs(value)
+            if ref is not None:
+                return {ARRAY_REF: ref}
+        return [self.encode(item) for item in value]
+
+    def arrays(self, skeleton: Any) -> Dict[str, np.ndarray]:
+        text = STRING_SEPARATOR.join(self.strings)
+        arrays = {
+            "skeleton": np.frombuffer(json.dumps(skeleton).encode(), np.uint8),
+            "text": np.frombuffer(text.encode(), np.uint8),
+        }
+        for kind, dtype in _POOL_DTYPES.values():
+            pool = self.pools[kind]
+            arrays[kind] = np.concatenate(pool) if pool else np.zeros(0, dtype)
+        return arrays
+
+
+class _Decoder:
+    """Собирает результаты из JSON-структуры и колонок."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.pools = {
+            "ints": arrays["ints"].tolist(),
+            "floats": arrays["floats"].tolist(),
+        }
+        self.strings = arrays["text"].tobytes().decode().split(STRING_SEPARATOR)
+
+    def decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        ref = value.get(ARRAY_REF)
+        if ref is None:
+            return {key: self.decode(item) for key, item in value.items()}
+        if ref[0] == "pairs":
+            _, kind, text_start, start, length = ref
+            strings = self.strings[text_start : text_start + length]
+            numbers = self.pools[kind][start : start + length]
+            return list(map(list, zip(strings, numbers)))
+        kind, start, length = ref
+        return self.pools[kind][start : start + length]
+
+
+def write_results(
+    results: Dict[str, Any], path: str = RESULTS_NPZ_PATH, compress: bool = False
+) -> None:
+    """
+    Сохраняет результаты анализа в .npz-архив.
+
+    Архив пишется во временный файл и переименовывается, чтобы прерванный
+    запуск не оставил недописанный архив. По умолчанию архив не сжимается:
+    колонки и так в несколько раз меньше JSON, а сжатие замедляет запись.
+
+    Args:
+        results: Результаты анализа (значения, допустимые в JSON).
+        path: Путь к архиву.
+        compress: Сжать архив (zip deflate).
+    """
+    encoder = _Encoder()
+    skeleton = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "results": encoder.encode(results),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        save = np.savez_compressed if compress else np.savez
+        save(f, **encoder.arrays(skeleton))
+    os.replace(tmp_path, path)
+
+
+def read_results(path: str = RESULTS_NPZ_PATH) -> Dict[str, Any]:
+    """
+    Загружает результаты, сохраненные write_results.
+
+    Args:
+        path: Путь к архиву.
+
+    Returns:
+        Dict[str, Any]: Результаты в том же виде, что после json.load.
+    """
+    with np.load(path) as data:
+        arrays = dict(data)
+    skeleton = json.loads(arrays["skeleton"].tobytes().decode())
+    if skeleton["format_version"] != RESULTS_FORMAT_VERSION:
+        version = skeleton["format_version"]
+        raise ValueError(f"Неизвестная версия архива результатов: {version}")
+    # Сборка сотен тысяч мелких списков без сборщика мусора в разы быстрее:
+    # циклов в результатах нет, и проходы сборщика ничего не освобождают
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _Decoder(arrays).decode(skeleton["results"])
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def write_results_json(results: Dict[str, Any], path: str = RESULTS_JSON_PATH) -> None:
+    """
+    Записывает результаты в JSON-файл в привычном формате (indent=2).
+
+    Args:
+        results: Результаты анализа.
+        path: Путь к JSON-файлу.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки.
+
+    Args:
+        argv: Аргументы (по умолчанию sys.argv).
+
+    Returns:
+        argparse.Namespace: Параметры запуска.
+    """
+    parser = argparse.ArgumentParser(
+        description="Преобразование архива результатов DBpedia в JSON"
+    )
+    parser.add_argument(
+        "archive",
+        nargs="?",
+        default=RESULTS_NPZ_PATH,
+        help=f"архив результатов (по умолчанию {RESULTS_NPZ_PATH})",
+    )
+    parser.add_argument(
+        "--output",
+        default=RESULTS_JSON_PATH,
+        help=f"куда записать JSON (по умолчанию {RESULTS_JSON_PATH})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Строит JSON-файл результатов из архива.
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv).
+    """
+    args = parse_args(argv)
+    write_results_json(read_results(args.archive), args.output)
+    print(f"Результаты из {args.archive} записаны в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Локальный колоночный снимок датасета DBpedia.
+
+При первом обращении train-часть dbpedia_14 сохраняется в несжатый
+Feather-файл (формат Arrow IPC). Последующие запуски отображают его
+в память без копирования и без инициализации datasets, читают только
+нужные колонки и при необходимости берут стратифицированную по label
+выборку для быстрых итераций.
+"""
+
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Путь к снимку по умолчанию
+SNAPSHOT_PATH = "dbpedia_train.arrow"
+# Колонки датасета, которые сохраняются в снимок
+SNAPSHOT_COLUMNS = ("title", "content", "label")
+
+
+def write_snapshot(table: pa.Table, path: str = SNAPSHOT_PATH) -> None:
+    """
+    Сохраняет таблицу в несжатый Feather-файл.
+
+    Файл пишется во временный и переименовывается, чтобы прерванный
+    запуск не оставил недописанный снимок.
+
+    Args:
+        table: Таблица.
+        path: Путь к снимку.
+    """
+    tmp_path = f"{path}.tmp"
+    # Без сжатия файл можно отображать в память без копирования
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def stratified_sample(
+    table: pa.Table, fraction: float, seed: int = 0, label_column: str = "label"
+) -> pa.Table:
+    """
+    Берет одинаковую долю строк каждой категории.
+
+    Из каждой категории выбирается round(count * fraction) строк, но не
+    меньше одной; исходный порядок строк сохраняется.
+
+    Args:
+        table: Таблица.
+        fraction: Доля строк (0-1].
+        seed: Seed выборки.
+        label_column: Колонка категорий.
+
+    Returns:
+        pa.Table: Выборка.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Доля выборки должна быть в (0, 1]: {fraction}")
+    labels = table.column(label_column).to_numpy()
+    rng = np.random.default_rng(seed)
+    indices = []
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        size = max(1, round(rows.size * fraction))
+        indices.append(rng.choice(rows, size, replace=False))
+    return table.take(np.sort(np.concatenate(indices)) if indices else [])
+
+
+def load_snapshot(
+    path: str = SNAPSHOT_PATH,
+    columns: Optional[Sequence[str]] = None,
+    sample_fraction: Optional[float] = None,
+    seed: int = 0,
+) -> pa.Table:
+    """
+    Загружает train-часть DBpedia из локального снимка.
+
+    Если снимка нет, он создается из load_dataset("dbpedia_14").
+
+    Args:
+        path: Путь к снимку.
+        columns: Читаемые колонки (по умолчанию все).
+        sample_fraction: Доля строк каждой категории (None — все строки).
+        seed: Seed выборки.
+
+    Returns:
+        pa.Table: Таблица, отображенная в память (или выборка из нее).
+    """
+    if not os.path.exists(path):
+        from datasets import load_dataset
+
+        dataset = load_dataset("dbpedia_14", split="train")
+        write_snapshot(dataset.data.table.select(list(SNAPSHOT_COLUMNS)), path)
+
+    columns = list(columns) if columns is not None else None
+    read_columns = columns
+    # Для выборки нужна колонка label, даже если она не запрошена
+    if sample_fraction is not None and columns is not None and "label" not in columns:
+        read_columns = columns + ["label"]
+
+    table = feather.read_table(path, columns=read_columns, memory_map=True)
+    if sample_fraction is not None:
+        table = stratified_sample(table, sample_fraction, seed)
+        if read_columns is not columns:
+            table = table.select(columns)
+    return table
@@ -0,0 +1,422 @@
+"""
+Токенизаторы текстов DBpedia.
+
+Токенизатор приводит текст к нижнему регистру, удаляет все символы,
+кроме букв и пробельных, делит текст на слова и отбрасывает стоп-слова
+и слова короче MIN_TOKEN_LENGTH. Токенизаторы различаются алфавитом
+и списком стоп-слов:
+
+- ascii (по умолчанию) — только латинские буквы, английские стоп-слова;
+- unicode-<язык> — буквы любых алфавитов (категории Unicode L* и M*,
+  то есть вместе с диакритическими знаками) и стоп-слова языка.
+
+Очистка идет по таблице классов символов: для одного текста — вызовом
+str.translate, для колонки не-ASCII текстов — векторно в numpy по кодам
+символов. Символы ASCII, латиницы с диакритикой, греческого алфавита
+и кириллицы классифицируются при создании токенизатора, остальные — при
+первой встрече. Токенизатор создается один раз на процесс (get_tokenizer),
+поэтому таблица и стоп-слова не пересобираются для каждого пакета.
+"""
+
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Символы, которые удаляет токенизатор: все, кроме латинских букв и пробельных
+NON_LETTER_PATTERN = r"[^a-zA-Z\s]"
+# Символы, которые удаляет Unicode-токенизатор: все, кроме букв и пробельных
+UNICODE_NON_LETTER_PATTERN = r"[^\p{L}\p{M}\s]"
+# Минимальная длина токена
+MIN_TOKEN_LENGTH = 3
+# Токенизатор по умолчанию
+DEFAULT_TOKENIZER = "ascii"
+# Символы до этого кода Unicode-токенизатор классифицирует заранее
+# (ASCII, латиница с диакритикой, греческий алфавит, кириллица)
+UNICODE_PRELOAD = 0x0530
+# Разделитель строк при векторной очистке колонки
+ROW_SEPARATOR = "\x00"
+# Сколько не-ASCII строк очищается векторно за раз (ограничивает память)
+CLEAN_CHUNK_ROWS = 4096
+
+# Классы символов в таблице токенизатора
+_DROP, _LETTER, _SPACE, _UNKNOWN = 0, 1, 2, 255
+
+# Базовый список стоп-слов для английского языка
+STOP_WORDS = frozenset(
+    {
+        "the",
+        "a",
+        "an",
+        "and",
+        "or",
+        "but",
+        "in",
+        "on",
+        "at",
+        "to",
+        "for",
+        "of",
+        "with",
+        "by",
+        "is",
+        "are",
+        "was",
+        "were",
+        "be",
+        "been",
+        "being",
+        "this",
+        "that",
+        "these",
+        "those",
+        "it",
+        "its",
+        "they",
+        "them",
+        "their",
+        "he",
+        "she",
+        "his",
+        "her",
+        "him",
+        "we",
+        "our",
+        "us",
+        "you",
+        "your",
+        "i",
+        "me",
+        "my",
+        "mine",
+        "from",
+        "as",
+        "so",
+        "than",
+        "too",
+        "very",
+        "has",
+        "have",
+        "had",
+        "do",
+        "does",
+        "did",
+        "will",
+        "would",
+        "could",
+        "should",
+        "may",
+        "might",
+        "must",
+        "can",
+        "shall",
+    }
+)
+
+
+# Стоп-слова по языкам (коды ISO 639-1)
+STOP_WORDS_BY_LANGUAGE = {
+    "en": STOP_WORDS,
+    "ru": frozenset(
+        """
+        и в во не что он на я с со как а то все она так его но да ты к у же
+        вы за бы по только ее мне было вот от меня еще нет о из ему теперь
+        когда даже ну вдруг ли если уже или ни быть был него до вас нибудь
+        опять уж вам ведь там потом себя ничего ей может они тут где есть
+        надо ней для мы тебя их чем была сам чтоб без будто чего раз тоже
+        себе под будет ж тогда кто этот того потому этого какой совсем ним
+        здесь этом один почти мой тем чтобы нее сейчас были куда зачем всех
+        никогда можно при наконец два об другой хоть после над больше тот
+        через эти нас про всего них какая много разве три эту моя впрочем
+        хорошо свою этой перед иногда лучше чуть том нельзя такой им более
+        всегда конечно всю между также является году года это
+        """.split()
+    ),
+    "de": frozenset(
+        """
+        der die das den dem des ein eine einer eines einem einen und oder
+        aber in im an am auf aus bei mit nach von vom zu zum zur für über
+        unter vor hinter neben zwischen durch gegen ohne um ist sind war
+        waren wird werden wurde wurden hat haben hatte hatten sein seine
+        ihr ihre sich auch als wie noch nur nicht kein keine dass wenn
+        dann doch schon sehr mehr diese dieser dieses diesem diesen jene
+        welche welcher er sie es wir ihm ihn uns man bis seit sowie
+        """.split()
+    ),
+    "fr": frozenset(
+        """
+        le la les un une des du de au aux et ou mais donc car ni que qui
+        quoi dont est sont était étaient sera seront été être avoir avait
+        ont dans sur sous pour par avec sans entre vers chez ce cet cette
+        ces son sa ses leur leurs il elle ils elles nous vous lui eux se
+        ne pas plus comme aussi très tout tous toute toutes même
+        """.split()
+    ),
+    "es": frozenset(
+        """
+        el la los las un una unos unas de del al y o pero que quien cual
+        cuyo en con por para sin sobre entre desde hasta hacia es son era
+        eran fue fueron ser sido está están estaba tiene tienen había ha
+        han su sus se lo le les nos este esta estos estas ese esa esos
+        esas como más muy también ya no ni otro otra otros otras todo
+        todos toda todas
+        """.split()
+    ),
+}
+
+
+class _CharacterTable(dict):
+    """
+    Таблица str.translate: буквы остаются, пробельные символы заменяются
+    пробелом, остальные символы удаляются.
+
+    Символ, которого еще нет в таблице, классифицируется при первой
+    встрече и запоминается. Те же классы хранятся в массиве numpy
+    (индекс — код символа) для векторной очистки колонок.
+    """
+
+    def __init__(self, is_letter: Callable[[str], bool], preload: int) -> None:
+        super().__init__()
+        self.is_letter = is_letter
+        self.classes = np.full(sys.maxunicode + 1, _UNKNOWN, dtype=np.uint8)
+        for code in range(preload):
+            self.classify(code)
+
+    def classify(self, code: int) -> int:
+        """Классифицирует символ и запоминает класс в обеих таблицах."""
+        char = chr(code)
+        if char.isspace():
+            self[code], self.classes[code] = ord(" "), _SPACE
+        elif self.is_letter(char):
+            self[code], self.classes[code] = code, _LETTER
+        else:
+            self[code], self.classes[code] = None, _DROP
+        return self.classes[code]
+
+    def __missing__(self, code: int) -> Any:
+        self.classify(code)
+        return self[code]
+
+    def lookup(self, codes: np.ndarray) -> np.ndarray:
+        """Возвращает классы символов с кодами codes."""
+        classes = self.classes[codes]
+        unknown = classes == _UNKNOWN
+        if unknown.any():
+            for code in np.unique(codes[unknown]).tolist():
+                self.classify(code)
+            classes = self.classes[codes]
+        return classes
+
+
+def _is_ascii_letter(char: str) -> bool:
+    """Проверяет, что символ — латинская буква."""
+    return char.isascii() and char.isalpha()
+
+
+def _is_unicode_letter(char: str) -> bool:
+    """Проверяет, что символ — буква или диакритический знак любого алфавита."""
+    return unicodedata.category(char)[0] in "LM"
+
+
+class Tokenizer:
+    """
+    Токенизатор: очистка текста по таблице классов символов, деление на
+    слова и фильтрация стоп-слов и коротких слов.
+
+    Создавайте токенизаторы через get_tokenizer: он возвращает один
+    экземпляр на процесс.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pattern: str,
+        is_letter: Callable[[str], bool],
+        stop_words: Iterable[str],
+        preload: int = 128,
+        min_length: int = MIN_TOKEN_LENGTH,
+    ) -> None:
+        self.name = name
+        self.pattern = pattern
+        self.stop_words = frozenset(stop_words)
+        self.min_length = min_length
+        self._table = _CharacterTable(is_letter, preload)
+        # Для ASCII-строк — обычный словарь: str.translate по подклассу dict
+        # с __missing__ заметно медленнее
+        self._ascii_table = {code: self._table[code] for code in range(128)}
+        self._stop_words_array = None
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Возвращает конфигурацию, от которой зависят токены.
+
+        Returns:
+            Dict[str, Any]: Шаблон удаляемых символов, минимальная длина
+            токена и стоп-слова (для Unicode-токенизаторов — еще и версия
+            базы Unicode).
+        """
+        config = {
+            "pattern": self.pattern,
+            "min_length": self.min_length,
+            "stop_words": sorted(self.stop_words),
+        }
+        if self.pattern != NON_LETTER_PATTERN:
+            config["unicode_version"] = unicodedata.unidata_version
+        return config
+
+    def clean(self, text: str) -> str:
+        """
+        Приводит текст к нижнему регистру и удаляет все, кроме букв и пробелов.
+
+        Args:
+            text: Исходный текст.
+
+        Returns:
+            str: Очищенный текст, слова разделены пробелами.
+        """
+        text = text.lower()
+        if text.isascii():
+            return text.translate(self._ascii_table)
+        return text.translate(self._table)
+
+    def clean_texts(self, texts: Iterable[str]) -> List[str]:
+        """
+        Очищает колонку текстов, как clean каждый текст.
+
+        ASCII-строки очищаются str.translate. Остальные строки очищаются
+        группами по CLEAN_CHUNK_ROWS: группа склеивается через ROW_SEPARATOR,
+        коды символов (UTF-32) классифицируются одним обращением к массиву
+        классов, и результат делится обратно на строки. Так не-ASCII текст
+        не проходит посимвольный поиск в словаре str.translate.
+
+        Args:
+            texts: Тексты.
+
+        Returns:
+            List[str]: Очищенные тексты.
+        """
+        table = self._ascii_table
+        lowered = [text.lower() if text else "" for text in texts]
+        cleaned = [text.translate(table) if text.isascii() else text for text in lowered]
+        pending = [index for index, text in enumerate(cleaned) if not text.isascii()]
+        if not pending:
+            return cleaned
+
+        parts = []
+        for start in range(0, len(pending), CLEAN_CHUNK_ROWS):
+            chunk = pending[start : start + CLEAN_CHUNK_ROWS]
+            parts.extend(self._clean_joined([cleaned[index] for index in chunk]))
+        for index, text in zip(pending, parts):
+            cleaned[index] = text
+        return cleaned
+
+    def _clean_joined(self, lowered: List[str]) -> List[str]:
+        """Векторно очищает тексты, уже приведенные к нижнему регистру."""
+        joined = ROW_SEPARATOR.join(lowered)
+        if joined.count(ROW_SEPARATOR) != len(lowered) - 1:
+            # Разделитель встречается в самих текстах
+            return [text.translate(self._table) for text in lowered]
+        encoded = joined.encode("utf-32-le", "surrogatepass")
+        codes = np.frombuffer(encoded, dtype=np.uint32)
+        classes = self._table.lookup(codes)
+        keep = (classes != _DROP) | (codes == ord(ROW_SEPARATOR))
+        codes = np.where(classes == _SPACE, np.uint32(ord(" ")), codes)[keep]
+        decoded = codes.tobytes().decode("utf-32-le", "surrogatepass")
+        return decoded.split(ROW_SEPARATOR)
+
+    def preprocess(self, text: str) -> List[str]:
+        """
+        Токенизирует один текст.
+
+        Args:
+            text: Исходный текст.
+
+        Returns:
+            List[str]: Список токенов после предобработки.
+        """
+        if not text:
+            return []
+
+        # Фильтрация стоп-слов и коротких слов
+        min_length, stop_words = self.min_length, self.stop_words
+        return [
+            token
+            for token in self.clean(text).split()
+            if len(token) >= min_length and token not in stop_words
+        ]
+
+    def stop_words_array(self) -> "pa.Array":
+        """Стоп-слова в виде Arrow-массива для pc.is_in."""
+        if self._stop_words_array is None:
+            import pyarrow as pa
+
+            self._stop_words_array = pa.array(sorted(self.stop_words), pa.string())
+        return self._stop_words_array
+
+    def tokenize_texts(self, texts: Iterable[str]) -> Tuple["pa.Array", np.ndarray]:
+        """
+        Токенизирует колонку текстов целиком, как preprocess.
+
+        Очистка выполняется clean_texts, а разбиение на слова и фильтрация
+        стоп-слов и коротких слов — векторно в Arrow.
+
+        Args:
+            texts: Тексты.
+
+        Returns:
+            Tuple: Плоский Arrow-массив токенов всех текстов и массив смещений
+            (токены i-го текста — tokens[offsets[i]:offsets[i + 1]]).
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        cleaned = pa.array(self.clean_texts(texts), type=pa.string())
+        words = pc.split_pattern(cleaned, " ")
+        tokens = pc.list_flatten(words)
+        # Пустые строки между соседними пробелами отсекаются фильтром длины
+        keep = pc.and_(
+            pc.greater_equal(pc.utf8_length(tokens), self.min_length),
+            pc.invert(pc.is_in(tokens, value_set=self.stop_words_array())),
+        )
+        kept_before = np.concatenate(
+            [[0], np.cumsum(keep.to_numpy(zero_copy_only=False))]
+        )
+        offsets = kept_before[words.offsets.to_numpy()]
+        return tokens.filter(keep), offsets.astype(np.int64)
+
+
+# Имена доступных токенизаторов
+TOKENIZER_NAMES = (DEFAULT_TOKENIZER,) + tuple(
+    f"unicode-{language}" for language in STOP_WORDS_BY_LANGUAGE
+)
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name: str = DEFAULT_TOKENIZER) -> Tokenizer:
+    """
+    Возвращает токенизатор по имени (один экземпляр на процесс).
+
+    Args:
+        name: Имя токенизатора (см. TOKENIZER_NAMES).
+
+    Returns:
+        Tokenizer: Токенизатор.
+    """
+    if name == DEFAULT_TOKENIZER:
+        return Tokenizer(name, NON_LETTER_PATTERN, _is_ascii_letter, STOP_WORDS)
+    language = name.partition("unicode-")[2]
+    if not name.startswith("unicode-") or language not in STOP_WORDS_BY_LANGUAGE:
+        names = ", ".join(TOKENIZER_NAMES)
+        raise ValueError(f"Неизвестный токенизатор: {name!r} (доступны: {names})")
+    return Tokenizer(
+        name,
+        UNICODE_NON_LETTER_PATTERN,
+        _is_unicode_letter,
+        STOP_WORDS_BY_LANGUAGE[language],
+        preload=UNICODE_PRELOAD,
+    )
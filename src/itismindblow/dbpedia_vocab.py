@@ -0,0 +1,458 @@
+"""
+Целочисленный словарь и частоты слов «категория × словарь».
+
+Токены интернируются в целочисленные id, а частоты каждой категории
+хранятся отдельным массивом int32, индексированным id токена (как
+результат np.bincount). Частоты можно сохранить на диск и переиспользовать
+для любых запросов по частотам слов без повторной токенизации.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Методы оценки характерности слов (см. CategoryTermCounts.distinctive_words)
+DISTINCTIVE_METHODS = ("log_odds", "tfidf")
+# Тип частот: в int32 помещается до 2 ** 31 - 1 вхождений слова в категорию
+COUNT_DTYPE = np.int32
+
+
+class Vocabulary:
+    """Отображение токенов в целочисленные id (в порядке первого появления)."""
+
+    def __init__(self, tokens: Iterable[str] = ()) -> None:
+        self.token_to_id: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        for token in tokens:
+            self.token_to_id.setdefault(token, len(self.token_to_id))
+
+    def __len__(self) -> int:
+        return len(self.token_to_id)
+
+    def encode(self, tokens: Iterable[str]) -> List[int]:
+        """
+        Переводит токены в id, добавляя новые токены в словарь.
+
+        Args:
+            tokens: Токены.
+
+        Returns:
+            List[int]: Id токенов.
+        """
+        token_to_id = self.token_to_id
+        setdefault = token_to_id.setdefault
+        return [setdefault(token, len(token_to_id)) for token in tokens]
+
+    def encode_array(self, tokens: Any) -> np.ndarray:
+        """
+        Переводит Arrow-массив токенов в id векторно.
+
+        Уникальные токены находятся через dictionary_encode, поэтому
+        в Python-код попадает только словарь пакета, а не каждый токен.
+
+        Args:
+            tokens: Arrow-массив строк.
+
+        Returns:
+            np.ndarray: Id токенов (int64).
+        """
+        import pyarrow.compute as pc
+
+        encoded = pc.dictionary_encode(tokens)
+        remap = np.array(self.encode(encoded.dictionary.to_pylist()), dtype=np.int64)
+        return remap[encoded.indices.to_numpy(zero_copy_only=False)]
+
+    def get(self, token: str) -> Optional[int]:
+        """Возвращает id токена или None, если токена нет в словаре."""
+        return self.token_to_id.get(token)
+
+    @property
+    def tokens(self) -> List[str]:
+        """Токены в порядке id."""
+        if len(self._tokens) != len(self.token_to_id):
+            self._tokens = list(self.token_to_id)
+        return self._tokens
+
+
+class CategoryTermCounts:
+    """
+    Частоты слов по категориям: массив counts[label][token_id] на категорию.
+
+    Массив категории доходит только до самого позднего id ее слов и растет
+    с запасом; запас отбрасывается (compact) перед сохранением и передачей
+    между процессами. Для каждой категории дополнительно хранится порядок
+    первого появления слов, чтобы при равных частотах топ совпадал
+    с Counter.most_common.
+    """
+
+    def __init__(self, num_labels: int, vocabulary: Optional[Vocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.counts = [np.zeros(0, dtype=COUNT_DTYPE) for _ in range(num_labels)]
+        self._first_seen: List[List[np.ndarray]] = [[] for _ in range(num_labels)]
+
+    @property
+    def num_labels(self) -> int:
+        """Количество категорий."""
+        return len(self.counts)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self.compact()
+        return self.__dict__
+
+    def _reserve(self, label: int, size: int) -> np.ndarray:
+        """Расширяет массив категории так, чтобы в нем помещалось size токенов."""
+        counts = self.counts[label]
+        if size > counts.size:
+            grown = np.zeros(max(size, 2 * counts.size), dtype=COUNT_DTYPE)
+            grown[: counts.size] = counts
+            self.counts[label] = counts = grown
+        return counts
+
+    def _add_counts(
+        self, label: int, ids: np.ndarray, added: np.ndarray
+    ) -> np.ndarray:
+        """
+        Прибавляет частоты к словам категории.
+
+        Returns:
+            np.ndarray: Маска слов, которых раньше в категории не было.
+        """
+        counts = self._reserve(label, int(ids.max()) + 1)
+        current = counts[ids]
+        if (np.iinfo(COUNT_DTYPE).max - current < added).any():
+            raise OverflowError("Частота слова не помещается в int32")
+        counts[ids] = current + added
+        return current == 0
+
+    def compact(self) -> "CategoryTermCounts":
+        """Обрезает массивы категорий до последнего слова, отбрасывая запас."""
+        for label in range(self.num_labels):
+            ids = self.first_seen(label)
+            size = int(ids.max()) + 1 if ids.size else 0
+            if self.counts[label].size != size:
+                self.counts[label] = self.counts[label][:size].copy()
+        return self
+
+    def label_counts(self, label: int, size: Optional[int] = None) -> np.ndarray:
+        """
+        Частоты слов категории по id словаря.
+
+        Args:
+            label: Категория.
+            size: Длина результата (по умолчанию размер словаря).
+
+        Returns:
+            np.ndarray: Частоты (int64), нули для слов вне категории.
+        """
+        if size is None:
+            size = len(self.vocabulary)
+        counts = self.counts[label][:size]
+        result = np.zeros(size, dtype=np.int64)
+        result[: counts.size] = counts
+        return result
+
+    def add(self, token_ids: Iterable[int], labels: Iterable[int]) -> None:
+        """
+        Добавляет вхождения токенов.
+
+        Args:
+            token_ids: Id токенов в порядке следования в корпусе.
+            labels: Категория каждого вхождения (той же длины).
+        """
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+        labels = np.asarray(labels, dtype=np.int64)
+        if not token_ids.size:
+            return
+        width = int(token_ids.max()) + 1
+
+        # Пары (label, token) пакета: уникальные, упорядоченные по категории
+        keys = labels * width + token_ids
+        unique_keys, first_index, key_counts = np.unique(
+            keys, return_index=True, return_counts=True
+        )
+        key_labels, key_ids = np.divmod(unique_keys, width)
+        bounds = np.searchsorted(key_labels, np.arange(self.num_labels + 1))
+        for label in range(self.num_labels):
+            rows = slice(bounds[label], bounds[label + 1])
+            if rows.start == rows.stop:
+                continue
+            ids = key_ids[rows]
+            is_new = self._add_counts(label, ids, key_counts[rows])
+            if is_new.any():
+                # Новые слова запоминаются в порядке первого появления
+                order = np.argsort(first_index[rows][is_new])
+                self._first_seen[label].append(ids[is_new][order])
+
+    def add_documents(
+        self, documents: Iterable[List[str]], labels: Iterable[int]
+    ) -> None:
+        """
+        Добавляет токенизированные документы.
+
+        Args:
+            documents: Списки токенов документов.
+            labels: Категории документов.
+        """
+        encode = self.vocabulary.encode
+        token_ids: List[int] = []
+        lengths: List[int] = []
+        for tokens in documents:
+            ids = encode(tokens)
+            token_ids.extend(ids)
+            lengths.append(len(ids))
+        self.add(token_ids, np.repeat(np.asarray(labels, dtype=np.int64), lengths))
+
+    def add_tokenized(
+        self, tokens: Any, offsets: np.ndarray, labels: Iterable[int]
+    ) -> None:
+        """
+        Добавляет документы, токенизированные tokenize_texts.
+
+        Args:
+            tokens: Плоский Arrow-массив токенов документов.
+            offsets: Смещения документов в tokens.
+            labels: Категории документов.
+        """
+        self.add(
+            self.vocabulary.encode_array(tokens),
+            np.repeat(np.asarray(labels, dtype=np.int64), np.diff(offsets)),
+        )
+
+    def merge(self, other: "CategoryTermCounts") -> "CategoryTermCounts":
+        """
+        Добавляет частоты другой матрицы (со своим словарем).
+
+        Args:
+            other: Матрица частот со следующей части корпуса.
+
+        Returns:
+            CategoryTermCounts: Эта же матрица.
+        """
+        remap = np.array(self.vocabulary.encode(other.vocabulary.tokens), np.int64)
+
+        for label in range(self.num_labels):
+            other_ids = other.first_seen(label)
+            if not other_ids.size:
+                continue
+            ids = remap[other_ids]
+            is_new = self._add_counts(label, ids, other.counts[label][other_ids])
+            if is_new.any():
+                self._first_seen[label].append(ids[is_new])
+
+        return self
+
+    def first_seen(self, label: int) -> np.ndarray:
+        """Id слов категории в порядке первого появления."""
+        chunks = self._first_seen[label]
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0] if chunks else np.zeros(0, dtype=np.int64)
+
+    def top_words(self, label: int, top_n: int = 25) -> List[Tuple[str, int]]:
+        """
+        Возвращает топ-N слов категории частичной сортировкой.
+
+        Порядок совпадает с Counter.most_common: по убыванию частоты,
+        при равной частоте — по первому появлению в категории.
+
+        Args:
+            label: Категория.
+            top_n: Количество слов.
+
+        Returns:
+            List: [(word, frequency), ...].
+        """
+        if top_n <= 0:
+            return []
+        ids = self.first_seen(label)
+        counts = self.counts[label][ids]
+        if top_n < counts.size:
+            # Кандидаты — все слова с частотой не ниже N-й по величине
+            threshold = np.partition(counts, counts.size - top_n)[counts.size - top_n]
+            candidates = np.flatnonzero(counts >= threshold)
+        else:
+            candidates = np.arange(counts.size)
+        order = candidates[np.argsort(-counts[candidates], kind="stable")][:top_n]
+
+        tokens = self.vocabulary.tokens
+        return [(tokens[ids[i]], int(counts[i])) for i in order]
+
+    def vocabulary_profile(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Считает размер словаря и количество слов-гапаксов каждой категории.
+
+        Returns:
+            Tuple: Количество разных слов и количество слов, встретившихся
+            ровно один раз, по категориям.
+        """
+        sizes = [self.first_seen(label).size for label in range(self.num_labels)]
+        hapaxes = [np.count_nonzero(counts == 1) for counts in self.counts]
+        return np.array(sizes, dtype=np.int64), np.array(hapaxes, dtype=np.int64)
+
+    def distinctive_scores(self, method: str = "log_odds") -> np.ndarray:
+        """
+        Оценивает, насколько каждое слово словаря характерно для каждой категории.
+
+        'log_odds' — z-оценка логарифма отношения шансов категории против
+        всех остальных с информативным априорным распределением Дирихле
+        по частотам всего корпуса (Monroe et al., 2008): общие для всех
+        категорий слова получают оценку около нуля, редкие слова не
+        получают завышенных оценок. 'tfidf' — доля слова в категории,
+        умноженная на сглаженный IDF, где документом считается категория.
+        Частоты корпуса и IDF считаются один раз, оценки всех категорий —
+        одной матричной операцией.
+
+        Args:
+            method: 'log_odds' или 'tfidf'.
+
+        Returns:
+            np.ndarray: Оценки «категория × словарь» (строка — категория).
+        """
+        if method not in DISTINCTIVE_METHODS:
+            raise ValueError(f"Неизвестный метод: {method}")
+        size = len(self.vocabulary)
+        counts = np.zeros((self.num_labels, size), dtype=np.float64)
+        for label in range(self.num_labels):
+            counts[label] = self.label_counts(label, size)
+        label_totals = counts.sum(axis=1, keepdims=True)
+
+        if method == "tfidf":
+            document_frequency = np.count_nonzero(counts, axis=0)
+            idf = np.log((1 + self.num_labels) / (1 + document_frequency)) + 1
+            return counts / np.maximum(label_totals, 1) * idf
+
+        # Априорные счетчики — частоты слов во всем корпусе
+        prior = counts.sum(axis=0)
+        prior_total = prior.sum()
+        rest = prior - counts
+        rest_total = prior_total - label_totals
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = np.log(counts + prior) - np.log(
+                label_totals + prior_total - counts - prior
+            )
+            delta -= np.log(rest + prior) - np.log(
+                rest_total + prior_total - rest - prior
+            )
+            scores = delta / np.sqrt(1 / (counts + prior) + 1 / (rest + prior))
+        return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def distinctive_words(
+        self, top_n: int = 25, method: str = "log_odds"
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Возвращает самые характерные слова каждой категории.
+
+        Оценки считаются векторно по всему словарю (см. distinctive_scores);
+        рассматриваются только слова, встречавшиеся в категории, при равных
+        оценках — в порядке первого появления.
+
+        Args:
+            top_n: Количество слов для каждой категории.
+            method: 'log_odds' или 'tfidf'.
+
+        Returns:
+            List: Для каждой категории [(word, score), ...] по убыванию score.
+        """
+        tokens = self.vocabulary.tokens
+        scores = self.distinctive_scores(method)
+        result = []
+        for label in range(self.num_labels):
+            ids = self.first_seen(label)
+            label_scores = scores[label, ids]
+            if 0 < top_n < label_scores.size:
+                position = label_scores.size - top_n
+                threshold = np.partition(label_scores, position)[position]
+                candidates = np.flatnonzero(label_scores >= threshold)
+            else:
+                candidates = np.arange(label_scores.size if top_n > 0 else 0)
+            order = candidates[np.argsort(-label_scores[candidates], kind="stable")]
+            order = order[: max(top_n, 0)]
+            result.append(
+                [(tokens[ids[i]], round(float(label_scores[i]), 4)) for i in order]
+            )
+        return result
+
+    def word_frequencies(self, word: str) -> np.ndarray:
+        """
+        Возвращает частоты слова во всех категориях.
+
+        Args:
+            word: Слово (после preprocess_text).
+
+        Returns:
+            np.ndarray: Частота слова для каждой категории.
+        """
+        token_id = self.vocabulary.get(word)
+        frequencies = np.zeros(self.num_labels, dtype=np.int64)
+        if token_id is not None:
+            for label, counts in enumerate(self.counts):
+                if token_id < counts.size:
+                    frequencies[label] = counts[token_id]
+        return frequencies
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Возвращает состояние матрицы в виде массивов (только ненулевые ячейки).
+
+        Returns:
+            Dict: Массивы tokens, ids, counts и offsets.
+        """
+        ids = [self.first_seen(label) for label in range(self.num_labels)]
+        return {
+            "tokens": np.frombuffer(
+                "\n".join(self.vocabulary.tokens).encode(), np.uint8
+            ),
+            "ids": np.concatenate(ids),
+            "counts": np.concatenate(
+                [self.counts[label][label_ids] for label, label_ids in enumerate(ids)]
+            ).astype(COUNT_DTYPE),
+            "offsets": np.cumsum([0] + [label_ids.size for label_ids in ids]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "CategoryTermCounts":
+        """
+        Восстанавливает матрицу из результата to_arrays.
+
+        Args:
+            arrays: Массивы tokens, ids, counts и offsets.
+
+        Returns:
+            CategoryTermCounts: Матрица частот.
+        """
+        text = arrays["tokens"].tobytes().decode()
+        ids, counts, offsets = arrays["ids"], arrays["counts"], arrays["offsets"]
+
+        terms = cls(offsets.size - 1, Vocabulary(text.split("\n") if text else ()))
+        for label in range(terms.num_labels):
+            label_slice = slice(offsets[label], offsets[label + 1])
+            label_ids = ids[label_slice]
+            if label_ids.size:
+                label_counts = np.zeros(label_ids.max() + 1, dtype=COUNT_DTYPE)
+                label_counts[label_ids] = counts[label_slice]
+                terms.counts[label] = label_counts
+                terms._first_seen[label].append(label_ids)
+        return terms
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет матрицу в .npz (только ненулевые ячейки).
+
+        Args:
+            path: Путь к файлу.
+        """
+        np.savez_compressed(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "CategoryTermCounts":
+        """
+        Загружает матрицу, сохраненную методом save.
+
+        Args:
+            path: Путь к файлу.
+
+        Returns:
+            CategoryTermCounts: Матрица частот.
+        """
+        with np.load(path) as data:
+            return cls.from_arrays(dict(data))
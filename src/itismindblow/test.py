@@ -2,14 +2,67 @@
 Unit tests для анализа DBpedia.
 """
 
+import argparse
+import json
+import os
+import pickle
+import tempfile
 import unittest
+from collections import Counter
 from typing import Dict, List
 
-from assignment import load_dbpedia_dataset, analyze_category_distribution
+import numpy as np
+import pyarrow as pa
+
+from assignment import (
+    load_dbpedia_dataset,
+    analyze_category_distribution,
+    parse_args,
+    update_incrementally,
+)
+from dbpedia_benchmark import (
+    IMPORTED_MODULES,
+    compare_with_baseline,
+    generate_corpus,
+    measure_import_time,
+)
+from dbpedia_cache import (
+    TokenizedCorpus,
+    dataset_fingerprint,
+    load_or_build_token_cache,
+    tokenize_corpus,
+)
+from dbpedia_charts import ChartRenderer, ChartSpec, parse_chart
+from dbpedia_classifier import evaluate_classifier, train_classifier
+from dbpedia_dedup import duplicate_mask, duplicate_report, find_near_duplicates
+from dbpedia_index import (
+    InvertedIndex,
+    decode_varints,
+    encode_varints,
+    load_or_build_index,
+)
+from dbpedia_ngrams import NGramCounter, extract_top_ngrams_by_category
+from dbpedia_profile import StageProfiler
+from dbpedia_results import read_results, write_results
+from dbpedia_snapshot import load_snapshot, write_snapshot
+from dbpedia_engine import (
+    DBpediaAnalyzer,
+    analyze_dataset,
+    merge_partials,
+    split_into_shards,
+    stream_analyzer,
+)
+from dbpedia_stats import SpaceSaving
+from dbpedia_tokenizers import get_tokenizer
+from dbpedia_vocab import CategoryTermCounts
 from dbpedia_modules import (
+    calculate_stats,
     preprocess_text,
+    preprocess_texts,
     get_category_name,
     analyze_text_statistics,
+    build_category_term_counts,
+    extract_distinctive_words_by_category,
     extract_top_words_by_category,
 )
 
@@ -114,6 +167,578 @@ class TestDBpediaAnalysis(unittest.TestCase):
         for metric in title_stats.values():
             self.assertGreaterEqual(metric, 0)
 
+    def test_analyze_dataset_matches_separate_analyzers(self) -> None:
+        """Тест: однопроходный движок совпадает с отдельными анализаторами."""
+        result = analyze_dataset(self.sample_dataset, top_n=25)
+
+        self.assertEqual(
+            result["category_distribution"],
+            analyze_category_distribution(self.sample_dataset),
+        )
+        self.assertEqual(
+            result["text_statistics"], analyze_text_statistics(self.sample_dataset)
+        )
+        self.assertEqual(
+            result["top_words_by_category"],
+            extract_top_words_by_category(self.sample_dataset, top_n=25),
+        )
+
+    def test_analyze_dataset_parallel_matches_single_process(self) -> None:
+        """Тест: параллельный режим дает тот же результат, что и один процесс."""
+        dataset = self.sample_dataset * 5
+        self.assertEqual(
+            analyze_dataset(dataset, top_n=10, workers=2),
+            analyze_dataset(dataset, top_n=10, workers=1),
+        )
+
+    def test_stream_analyzer_matches_in_memory_analysis(self) -> None:
+        """Тест: потоковый режим по пакетам дает те же результаты."""
+        dataset = self.sample_dataset * 3
+        batches = [
+            {
+                field: [item[field] for item in dataset[start : start + 4]]
+                for field in ("title", "content", "label")
+            }
+            for start in range(0, len(dataset), 4)
+        ]
+        expected = analyze_dataset(dataset, top_n=10)
+        result = stream_analyzer(iter(batches)).results(top_n=10)
+
+        self.assertEqual(
+            result["category_distribution"], expected["category_distribution"]
+        )
+        self.assertEqual(
+            result["top_words_by_category"], expected["top_words_by_category"]
+        )
+        for field in ("title", "content"):
+            for metric, value in expected["text_statistics"][field].items():
+                self.assertAlmostEqual(
+                    result["text_statistics"][field][metric], value, places=9
+                )
+
+    def test_analyzers_accept_arrow_table(self) -> None:
+        """Тест: анализаторы работают с Arrow-таблицей так же, как со списком."""
+        import pyarrow as pa
+
+        table = pa.Table.from_pylist(self.sample_dataset)
+
+        self.assertEqual(
+            analyze_category_distribution(table),
+            analyze_category_distribution(self.sample_dataset),
+        )
+        self.assertEqual(
+            analyze_text_statistics(table),
+            analyze_text_statistics(self.sample_dataset),
+        )
+        self.assertEqual(
+            extract_top_words_by_category(table),
+            extract_top_words_by_category(self.sample_dataset),
+        )
+        self.assertEqual(analyze_dataset(table), analyze_dataset(self.sample_dataset))
+
+    def test_labels_out_of_range_rejected(self) -> None:
+        """Тест: label вне диапазона 0-13 дает понятную ошибку."""
+        for label in (14, -1):
+            dataset = self.sample_dataset + [
+                {"title": "Bad", "content": "bad label", "label": label}
+            ]
+            with self.assertRaisesRegex(ValueError, "диапазона"):
+                analyze_dataset(dataset)
+            with self.assertRaisesRegex(ValueError, "диапазона"):
+                analyze_category_distribution(dataset)
+
+    def test_term_counts_save_and_load(self) -> None:
+        """Тест: матрица частот сохраняется и загружается без потерь."""
+        terms = build_category_term_counts(self.sample_dataset * 2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "terms.npz")
+            terms.save(path)
+            loaded = CategoryTermCounts.load(path)
+
+        for label in range(3):
+            self.assertEqual(loaded.top_words(label, 5), terms.top_words(label, 5))
+        self.assertEqual(loaded.word_frequencies("software")[0], 2)
+        self.assertEqual(loaded.word_frequencies("unknown").sum(), 0)
+
+    def test_term_counts_top_words_match_counter(self) -> None:
+        """Тест: топ слов совпадает с Counter.most_common, включая равные частоты."""
+        documents = [
+            ["beta", "alpha", "gamma", "alpha"],
+            ["delta", "beta", "epsilon"],
+            ["gamma", "zeta", "delta"],
+        ]
+        terms = CategoryTermCounts(1)
+        terms.add_documents(documents[:2], [0, 0])
+        tail = CategoryTermCounts(1)
+        tail.add_documents(documents[2:], [0])
+        terms.merge(tail)
+
+        expected = Counter(token for tokens in documents for token in tokens)
+        for top_n in range(1, 8):
+            self.assertEqual(terms.top_words(0, top_n), expected.most_common(top_n))
+
+    def test_term_counts_keep_compact_per_label_arrays(self) -> None:
+        """Тест: частоты хранятся в int32 по категориям и сжимаются при передаче."""
+        terms = CategoryTermCounts(3)
+        terms.add_documents([["alpha", "beta"], ["gamma", "alpha"]], [0, 2])
+        terms.add_documents([["delta"], ["alpha"]], [2, 0])
+        restored = pickle.loads(pickle.dumps(terms))
+
+        self.assertEqual([counts.size for counts in restored.counts], [2, 0, 4])
+        self.assertEqual(restored.counts[0].dtype, np.int32)
+        self.assertEqual(restored.word_frequencies("alpha").tolist(), [2, 0, 1])
+        self.assertEqual(restored.vocabulary_profile()[0].tolist(), [2, 0, 3])
+        restored.merge(terms)
+        self.assertEqual(restored.top_words(0, 1), [("alpha", 4)])
+
+    def test_token_cache_reuse_and_invalidation(self) -> None:
+        """Тест: кэш токенов переиспользуется и зависит от данных."""
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = load_or_build_token_cache(self.sample_dataset, tmp)
+            self.assertEqual(
+                corpus.tokens("content", 2),
+                preprocess_text(self.sample_dataset[2]["content"]),
+            )
+            load_or_build_token_cache(self.sample_dataset, tmp)
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+            changed = self.sample_dataset[:2]
+            load_or_build_token_cache(changed, tmp)
+            self.assertEqual(len(os.listdir(tmp)), 2)
+
+            analyzer = DBpediaAnalyzer().update_tokenized(corpus)
+            result = analyzer.results(top_n=25)
+        self.assertEqual(result, analyze_dataset(self.sample_dataset, top_n=25))
+        # Токены, встречающиеся только в заголовках, в словарь частот не попадают
+        self.assertEqual(
+            len(analyzer.terms.vocabulary),
+            len(build_category_term_counts(self.sample_dataset).vocabulary),
+        )
+
+    def test_preprocess_texts_matches_preprocess_text(self) -> None:
+        """Тест: пакетная токенизация совпадает с построчной."""
+        texts = [
+            "The quick brown fox jumps over the lazy dog!",
+            "Café Ünïcode\u00a0text\twith\x1cseparators, digits 1999 and ΣΟΦΙΑ",
+            "",
+            "it is a",
+        ] + [item["content"] for item in self.sample_dataset]
+
+        self.assertEqual(
+            preprocess_texts(texts), [preprocess_text(text) for text in texts]
+        )
+
+    def test_approximate_top_words_bounds(self) -> None:
+        """Тест: приближенный топ слов сообщает корректные границы ошибок."""
+        dataset = self.sample_dataset * 4 + [
+            {"title": "Extra", "content": "company software company", "label": 0}
+        ]
+        exact = dict(analyze_dataset(dataset)["top_words_by_category"]["Company"])
+        result = DBpediaAnalyzer(top_k_capacity=3).update(dataset).results(top_n=3)
+
+        top_words = result["top_words_by_category"]["Company"]
+        errors = dict(result["top_words_errors_by_category"]["Company"])
+        self.assertEqual(top_words[0], ("company", 6))
+        for word, count in top_words:
+            self.assertLessEqual(count - errors[word], exact[word])
+            self.assertLessEqual(exact[word], count)
+
+    def test_space_saving_batches(self) -> None:
+        """Тест: пакеты добавляются точно, пока сводка не заполнена."""
+        sketch = SpaceSaving(10).update({"a": 5, "b": 3})
+        for _ in range(4):
+            sketch.update({"c": 2})
+        self.assertEqual(sketch.counts, {"a": 5, "b": 3, "c": 8})
+        self.assertEqual(sketch.errors, {"a": 0, "b": 0, "c": 0})
+        self.assertEqual(sketch.total, 16)
+
+        batches = [{"x": 4, "y": 1}, {"y": 2, "z": 3}, {"x": 1, "w": 5}]
+        sketch = SpaceSaving(2)
+        exact: Dict[str, int] = {}
+        for batch in batches:
+            sketch.update(batch)
+            for item, count in batch.items():
+                exact[item] = exact.get(item, 0) + count
+        for item, count in sketch.counts.items():
+            self.assertLessEqual(count - sketch.errors[item], exact[item])
+            self.assertLessEqual(exact[item], count)
+
+    def test_streaming_text_statistics_modes(self) -> None:
+        """Тест: точный потоковый режим совпадает с обычным, t-digest близок."""
+        dataset = self.sample_dataset * 7
+        expected = analyze_text_statistics(dataset)
+        exact = analyze_text_statistics(dataset, quantiles="exact", batch_size=4)
+        sketch = analyze_text_statistics(dataset, quantiles="tdigest", batch_size=4)
+        columns = {
+            field: [item[field] for item in dataset] for field in ("title", "content")
+        }
+        self.assertEqual(
+            analyze_text_statistics(columns, quantiles="exact", batch_size=4), exact
+        )
+
+        for field in ("title", "content"):
+            for metric, value in expected[field].items():
+                self.assertAlmostEqual(exact[field][metric], value, places=9)
+                self.assertAlmostEqual(sketch[field][metric], value, delta=2.0)
+            self.assertAlmostEqual(
+                sketch[field]["mean_length"], expected[field]["mean_length"], places=9
+            )
+
+    def test_partial_results_merge_hierarchically(self) -> None:
+        """Тест: частичные результаты шардов объединяются в полный результат."""
+        dataset = self.sample_dataset * 4
+        expected = analyze_dataset(dataset, top_n=10)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for index, shard in enumerate(split_into_shards(dataset, 4)):
+                paths.append(os.path.join(tmp, f"part{index}.npz"))
+                DBpediaAnalyzer().update(shard).save(paths[-1])
+            merge_partials(paths[:2]).save(os.path.join(tmp, "left.npz"))
+            merge_partials(paths[2:]).save(os.path.join(tmp, "right.npz"))
+            result = merge_partials(
+                [os.path.join(tmp, "left.npz"), os.path.join(tmp, "right.npz")]
+            ).results(top_n=10)
+
+        self.assertEqual(result, expected)
+
+    def test_incremental_update_matches_full_analysis(self) -> None:
+        """Тест: инкрементальный анализ дописанных строк равен полному."""
+        dataset = self.sample_dataset * 3
+        table = pa.Table.from_pylist(dataset)
+        grown = pa.Table.from_pylist(dataset + self.sample_dataset[:2])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            args = parse_args(["--incremental", "--state", os.path.join(tmp, "s.npz")])
+            update_incrementally(table, args)
+            result = update_incrementally(grown, args)
+            self.assertEqual(result.total_samples, grown.num_rows)
+            self.assertEqual(
+                result.results(top_n=10), analyze_dataset(grown, top_n=10)
+            )
+
+            # Измененная уже обработанная строка приводит к полному пересчету
+            changed = pa.Table.from_pylist(dataset + self.sample_dataset[1:])
+            self.assertEqual(
+                update_incrementally(changed, args).results(top_n=10),
+                analyze_dataset(changed, top_n=10),
+            )
+
+    def test_stage_profiler_records_stages_and_trace(self) -> None:
+        """Тест: профилировщик записывает этапы и Chrome trace."""
+        profiler = StageProfiler()
+        with profiler.stage("analysis", rows=len(self.sample_dataset)):
+            analyze_dataset(self.sample_dataset)
+        with profiler.stage("json_write") as record:
+            record["rows"] = 1
+
+        profile = profiler.to_dict()
+        self.assertEqual(
+            [stage["name"] for stage in profile["stages"]], ["analysis", "json_write"]
+        )
+        for stage in profile["stages"]:
+            for key in ("wall_s", "cpu_s", "peak_rss_mb", "rows_per_s"):
+                self.assertIn(key, stage)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            profiler.write_chrome_trace(path)
+            with open(path, encoding="utf-8") as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]["ph"], "X")
+
+    def test_benchmark_corpus_and_baseline_comparison(self) -> None:
+        """Тест: синтетический корпус детерминирован, регрессии находятся."""
+        corpus = generate_corpus(140, seed=1)
+        self.assertTrue(corpus.equals(generate_corpus(140, seed=1)))
+        self.assertEqual(set(corpus.column("label").to_pylist()), set(range(14)))
+
+        baseline = {"results": {"140": {"f": {"rows_per_s": 100.0, "peak_mb": 10.0}}}}
+        slower = {"results": {"140": {"f": {"rows_per_s": 70.0, "peak_mb": 10.0}}}}
+        same = {"results": {"140": {"f": {"rows_per_s": 90.0, "peak_mb": 11.0}}}}
+        self.assertEqual(len(compare_with_baseline(slower, baseline, 0.2)), 1)
+        self.assertEqual(compare_with_baseline(same, baseline, 0.2), [])
+
+    def test_snapshot_projection_and_stratified_sample(self) -> None:
+        """Тест: снимок читает нужные колонки и выборку по категориям."""
+        table = generate_corpus(280, seed=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snapshot.arrow")
+            write_snapshot(table, path)
+
+            self.assertTrue(load_snapshot(path).equals(table))
+            titles = load_snapshot(path, columns=["title"])
+            self.assertEqual(titles.column_names, ["title"])
+
+            sample = load_snapshot(path, sample_fraction=0.1, seed=3)
+            self.assertEqual(
+                Counter(sample.column("label").to_pylist()),
+                Counter({label: 2 for label in range(14)}),
+            )
+            self.assertTrue(
+                sample.equals(load_snapshot(path, sample_fraction=0.1, seed=3))
+            )
+
+    def test_imports_without_heavy_dependencies(self) -> None:
+        """Тест: модули импортируются без matplotlib, pandas, datasets."""
+        for module in IMPORTED_MODULES:
+            self.assertEqual(measure_import_time(module)["heavy_modules"], [])
+
+    def test_streaming_classifier_learns_categories(self) -> None:
+        """Тест: классификатор учится по пакетам, а счетчики пакетов складываются."""
+        corpus = generate_corpus(1540, seed=4)
+        train, test = corpus.slice(0, 1400), corpus.slice(1400)
+
+        model = train_classifier(train.to_batches(max_chunksize=300), n_features=4096)
+        whole = train_classifier([train], n_features=4096)
+        self.assertTrue((model.feature_counts == whole.feature_counts).all())
+
+        evaluation = evaluate_classifier(model, test.to_batches(max_chunksize=50))
+        self.assertEqual(evaluation["documents"], 140)
+        self.assertGreater(evaluation["accuracy"], 0.9)
+
+    def test_distinctive_words_skip_shared_words(self) -> None:
+        """Тест: характерные слова — не общие для всех категорий."""
+        dataset = [
+            {"title": "A", "content": f"shared shared {word} {word}", "label": label}
+            for label, word in enumerate(["alpha", "beta", "gamma"])
+        ] * 5
+        for method in ("log_odds", "tfidf"):
+            distinctive = extract_distinctive_words_by_category(dataset, 1, method)
+            self.assertEqual(distinctive["Company"][0][0], "alpha")
+            self.assertEqual(distinctive["EducationalInstitution"][0][0], "beta")
+            self.assertEqual(distinctive["Artist"][0][0], "gamma")
+
+        results = analyze_dataset(dataset, top_n=1)
+        self.assertEqual(
+            results["distinctive_words_by_category"]["Company"][0][0], "alpha"
+        )
+
+    def test_near_duplicates_found_and_excluded(self) -> None:
+        """Тест: почти дубликаты группируются в кластеры и исключаются."""
+        corpus = generate_corpus(300, seed=5)
+        contents = corpus.column("content").to_pylist()
+        # Строка 7 — копия строки 3 с измененным последним словом
+        contents[7] = contents[3].rsplit(" ", 1)[0] + " zzzzzz"
+        labels = corpus.column("label").to_pylist()
+        table = pa.table({"content": contents, "label": labels})
+
+        clusters = find_near_duplicates(table, threshold=0.7, batch_size=64)
+        self.assertEqual([cluster.tolist() for cluster in clusters], [[3, 7]])
+
+        report = duplicate_report(clusters, labels, threshold=0.7)
+        self.assertEqual(report["duplicate_documents"], 1)
+        category = get_category_name(labels[7])
+        self.assertEqual(report["by_category"][category]["duplicates"], 1)
+
+        keep = duplicate_mask(clusters, table.num_rows)
+        self.assertEqual(int(keep.sum()), 299)
+        self.assertFalse(keep[7])
+        with self.assertRaises(SystemExit):
+            parse_args(["--exclude-duplicates"])
+
+    def test_inverted_index_queries(self) -> None:
+        """Тест: сжатый индекс отвечает на AND/OR-запросы с фильтром по label."""
+        values = [0, 1, 127, 128, 16384, 1 << 30]
+        self.assertEqual(decode_varints(encode_varints(values)).tolist(), values)
+
+        dataset = [
+            {"title": "A", "content": "Oscar winning soundtrack.", "label": 12},
+            {"title": "B", "content": "A soundtrack album.", "label": 11},
+            {"title": "C", "content": "The Oscar ceremony.", "label": 12},
+            {"title": "D", "content": "Soundtrack, Oscars, soundtrack!", "label": 12},
+        ]
+        index = InvertedIndex.build(tokenize_corpus(dataset))
+        with tempfile.TemporaryDirectory() as tmp:
+            index.save(os.path.join(tmp, "index"))
+            index = InvertedIndex.open(os.path.join(tmp, "index"))
+            self.assertEqual(index.search("soundtrack AND oscar").tolist(), [0])
+            self.assertEqual(index.search("soundtrack OR oscar").tolist(), [0, 1, 2, 3])
+            self.assertEqual(
+                index.search("soundtrack", labels=["Film"]).tolist(), [0, 3]
+            )
+            self.assertEqual(index.search("oscar oscars").size, 0)
+            with self.assertRaises(ValueError):
+                index.search("the AND oscar")
+
+    def test_index_rebuilt_when_data_changes(self) -> None:
+        """Тест: сохраненный индекс перестраивается при изменении датасета."""
+        dataset = [dict(item) for item in self.sample_dataset]
+        builds = []
+
+        def load_index(path: str) -> InvertedIndex:
+            def build() -> TokenizedCorpus:
+                builds.append(path)
+                return tokenize_corpus(dataset)
+
+            return load_or_build_index(build, dataset_fingerprint(dataset), path)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index")
+            self.assertEqual(load_index(path).search("software").tolist(), [0])
+            load_index(path)
+            self.assertEqual(len(builds), 1)
+
+            dataset[2]["content"] += " Software lover."
+            self.assertEqual(load_index(path).search("software").tolist(), [0, 2])
+            self.assertEqual(len(builds), 2)
+
+    def test_top_ngrams_match_exact_counts_within_memory_cap(self) -> None:
+        """Тест: топ n-грамм совпадает с точным подсчетом и при лимите памяти."""
+        corpus = generate_corpus(700, seed=6)
+        expected: Dict[int, Counter] = {}
+        for row in corpus.to_pylist():
+            tokens = preprocess_text(row["content"])
+            expected.setdefault(row["label"], Counter()).update(
+                " ".join(pair) for pair in zip(tokens, tokens[1:])
+            )
+        top = extract_top_ngrams_by_category(corpus, n=2, top_n=5)
+        for label, counts in expected.items():
+            ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            self.assertEqual(top[get_category_name(label)], ranked[:5])
+
+        # Шарды с маленьким лимитом, объединенные через частичные файлы
+        shards = [
+            DBpediaAnalyzer(ngram_sizes=(2,), ngram_memory_mb=0.05).update_batch(shard)
+            for shard in split_into_shards(corpus, 3)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f"{index}.npz") for index in range(3)]
+            for shard, path in zip(shards, paths):
+                shard.save(path)
+            merged = merge_partials(paths)
+        counter: NGramCounter = merged.ngrams[2]
+        self.assertLessEqual(counter.counts.size, counter.max_entries)
+        self.assertGreater(merged.ngram_error_bounds()["bigrams"], 0)
+        self.assertEqual(
+            merged.top_ngrams(2, 3),
+            {category: words[:3] for category, words in top.items()},
+        )
+
+    def test_ngram_ids_separate_crc32_collisions(self) -> None:
+        """Тест: n-граммы из токенов с одинаковым crc32 считаются раздельно."""
+        # crc32("plumless") == crc32("buckeroo")
+        dataset = [
+            {"content": "plumless meadow plumless meadow", "label": 0},
+            {"content": "buckeroo meadow", "label": 0},
+        ]
+        top = extract_top_ngrams_by_category(dataset, n=2, top_n=3)["Company"]
+        self.assertEqual(
+            top,
+            [("plumless meadow", 2), ("buckeroo meadow", 1), ("meadow plumless", 1)],
+        )
+
+    def test_per_category_statistics_match_per_label_passes(self) -> None:
+        """Тест: статистика по категориям за один проход равна отдельным проходам."""
+        corpus = generate_corpus(560, seed=7)
+        results = analyze_dataset(corpus)
+        streaming = stream_analyzer(
+            corpus.to_batches(max_chunksize=100), quantiles="tdigest"
+        ).per_category_statistics()
+        self.assertEqual(results["per_category_statistics"], streaming)
+
+        rows = corpus.to_pylist()
+        for label in range(14):
+            subset = [row for row in rows if row["label"] == label]
+            category = results["per_category_statistics"][get_category_name(label)]
+            self.assertEqual(category["documents"], len(subset))
+            tokens = [preprocess_text(row["content"]) for row in subset]
+            stats = dict(category["content"])
+            histogram = stats.pop("length_histogram")
+            self.assertEqual(sum(histogram["counts"]), len(subset))
+            expected = calculate_stats(
+                [len(row["content"]) for row in subset], [len(t) for t in tokens]
+            )
+            for key, value in expected.items():
+                self.assertAlmostEqual(stats[key], value, places=9)
+
+            counts = Counter(token for document in tokens for token in document)
+            self.assertEqual(category["vocabulary_size"], len(counts))
+            hapax = sum(1 for count in counts.values() if count == 1)
+            self.assertAlmostEqual(category["hapax_ratio"], hapax / len(counts))
+
+    def test_chart_renderer_builds_charts_in_background(self) -> None:
+        """Тест: графики разных форматов и размеров строятся в фоне."""
+        self.assertEqual(
+            parse_chart("small.svg:7x5@100"), ChartSpec("small.svg", (7.0, 5.0), 100)
+        )
+        self.assertEqual(parse_chart("a.png"), ChartSpec("a.png"))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_chart("a.png:7@x")
+
+        distribution = {"Company": 3, "Artist": 5}
+        with tempfile.TemporaryDirectory() as tmp:
+            charts = [
+                ChartSpec(os.path.join(tmp, "chart.png"), (4, 3), 50),
+                ChartSpec(os.path.join(tmp, "chart.svg"), (4, 3)),
+            ]
+            renderer = ChartRenderer(charts).start(distribution)
+            paths = renderer.wait()
+            self.assertEqual(paths, [chart.path for chart in charts])
+            with open(paths[0], "rb") as f:
+                self.assertEqual(f.read(8), b"\x89PNG\r\n\x1a\n")
+            with open(paths[1], encoding="utf-8") as f:
+                self.assertIn("<svg", f.read())
+
+        # Ошибка до ожидания графиков не оставляет работающий пул
+        with self.assertRaises(RuntimeError):
+            with ChartRenderer(charts) as renderer:
+                raise RuntimeError("ошибка анализа")
+        with self.assertRaises(RuntimeError):
+            renderer.start(distribution)
+
+    def test_binary_results_round_trip(self) -> None:
+        """Тест: архив результатов читается в тот же словарь, что и JSON."""
+        results = analyze_dataset(generate_corpus(420, seed=3))
+        results["odd"] = {
+            "mixed": [1, 2.5] * 5,
+            "huge": [2**70] * 8,
+            "separator": [["a\x00b", 1]] * 8,
+            "flags": [True] * 8,
+            "empty": [],
+        }
+        expected = json.loads(json.dumps(results))
+        with tempfile.TemporaryDirectory() as tmp:
+            for compress in (False, True):
+                path = os.path.join(tmp, f"results_{compress}.npz")
+                write_results(results, path, compress=compress)
+                self.assertEqual(read_results(path), expected)
+            with self.assertRaises(ValueError):
+                write_results({"__npz__": 1}, path)
+
+    def test_unicode_tokenizer_keeps_non_latin_letters(self) -> None:
+        """Тест: Unicode-токенизатор сохраняет буквы любых алфавитов."""
+        text = "Café naïve — Москва является столицей России и городом"
+        self.assertEqual(preprocess_text(text), ["caf", "nave"])
+        self.assertEqual(
+            preprocess_text(text, "unicode-ru"),
+            ["café", "naïve", "москва", "столицей", "россии", "городом"],
+        )
+        self.assertIs(get_tokenizer("unicode-ru"), get_tokenizer("unicode-ru"))
+        with self.assertRaises(ValueError):
+            get_tokenizer("unicode-xx")
+
+        texts = ["Ελληνικά ΟΔΟΣ", "", "Straße\u00a0München", "e\u0301té 東京", None]
+        for name in ("ascii", "unicode-de"):
+            self.assertEqual(
+                preprocess_texts(texts, name),
+                [preprocess_text(text, name) for text in texts],
+            )
+
+        records = [
+            {"title": "Город", "content": "Москва является столицей", "label": 8},
+            {"title": "Dorf", "content": "Köln liegt am Rhein", "label": 8},
+        ]
+        analyzer = DBpediaAnalyzer(tokenizer="unicode-ru").update(records)
+        self.assertEqual(
+            [word for word, _ in analyzer.top_words()["Village"]],
+            ["москва", "столицей", "köln", "liegt", "rhein"],
+        )
+        with self.assertRaises(ValueError):
+            analyzer.merge(DBpediaAnalyzer().update(records))
+
 
 if __name__ == "__main__":
     unittest.main()
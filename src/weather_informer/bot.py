@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import timedelta
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
@@ -28,7 +29,7 @@ async def send_weather_update(context: ContextTypes.DEFAULT_TYPE):
     user_id = job.kwargs["user_id"]
     city = job.kwargs["city"]
 
-    weather_msg = get_weather(city)
+    weather_msg = await asyncio.to_thread(get_weather, city)
     try:
         await context.bot.send_message(chat_id=user_id, text=weather_msg)
     except Exception as e:
@@ -48,7 +49,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     city = update.message.text.strip()
 
     # Проверяем, существует ли город
-    test_msg = get_weather(city)
+    test_msg = await asyncio.to_thread(get_weather, city)
     if "❌" in test_msg or "⚠️" in test_msg:
         await update.message.reply_text("Город не найден. Попробуйте снова.")
         return
@@ -121,5 +122,5 @@ async def now(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not city:
         await update.message.reply_text("Сначала отправьте название города.")
         return
-    weather_msg = get_weather(city)
+    weather_msg = await asyncio.to_thread(get_weather, city)
     await update.message.reply_text(weather_msg)
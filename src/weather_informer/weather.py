@@ -1,15 +1,36 @@
 import requests
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+# Сколько секунд ответ для города считается свежим (OpenWeatherMap
+# обновляет данные примерно раз в 10 минут); 0 отключает кэш
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+# Сколько городов хранится в кэше; давно не запрашиваемые вытесняются
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "1024"))
 
 logger = logging.getLogger(__name__)
 
-def get_weather(city: str) -> str:
+# Кэш: нормализованный город -> (момент устаревания, сообщение)
+_cache = OrderedDict()
+# Запросы, которые сейчас выполняются: нормализованный город -> Future
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def _normalize_city(city: str) -> str:
+    return " ".join(city.split()).casefold()
+
+
+def _fetch_weather(city: str):
+    """Запрашивает погоду; возвращает сообщение и можно ли его кэшировать."""
     url = "http://api.openweathermap.org/data/2.5/weather"
     params = {
         "q": city,
@@ -25,9 +46,44 @@ def get_weather(city: str) -> str:
             description = data["weather"][0]["description"].capitalize()
             city_name = data["name"]
             country = data["sys"]["country"]
-            return f"🌤 Погода в {city_name}, {country}:\n🌡 {temp}°C\n📜 {description}"
+            return f"🌤 Погода в {city_name}, {country}:\n🌡 {temp}°C\n📜 {description}", True
         else:
-            return "❌ Не удалось получить погоду. Проверьте название города."
+            # Кэшируем только «город не найден»; ошибки ключа и лимита
+            # запросов (401, 429) должны повториться при следующем вызове
+            message = "❌ Не удалось получить погоду. Проверьте название города."
+            return message, response.status_code == 404
     except Exception as e:
         logger.error(f"Ошибка при запросе погоды для '{city}': {e}")
-        return "⚠️ Произошла ошибка при получении погоды."
+        return "⚠️ Произошла ошибка при получении погоды.", False
+
+
+def get_weather(city: str) -> str:
+    key = _normalize_city(city)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _cache.move_to_end(key)
+            return entry[1]
+        future = _in_flight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _in_flight[key] = future
+
+    # Одновременные запросы того же города ждут уже отправленный запрос
+    if not is_owner:
+        return future.result()
+
+    message, cacheable = "⚠️ Произошла ошибка при получении погоды.", False
+    try:
+        message, cacheable = _fetch_weather(city)
+    finally:
+        with _lock:
+            del _in_flight[key]
+            if cacheable and WEATHER_CACHE_TTL > 0 and WEATHER_CACHE_SIZE > 0:
+                _cache[key] = (time.monotonic() + WEATHER_CACHE_TTL, message)
+                _cache.move_to_end(key)
+                while len(_cache) > WEATHER_CACHE_SIZE:
+                    _cache.popitem(last=False)
+        future.set_result(message)
+    return message